@@ -0,0 +1,147 @@
+"""
+Backup Catalog
+
+Keeps backups ordered by timestamp so that restore_at can find the closest
+backup at or before a timestamp with bisect, and thins old backups according
+to a retention policy.
+
+A retention policy is a sequence of (age, spacing) tiers with increasing
+ages: backups more than `age` older than the current time are kept at most
+one per `spacing` (the earliest in each spacing-aligned bucket). Newer
+backups are all kept.
+
+Example usage:
+    # Keep everything from the last hour, hourly for a day, daily after that
+    catalog = BackupCatalog([(3600, 3600), (86400, 86400)])
+    catalog.add(100, backup)
+    catalog.thin(now=200)
+    catalog.floor(150)       # backup taken at 100
+    catalog.range(0, 1000)   # [100]
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# A tier's head offset is compacted away once it passes this many entries
+MIN_COMPACT_HEAD = 64
+
+
+class _Tier:
+    """Timestamps of one retention tier, sorted; entries before head are removed."""
+
+    __slots__ = ("timestamps", "head")
+
+    def __init__(self):
+        self.timestamps: List[int] = []
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps) - self.head
+
+    def insert(self, timestamp: int) -> None:
+        timestamps = self.timestamps
+        if not timestamps or timestamps[-1] < timestamp:
+            timestamps.append(timestamp)
+        else:
+            i = bisect_left(timestamps, timestamp, self.head)
+            if i == len(timestamps) or timestamps[i] != timestamp:
+                timestamps.insert(i, timestamp)
+
+    def pop_front(self) -> int:
+        timestamp = self.timestamps[self.head]
+        self.head += 1
+        if self.head >= MIN_COMPACT_HEAD and 2 * self.head >= len(self.timestamps):
+            del self.timestamps[:self.head]
+            self.head = 0
+        return timestamp
+
+    def has_bucket(self, timestamp: int, spacing: int) -> bool:
+        """Return True if a neighbour of timestamp shares its spacing bucket."""
+        timestamps = self.timestamps
+        bucket = timestamp // spacing
+        i = bisect_left(timestamps, timestamp, self.head)
+        return ((i > self.head and timestamps[i - 1] // spacing == bucket)
+                or (i < len(timestamps) and timestamps[i] // spacing == bucket))
+
+
+class BackupCatalog:
+    """
+    Backups indexed by timestamp, thinned by a tiered retention policy.
+
+    Backups are appended to the newest tier and move to older tiers as they
+    age, so each backup is handled once per tier and thinning never rebuilds
+    the catalog.
+    """
+
+    def __init__(self, retention: Optional[Sequence[Tuple[int, int]]] = None):
+        """
+        Initialize an empty catalog.
+
+        Args:
+            retention: (age, spacing) tiers with strictly increasing ages and
+                positive spacings; None keeps every backup
+        """
+        self._retention = list(retention or [])
+        for i, (age, spacing) in enumerate(self._retention):
+            if spacing <= 0 or (i and age <= self._retention[i - 1][0]):
+                raise ValueError(f"Invalid retention policy: {retention!r}")
+        self._tiers = [_Tier() for _ in range(len(self._retention) + 1)]
+        self._backups: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._backups)
+
+    def __getitem__(self, timestamp: int) -> Any:
+        return self._backups[timestamp]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.range(None, None))
+
+    def values(self):
+        """Return the retained backups, in no particular order."""
+        return self._backups.values()
+
+    def add(self, timestamp: int, backup: Any) -> None:
+        """Store a backup, replacing any backup taken at the same timestamp."""
+        if timestamp not in self._backups:
+            self._tiers[0].insert(timestamp)
+        self._backups[timestamp] = backup
+
+    def floor(self, timestamp: int) -> Optional[Any]:
+        """Return the backup with the closest timestamp <= timestamp, if any."""
+        best = None
+        for tier in self._tiers:
+            i = bisect_right(tier.timestamps, timestamp, tier.head)
+            if i > tier.head and (best is None or tier.timestamps[i - 1] > best):
+                best = tier.timestamps[i - 1]
+        return None if best is None else self._backups[best]
+
+    def range(self, start: Optional[int], end: Optional[int]) -> List[int]:
+        """Return the timestamps of retained backups in [start, end], in order."""
+        found = []
+        for tier in self._tiers:
+            timestamps = tier.timestamps
+            lo = tier.head if start is None else bisect_left(timestamps, start, tier.head)
+            hi = len(timestamps) if end is None else bisect_right(timestamps, end, lo)
+            found.extend(timestamps[lo:hi])
+        found.sort()
+        return found
+
+    def thin(self, now: int) -> List[int]:
+        """
+        Apply the retention policy as of now.
+
+        Returns:
+            The timestamps of the backups that were dropped
+        """
+        dropped = []
+        for i, (age, spacing) in enumerate(self._retention):
+            tier, older = self._tiers[i], self._tiers[i + 1]
+            while len(tier) and tier.timestamps[tier.head] < now - age:
+                timestamp = tier.pop_front()
+                if older.has_bucket(timestamp, spacing):
+                    del self._backups[timestamp]
+                    dropped.append(timestamp)
+                else:
+                    older.insert(timestamp)
+        return dropped
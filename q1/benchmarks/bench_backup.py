@@ -0,0 +1,46 @@
+"""
+Backup Benchmark
+
+Measures backup_at and restore_at latency, the cost of the first write that
+has to copy a page afterwards, and of materializing a restored backup.
+Run with: python benchmarks/bench_backup.py [num_keys] [fields_per_key]
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36}{elapsed * 1e3:10.3f} ms")
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fields_per_key = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    db = InMemoryDB()
+    for k in range(num_keys):
+        for f in range(fields_per_key):
+            db.put_at_with_ttl(100, f"key{k}", f"field{f}", "value", 1000)
+    print(f"{num_keys} keys x {fields_per_key} fields")
+
+    timed("backup_at", lambda: db.backup_at(200))
+    timed("first write after backup", lambda: db.put_at(210, "key0", "field0", "new"))
+    timed("second write to the same key", lambda: db.put_at(211, "key0", "field1", "new"))
+    timed("backup_at again", lambda: db.backup_at(220))
+    timed("restore_at", lambda: db.restore_at(300, 200))
+    timed("read through the restored base", lambda: db.get_at(300, "key1", "field0"))
+    timed("first write to a restored key", lambda: db.put_at(301, "key1", "field0", "new"))
+    timed("materialize_restore", lambda: db.materialize_restore())
+
+
+if __name__ == "__main__":
+    main()
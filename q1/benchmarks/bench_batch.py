@@ -0,0 +1,85 @@
+"""
+Batch Operation Benchmark
+
+Compares the throughput of put/get/delete/scan one call at a time with the
+put_many/get_many/delete_many/scan_many batches.
+Run with: python benchmarks/bench_batch.py [num_keys] [fields_per_key] [batch_size]
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def rate(label, count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{count / elapsed:14,.0f} ops/s")
+
+
+def batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    fields_per_key = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    puts = [(f"key{k}", f"field{f}", "value") for k in range(num_keys)
+            for f in range(fields_per_key)]
+    pairs = [(key, field) for key, field, _ in puts]
+    keys = [f"key{k}" for k in range(num_keys)]
+    print(f"{len(puts)} fields in batches of {batch_size}")
+
+    single, batched = InMemoryDB(), InMemoryDB()
+
+    def put_single():
+        for key, field, value in puts:
+            single.put(key, field, value)
+
+    def put_batched():
+        for batch in batches(puts, batch_size):
+            batched.put_many(batch)
+
+    def get_single():
+        for key, field in pairs:
+            single.get(key, field)
+
+    def get_batched():
+        for batch in batches(pairs, batch_size):
+            batched.get_many(batch)
+
+    def scan_single():
+        for key in keys:
+            single.scan(key)
+
+    def scan_batched():
+        for batch in batches(keys, batch_size):
+            batched.scan_many(batch)
+
+    def delete_single():
+        for key, field in pairs:
+            single.delete(key, field)
+
+    def delete_batched():
+        for batch in batches(pairs, batch_size):
+            batched.delete_many(batch)
+
+    rate("put", len(puts), put_single)
+    rate("put_many", len(puts), put_batched)
+    rate("get", len(pairs), get_single)
+    rate("get_many", len(pairs), get_batched)
+    rate("scan", len(keys), scan_single)
+    rate("scan_many", len(keys), scan_batched)
+    rate("delete", len(pairs), delete_single)
+    rate("delete_many", len(pairs), delete_batched)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Bulk Load Benchmark
+
+Writes a JSONL and a CSV file of records grouped by key, as an export would
+list them, a tenth of them with TTLs, and loads each into an empty database
+with load_stream. Compares the rate with the same JSONL file read line by
+line and applied with put_at / put_at_with_ttl, and with load_stream over
+records already in memory, which leaves out parsing, both grouped by key
+and with every key's fields spread across the stream.
+Run with: python benchmarks/bench_bulk_load.py [num_keys] [fields_per_key] [field_index]
+e.g. python benchmarks/bench_bulk_load.py 100000 10 radix
+"""
+
+import csv
+import json
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def records(num_keys, fields, by_key=True):
+    for i in range(num_keys * fields):
+        k, f = divmod(i, fields) if by_key else reversed(divmod(i, num_keys))
+        ttl = 3600 if (k + f) % 10 == 0 else None
+        yield f"user{k}", f"field{f:03d}", f"value{k}-{f}", 100 + f, ttl
+
+
+def write_files(directory, num_keys, fields):
+    jsonl = os.path.join(directory, "records.jsonl")
+    with open(jsonl, "w", encoding="utf-8") as file:
+        for key, field, value, timestamp, ttl in records(num_keys, fields):
+            record = {"key": key, "field": field, "value": value, "timestamp": timestamp}
+            if ttl is not None:
+                record["ttl"] = ttl
+            file.write(json.dumps(record) + "\n")
+    path = os.path.join(directory, "records.csv")
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["key", "field", "value", "timestamp", "ttl"])
+        writer.writerows(record[:4] + ("" if record[4] is None else record[4],)
+                         for record in records(num_keys, fields))
+    return jsonl, path
+
+
+def put_each(db, path):
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            ttl = record.get("ttl")
+            if ttl is None:
+                db.put_at(record["timestamp"], record["key"], record["field"], record["value"])
+            else:
+                db.put_at_with_ttl(record["timestamp"], record["key"], record["field"],
+                                   record["value"], ttl)
+
+
+def report(label, count, seconds):
+    print(f"{label:<24} {seconds:7.2f} s  {count / seconds:10,.0f} records/s")
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fields = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    field_index = sys.argv[3] if len(sys.argv) > 3 else "sorted"
+    count = num_keys * fields
+    with tempfile.TemporaryDirectory() as directory:
+        jsonl, csv_path = write_files(directory, num_keys, fields)
+        print(f"{count} records over {num_keys} keys, {field_index} field index")
+
+        db = InMemoryDB(field_index=field_index)
+        start = time.perf_counter()
+        put_each(db, jsonl)
+        report("put_at per JSONL line", count, time.perf_counter() - start)
+        del db
+
+        for label, source, format in (("load_stream jsonl", jsonl, "jsonl"),
+                                      ("load_stream csv", csv_path, "csv")):
+            stats = InMemoryDB(field_index=field_index).load_stream(source, format=format)
+            report(label, stats["records"], stats["seconds"])
+        for label, by_key in (("load_stream records", True), ("  interleaved", False)):
+            in_memory = list(records(num_keys, fields, by_key))
+            stats = InMemoryDB(field_index=field_index).load_stream(in_memory, format="records")
+            report(label, stats["records"], stats["seconds"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Client Latency Benchmark
+
+Offers a fixed request rate (open loop: requests are issued on schedule
+whether or not earlier ones have finished) from one process and reports the
+latency percentiles, measured from when each request was due, for:
+  - AsyncClient with pool sizes 1 and 4
+and, closed loop from one thread, the threaded Client against a new
+connection per call (which cannot keep up with an open-loop rate). With no
+--port it starts a server in a subprocess on a free port and stops it
+afterwards.
+Run with: python benchmarks/bench_client.py [--rate 10000] [--seconds 3]
+          [--read-ratio 0.9] [--keys 10000] [--port PORT]
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from client import AsyncClient, Client
+
+SERVER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(label, latencies, elapsed):
+    latencies.sort()
+    print(f"{label:<28} {len(latencies) / elapsed:8,.0f} req/s  "
+          f"p50 {percentile(latencies, 0.5) * 1e3:7.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1e3:7.2f} ms  "
+          f"p99.9 {percentile(latencies, 0.999) * 1e3:7.2f} ms")
+
+
+def request(rng, read_ratio, num_keys):
+    key = f"key{rng.randrange(num_keys)}"
+    if rng.random() < read_ratio:
+        return "get", (key, "field")
+    return "put", (key, "field", "value")
+
+
+async def open_loop(host, port, pool_size, rate, seconds, read_ratio, num_keys):
+    """Issue rate requests per second for seconds; return the elapsed time and latencies."""
+    rng = random.Random(42)
+    latencies = []
+    client = AsyncClient(host, port, pool_size=pool_size)
+
+    async def one(due, name, args):
+        await getattr(client, name)(*args)
+        latencies.append(time.perf_counter() - due)
+
+    await client.ping()  # Open the first connection before timing
+    tasks = []
+    total = int(rate * seconds)
+    start = time.perf_counter()
+    issued = 0
+    while issued < total:
+        due_now = min(total, int((time.perf_counter() - start) * rate) + 1)
+        while issued < due_now:
+            name, args = request(rng, read_ratio, num_keys)
+            tasks.append(asyncio.ensure_future(one(start + issued / rate, name, args)))
+            issued += 1
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return elapsed, latencies
+
+
+def closed_loop(host, port, pooled, count, read_ratio, num_keys):
+    rng = random.Random(42)
+    latencies = []
+    client = Client(host, port, pool_size=1)
+    start = time.perf_counter()
+    for _ in range(count):
+        name, args = request(rng, read_ratio, num_keys)
+        began = time.perf_counter()
+        if pooled:
+            getattr(client, name)(*args)
+        else:
+            with Client(host, port, pool_size=1) as once:
+                getattr(once, name)(*args)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--rate", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--read-ratio", type=float, default=0.9)
+    parser.add_argument("--keys", type=int, default=10_000)
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        server = subprocess.Popen([sys.executable, SERVER, "--port", "0"],
+                                  stdout=subprocess.PIPE, text=True)
+        port = int(server.stdout.readline().rsplit(":", 1)[1])
+    try:
+        print(f"Open loop at {args.rate:,} req/s for {args.seconds:g} s "
+              f"(latency from when each request was due)")
+        for label, pool_size in [("AsyncClient, pool_size=1", 1),
+                                 ("AsyncClient, pool_size=4", 4)]:
+            elapsed, latencies = asyncio.run(open_loop(args.host, port, pool_size, args.rate,
+                                                       args.seconds, args.read_ratio, args.keys))
+            report(label, latencies, elapsed)
+
+        print("\nClosed loop, one thread")
+        count = int(args.rate * args.seconds) // 10
+        for label, pooled in [("Client", True), ("connect per call", False)]:
+            elapsed, latencies = closed_loop(args.host, port, pooled, count,
+                                             args.read_ratio, args.keys)
+            report(label, latencies, elapsed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Lock Contention Benchmark
+
+Measures throughput of ConcurrentDB from 1 to 32 threads at several
+read/write mixes, against an InMemoryDB behind one global lock, and how long
+readers stall while backups are taken in the background.
+Run with: python benchmarks/bench_concurrency.py [ops_per_thread] [num_keys]
+"""
+
+import sys
+import os
+import random
+import threading
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from concurrent_db import ConcurrentDB
+from impl import InMemoryDB
+
+
+class GlobalLockDB:
+    """Baseline: every call holds one lock."""
+
+    def __init__(self):
+        self._db = InMemoryDB()
+        self._lock = threading.Lock()
+
+    def get_at(self, *args):
+        with self._lock:
+            return self._db.get_at(*args)
+
+    def put_at(self, *args):
+        with self._lock:
+            self._db.put_at(*args)
+
+    def backup_at(self, *args):
+        with self._lock:
+            self._db.backup_at(*args)
+
+
+def fill(db, num_keys):
+    for i in range(num_keys):
+        db.put_at(0, f"key{i}", "name", "value")
+
+
+def run(db, num_threads, ops_per_thread, num_keys, read_ratio):
+    """Return ops/s and the worst single-operation latency."""
+    barrier = threading.Barrier(num_threads + 1)
+    worst = [0.0] * num_threads
+
+    def worker(n):
+        rng = random.Random(n)
+        plan = [(rng.random() < read_ratio, f"key{rng.randrange(num_keys)}")
+                for _ in range(ops_per_thread)]
+        barrier.wait()
+        slowest = 0.0
+        for i, (read, key) in enumerate(plan):
+            start = time.perf_counter()
+            if read:
+                db.get_at(i, key, "name")
+            else:
+                db.put_at(i, key, "name", "value")
+            slowest = max(slowest, time.perf_counter() - start)
+        worst[n] = slowest
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return num_threads * ops_per_thread / elapsed, max(worst)
+
+
+def bench_backup_stalls(db, ops_per_thread, num_keys):
+    """Return the worst read latency while another thread takes backups."""
+    stop = threading.Event()
+
+    def backups():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            db.backup_at(i)
+            db.put_at(i, "key0", "name", "value")  # forces the table copy
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=backups)
+    thread.start()
+    _, worst = run(db, 4, ops_per_thread, num_keys, 1.0)
+    stop.set()
+    thread.join()
+    return worst
+
+
+def main():
+    ops_per_thread = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    num_keys = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    for read_ratio in (0.5, 0.9, 0.99):
+        print(f"reads {read_ratio:.0%}")
+        for num_threads in (1, 2, 4, 8, 16, 32):
+            results = []
+            for make in (GlobalLockDB, ConcurrentDB):
+                db = make()
+                fill(db, num_keys)
+                results.append(run(db, num_threads, ops_per_thread, num_keys, read_ratio))
+            (base_rate, base_worst), (rate, worst) = results
+            print(f"  {num_threads:2} threads  global lock {base_rate:10,.0f} ops/s"
+                  f"  striped {rate:10,.0f} ops/s"
+                  f"  worst op {base_worst * 1e3:6.2f} / {worst * 1e3:6.2f} ms")
+
+    print("worst read latency with backups running")
+    for make in (GlobalLockDB, ConcurrentDB):
+        db = make()
+        fill(db, num_keys * 10)
+        worst = bench_backup_stalls(db, ops_per_thread, num_keys * 10)
+        print(f"  {make.__name__:<14}{worst * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Columnar Expiry Index Benchmark
+
+Measures the bulk operations of ExpiryColumns against ExpiryQueue over the
+same TTL entries: sweeping a tenth of them out with pop_due, counting live
+entries and bucketing remaining TTLs, then purge_expired end to end on a
+database with expiry_index="columns" and on one with the default heap. Run
+with NumPy installed to measure the vectorized column.
+Run with: python benchmarks/bench_expiry_columns.py [num_entries] [num_db_entries]
+e.g. python benchmarks/bench_expiry_columns.py 10000000 200000
+"""
+
+import random
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import expiry_columns
+from expiry import ExpiryQueue
+from expiry_columns import ExpiryColumns
+from impl import TTL_BUCKETS, InMemoryDB
+
+FIELDS = [f"f{i}" for i in range(10)]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def fill(index, untils):
+    for i, until in enumerate(untils):
+        index.push(until, f"user{i // len(FIELDS)}", FIELDS[i % len(FIELDS)])
+    return index
+
+
+def bench_index(label, index, untils):
+    _, load_ms = timed(fill, index, untils)
+    live, count_ms = timed(index.count_live, 10_000)
+    _, histogram_ms = timed(index.histogram, 10_000, TTL_BUCKETS)
+    swept, sweep_ms = timed(lambda: sum(1 for _ in index.pop_due(10_000)))
+    print(f"{label:<8} load {load_ms:8.0f} ms  count_live {count_ms:7.1f} ms  "
+          f"histogram {histogram_ms:7.1f} ms  pop_due {sweep_ms:7.1f} ms "
+          f"({swept} of {live + swept} swept)")
+
+
+def bench_purge(expiry_index, untils):
+    db = InMemoryDB(expiry_index=expiry_index)
+    db.put_many_at(0, [(f"user{i // len(FIELDS)}", FIELDS[i % len(FIELDS)], "v", until)
+                       for i, until in enumerate(untils)])
+    stats, stats_ms = timed(db.ttl_stats_at, 10_000)
+    purged, purge_ms = timed(db.purge_expired, 10_000)
+    print(f"{expiry_index:<8} ttl_stats_at {stats_ms:7.1f} ms  purge_expired {purge_ms:7.1f} ms "
+          f"({purged} fields, {stats['live']} left)")
+
+
+def main():
+    num_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    num_db_entries = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    rng = random.Random(1)
+    untils = [rng.randrange(1, 100_000) for _ in range(num_entries)]
+    print(f"{num_entries} TTL entries, numpy {'on' if expiry_columns.np else 'off'}")
+    bench_index("columns", ExpiryColumns(), untils)
+    bench_index("heap", ExpiryQueue(), untils)
+
+    print(f"\n{num_db_entries} TTL fields in a database")
+    for expiry_index in ("columns", "heap"):
+        bench_purge(expiry_index, untils[:num_db_entries])
+
+
+if __name__ == "__main__":
+    main()
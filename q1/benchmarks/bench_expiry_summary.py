@@ -0,0 +1,54 @@
+"""
+Expiry Summary Benchmark
+
+Measures scan_at on keys without TTLs, keys whose TTL fields have not
+expired yet, and keys holding expired fields, each with the per-key expiry
+summary (the fast path) and with per-field visibility checks on every field,
+which is what scans did before the summary existed.
+Run with: python benchmarks/bench_expiry_summary.py [num_keys] [fields_per_key]
+e.g. python benchmarks/bench_expiry_summary.py 1000 50
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import FOREVER, InMemoryDB
+
+ROUNDS = 20
+
+
+def load(num_keys, fields, ttl_every):
+    db = InMemoryDB()
+    db.put_many_at(100, [(f"user{k}", f"f{f:03d}", "v", 50) if ttl_every and f % ttl_every == 0
+                         else (f"user{k}", f"f{f:03d}", "v")
+                         for k in range(num_keys) for f in range(fields)])
+    return db
+
+
+def scan_all(db, num_keys, timestamp):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for k in range(num_keys):
+            db.scan_at(timestamp, f"user{k}")
+    return (time.perf_counter() - start) / (ROUNDS * num_keys) * 1e6
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    fields = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for label, ttl_every, timestamp in (("no TTLs", 0, 120), ("TTLs pending", 5, 120),
+                                        ("TTLs expired", 5, 200)):
+        db = load(num_keys, fields, ttl_every)
+        fast_us = scan_all(db, num_keys, timestamp)
+        for page in db._pages.values():
+            page.fast_from = FOREVER  # Never take the fast path
+        checked_us = scan_all(db, num_keys, timestamp)
+        print(f"{label:<13} scan_at {fast_us:7.2f} us/key with the summary, "
+              f"{checked_us:7.2f} us/key checking every field")
+
+
+if __name__ == "__main__":
+    main()
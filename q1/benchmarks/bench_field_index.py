@@ -0,0 +1,96 @@
+"""
+Field Index Benchmark
+
+Compares memory and prefix-scan latency of the field index options against a
+flat dict that is filtered and sorted on every query.
+Run with: python benchmarks/bench_field_index.py [num_fields]
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import SortedFieldIndex
+from radix_index import FOREVER, RadixFieldIndex
+
+
+def make_fields(n):
+    regions = ["eu-west", "eu-central", "us-east", "us-west", "ap-south"]
+    channels = ["web", "api", "mobile"]
+    return [
+        f"session:{channels[i % 3]}:{regions[i % 5]}:{i:08d}"
+        for i in range(n)
+    ]
+
+
+def build_flat(fields):
+    return {field: None for field in fields}
+
+
+def build_sorted(fields):
+    index = SortedFieldIndex()
+    for field in fields:
+        index.add(field)
+    return index
+
+
+def build_radix(fields):
+    index = RadixFieldIndex()
+    for field in fields:
+        index.add(field)
+        index.set_until(field, FOREVER)
+    return index
+
+
+def query_flat(flat, prefix):
+    return sorted(field for field in flat if field.startswith(prefix))
+
+
+def query_index(index, prefix):
+    return list(index.iter_prefix(prefix, 0))
+
+
+def measure(build, fields):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    structure = build(fields)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return structure, after - before
+
+
+def time_query(query, structure, prefix, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = query(structure, prefix)
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, len(result)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fields = make_fields(n)
+    # Field strings are shared by all structures, so only structure overhead is measured
+    candidates = [
+        ("flat dict", build_flat, query_flat),
+        ("sorted", build_sorted, query_index),
+        ("radix", build_radix, query_index),
+    ]
+    prefixes = ["session:web:eu-west:", "session:api:us-east:0000", "session:"]
+
+    print(f"{n} fields")
+    print(f"{'structure':<12}{'memory':>12}  " + "".join(f"{p!r:>30}" for p in prefixes))
+    for name, build, query in candidates:
+        structure, size = measure(build, fields)
+        timings = []
+        for prefix in prefixes:
+            elapsed, matches = time_query(query, structure, prefix, repeat=5)
+            timings.append(f"{elapsed * 1e3:9.2f} ms ({matches:>7})")
+        print(f"{name:<12}{size / 1e6:9.1f} MB  " + "".join(f"{t:>30}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
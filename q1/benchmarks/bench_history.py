@@ -0,0 +1,65 @@
+"""
+Field History Benchmark
+
+Measures get_at at random past timestamps and put_at at random earlier
+timestamps (out-of-order writes) on fields with long version chains, and
+compares the chain lookup with a walk back from the newest version.
+Run with: python benchmarks/bench_history.py [chain_length ...]
+e.g. python benchmarks/bench_history.py 10 100 1000 10000
+"""
+
+import random
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+OPS = 20_000
+
+
+def walk_back(chain, timestamp):
+    for version in reversed(chain):
+        if version[0] <= timestamp:
+            return version
+    return None
+
+
+def bench(length):
+    rng = random.Random(1)
+    db = InMemoryDB()
+    for t in range(length):
+        db.put_at(t * 10, "sensor1", "reading", str(t))
+    times = [rng.randrange(length * 10) for _ in range(OPS)]
+
+    start = time.perf_counter()
+    for t in times:
+        db.get_at(t, "sensor1", "reading")
+    get_us = (time.perf_counter() - start) / OPS * 1e6
+
+    chain = db._pages["sensor1"].fields["reading"]
+    start = time.perf_counter()
+    for t in times:
+        InMemoryDB._version_at(chain, t)
+    lookup_us = (time.perf_counter() - start) / OPS * 1e6
+    start = time.perf_counter()
+    for t in times:
+        walk_back(chain, t)
+    walk_us = (time.perf_counter() - start) / OPS * 1e6
+
+    late = [t * 10 + 5 for t in rng.sample(range(length), min(length, OPS))]
+    start = time.perf_counter()
+    for t in late:
+        db.put_at(t, "sensor1", "reading", "late")
+    put_us = (time.perf_counter() - start) / len(late) * 1e6
+
+    print(f"{length:>8,} versions  get_at {get_us:6.2f} us  put_at (late) {put_us:6.2f} us  "
+          f"lookup {lookup_us:6.2f} us  walk back {walk_us:8.2f} us")
+
+
+if __name__ == "__main__":
+    lengths = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    for length in lengths:
+        bench(length)
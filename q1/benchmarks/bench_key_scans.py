@@ -0,0 +1,67 @@
+"""
+Key Scan Benchmark
+
+Loads keys spread over many tenant prefixes and compares scan_keys with a
+prefix against filtering and sorting every key in the table, for a narrow
+prefix, a wide one and a paged range scan. It also reports the one-off cost
+of building the key index on the first scan.
+Run with: python benchmarks/bench_key_scans.py [num_keys] [tenants]
+e.g. python benchmarks/bench_key_scans.py 1000000 1000
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+REPEAT = 20
+
+
+def filtered(db, timestamp, prefix):
+    return sorted(key for key in db._pages
+                  if key.startswith(prefix) and db._key_visible(timestamp, key))
+
+
+def timed(fn, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1e3, result
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tenants = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    db = InMemoryDB()
+    db.put_many_at(100, [(f"tenant{i % tenants:05d}:user:{i:08d}", "name", "x")
+                         for i in range(num_keys)])
+
+    start = time.perf_counter()
+    db.scan_keys_at(100, "tenant00000:")
+    print(f"{num_keys:,} keys: index built on first scan in "
+          f"{(time.perf_counter() - start) * 1e3:8.1f} ms")
+
+    for label, prefix in (("one tenant", "tenant00042:"), ("100 tenants", "tenant000")):
+        index_ms, keys = timed(lambda: db.scan_keys_at(100, prefix))
+        filter_ms, expected = timed(lambda: filtered(db, 100, prefix), repeat=2)
+        assert keys == expected
+        print(f"{label:<12} {len(keys):8,} keys  scan_keys {index_ms:8.3f} ms  "
+              f"filter all keys {filter_ms:8.1f} ms")
+
+    def paged():
+        pages, start_key = 0, "tenant00500:"
+        while pages < 10:
+            page = db.scan_keys_range_at(100, start_key, None, limit=100)
+            start_key = page[-1] + chr(0)
+            pages += 1
+        return pages
+
+    page_ms, _ = timed(paged)
+    print(f"10 range pages of 100 keys: {page_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
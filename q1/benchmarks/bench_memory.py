@@ -0,0 +1,56 @@
+"""
+Memory Benchmark
+
+Measures the memory allocated per stored field, loading keys with a fixed
+number of fields each, a quarter of them with a TTL. Keys and field names are
+built per call, as they would arrive from a network or parser.
+Run with: python benchmarks/bench_memory.py [num_fields ...] [--fields-per-key N]
+e.g. python benchmarks/bench_memory.py 1000000 10000000 50000000
+"""
+
+import sys
+import os
+import gc
+import tracemalloc
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def measure(num_fields, fields_per_key):
+    gc.collect()
+    tracemalloc.start()
+    db = InMemoryDB()
+    batch = []
+    for i in range(num_fields):
+        key, field = f"user{i // fields_per_key}", f"field{i % fields_per_key}"
+        if i % 4 == 0:
+            batch.append((key, field, "v", 1000))
+        else:
+            batch.append((key, field, "v"))
+        if len(batch) == 10_000:
+            db.put_many_at(100, batch)
+            batch = []
+    db.put_many_at(100, batch)
+    batch = None
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{num_fields:>12,} fields {used / 2**20:10.1f} MB {used / num_fields:8.1f} bytes/field")
+    return db
+
+
+def main():
+    args = sys.argv[1:]
+    fields_per_key = 10
+    if "--fields-per-key" in args:
+        i = args.index("--fields-per-key")
+        fields_per_key = int(args[i + 1])
+        del args[i:i + 2]
+    for num_fields in [int(arg) for arg in args] or [1_000_000]:
+        measure(num_fields, fields_per_key)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Range Scan Benchmark
+
+Writes a key holding many time-bucketed event fields (evt:<timestamp>) and
+measures "latest 50 events" with scan_range(reverse=True, limit=50) against
+a full scan of the key filtered and sliced on the client, for both field
+indexes.
+Run with: python benchmarks/bench_range_scans.py [fields ...]
+e.g. python benchmarks/bench_range_scans.py 1000 10000 100000
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+LIMIT = 50
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def bench(num_fields, field_index):
+    db = InMemoryDB(field_index=field_index)
+    db.put_many_at(100, [("stream1", f"evt:{i:012d}", str(i)) for i in range(num_fields)])
+    db.put_many_at(100, [("stream1", f"tag:{i}", "t") for i in range(100)])
+    repeat = max(3, 200_000 // num_fields)
+
+    range_us, latest = timed(
+        lambda: db.scan_range_at(100, "stream1", "evt:", "evt;", LIMIT, reverse=True), 200)
+    scan_us, filtered = timed(
+        lambda: [entry for entry in db.scan_at(100, "stream1")
+                 if entry.startswith("evt:")][-LIMIT:][::-1], repeat)
+    assert latest == filtered
+    print(f"{field_index:<6} {num_fields:>8,} fields  scan_range {range_us:8.1f} us  "
+          f"scan + filter {scan_us:10.1f} us")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    for size in sizes:
+        for field_index in ("sorted", "radix"):
+            bench(size, field_index)
@@ -0,0 +1,65 @@
+"""
+Scan Iterator Benchmark
+
+Compares scan_at with iter_scan_at and scan_page_at on one large key: time to
+the first result, time to read everything, and peak memory allocated.
+Run with: python benchmarks/bench_scan.py [num_fields] [field_index]
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def measure(label, first, rest):
+    tracemalloc.start()
+    start = time.perf_counter()
+    state = first()
+    first_at = time.perf_counter() - start
+    rest(state)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<16}first {first_at * 1e3:9.3f} ms   all {total * 1e3:9.1f} ms"
+          f"   peak {peak / 2**20:7.2f} MB")
+
+
+def main():
+    num_fields = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    field_index = sys.argv[2] if len(sys.argv) > 2 else "sorted"
+
+    db = InMemoryDB(field_index=field_index)
+    db.put_many_at(100, [("big", f"field{i:07d}", "value") for i in range(num_fields)])
+    print(f"{num_fields} fields, {field_index} index")
+
+    measure("scan_at", lambda: db.scan_at(100, "big"), lambda results: None)
+
+    def drain(results):
+        for _ in results:
+            pass
+
+    def first_iter():
+        results = db.iter_scan_at(100, "big")
+        next(results)
+        return results
+
+    measure("iter_scan_at", first_iter, drain)
+
+    def first_page():
+        return db.scan_page_at(100, "big", limit=1000)
+
+    def remaining_pages(state):
+        _, cursor = state
+        while cursor is not None:
+            _, cursor = db.scan_page_at(100, "big", after=cursor, limit=1000)
+
+    measure("scan_page_at", first_page, remaining_pages)
+
+
+if __name__ == "__main__":
+    main()
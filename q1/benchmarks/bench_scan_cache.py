@@ -0,0 +1,59 @@
+"""
+Scan Cache Benchmark
+
+Replays a dashboard workload: the same (key, prefix) scans issued over and
+over, with an occasional write to one of the keys in between. It reports
+the time per scan with and without scan_cache_size, the cache's hit rate,
+and the overhead the cache adds to scans that always miss.
+Run with: python benchmarks/bench_scan_cache.py [fields_per_key] [scans_per_write]
+e.g. python benchmarks/bench_scan_cache.py 200 100
+"""
+
+import random
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+KEYS = 50
+SCANS = 100_000
+
+
+def run(fields, scans_per_write, cache_size):
+    rng = random.Random(1)
+    db = InMemoryDB(scan_cache_size=cache_size)
+    db.put_many_at(100, [(f"dash{k}", f"metric:{f:04d}", "0")
+                         for k in range(KEYS) for f in range(fields)])
+    queries = [(f"dash{rng.randrange(KEYS)}", rng.choice(["metric:00", "metric:01", "metric:"]))
+               for _ in range(SCANS)]
+    start = time.perf_counter()
+    for i, (key, prefix) in enumerate(queries):
+        if scans_per_write and i % scans_per_write == 0:
+            db.put_at(100, key, f"metric:{rng.randrange(fields):04d}", str(i))
+        db.scan_with_prefix_at(100, key, prefix)
+    return (time.perf_counter() - start) / SCANS * 1e6, db.scan_cache_stats()
+
+
+def main():
+    fields = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    scans_per_write = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    plain_us, _ = run(fields, scans_per_write, 0)
+    cached_us, stats = run(fields, scans_per_write, 100_000)
+    hit_rate = stats["hits"] / (stats["hits"] + stats["misses"])
+    print(f"{KEYS} keys x {fields} fields, one write per {scans_per_write} scans")
+    print(f"  no cache    {plain_us:8.2f} us/scan")
+    print(f"  scan cache  {cached_us:8.2f} us/scan  hit rate {hit_rate:6.1%}  "
+          f"evictions {stats['evictions']:,}")
+
+    plain_us, _ = run(fields, 1, 0)
+    cached_us, stats = run(fields, 1, 100_000)
+    print(f"one write per scan: no cache {plain_us:8.2f} us/scan, "
+          f"scan cache {cached_us:8.2f} us/scan (hit rate "
+          f"{stats['hits'] / (stats['hits'] + stats['misses']):6.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Scan Result Format Benchmark
+
+Measures scan_at throughput with each scan_results mode, and the cost of
+formatting entries to strings afterwards.
+Run with: python benchmarks/bench_scan_results.py [num_keys] [fields_per_key]
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    fields_per_key = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    items = [(f"key{k}", f"field{f}", "value") for k in range(num_keys)
+             for f in range(fields_per_key)]
+    keys = [f"key{k}" for k in range(num_keys)]
+    print(f"{num_keys} keys x {fields_per_key} fields")
+
+    for mode in ("string", "tuple", "entry"):
+        db = InMemoryDB(scan_results=mode)
+        db.put_many_at(100, items)
+        start = time.perf_counter()
+        for key in keys:
+            db.scan_at(100, key)
+        elapsed = time.perf_counter() - start
+        print(f"scan_at, {mode:<8}{len(items) / elapsed:14,.0f} fields/s")
+
+    start = time.perf_counter()
+    for key in keys:
+        [str(entry) for entry in db.scan_at(100, key)]
+    elapsed = time.perf_counter() - start
+    print(f"entry + str()  {len(items) / elapsed:14,.0f} fields/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Network Server Load Generator
+
+Drives a server.py instance over several connections, each keeping a fixed
+number of requests in flight, and reports throughput and latency
+percentiles. With no --port it starts a server in a subprocess on a free
+port and stops it afterwards.
+Run with: python benchmarks/bench_server.py [--connections 8] [--depth 32]
+          [--requests 100000] [--read-ratio 0.9] [--keys 10000] [--port PORT]
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from protocol import FrameDecoder, decode, encode
+
+SERVER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+
+
+async def connection(host, port, count, depth, read_ratio, num_keys, seed, latencies):
+    """Send count requests with up to depth of them in flight; record each latency."""
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random(seed)
+    decoder = FrameDecoder()
+    sent_at = []
+    sent = received = 0
+
+    def send(n):
+        nonlocal sent
+        frames = []
+        now = time.perf_counter()
+        for _ in range(n):
+            key = f"key{rng.randrange(num_keys)}"
+            if rng.random() < read_ratio:
+                frames.append(encode(["get", key, "field"]))
+            else:
+                frames.append(encode(["put", key, "field", "value"]))
+            sent_at.append(now)
+        sent += n
+        writer.write(b"".join(frames))
+
+    send(min(depth, count))
+    while received < count:
+        data = await reader.read(65536)
+        if not data:
+            raise ConnectionError("server closed the connection")
+        replies = [decode(payload) for payload in decoder.feed(data)]
+        now = time.perf_counter()
+        for reply in replies:
+            if not reply[0]:
+                raise RuntimeError(f"request failed: {reply}")
+            latencies.append(now - sent_at[received])
+            received += 1
+        if sent < count:
+            send(min(len(replies), count - sent))
+            await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def load(host, port, connections, depth, requests, read_ratio, num_keys):
+    latencies = []
+    per_connection = requests // connections
+    start = time.perf_counter()
+    await asyncio.gather(*(connection(host, port, per_connection, depth, read_ratio, num_keys,
+                                      seed, latencies)
+                           for seed in range(connections)))
+    return time.perf_counter() - start, latencies
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--read-ratio", type=float, default=0.9)
+    parser.add_argument("--keys", type=int, default=10_000)
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        server = subprocess.Popen([sys.executable, SERVER, "--port", "0"],
+                                  stdout=subprocess.PIPE, text=True)
+        port = int(server.stdout.readline().rsplit(":", 1)[1])
+    try:
+        for depth in sorted({1, args.depth}):
+            elapsed, latencies = asyncio.run(load(args.host, port, args.connections, depth,
+                                                  args.requests, args.read_ratio, args.keys))
+            latencies.sort()
+            print(f"{args.connections} connections, depth {depth:3}: "
+                  f"{len(latencies) / elapsed:10,.0f} req/s  "
+                  f"p50 {percentile(latencies, 0.5) * 1e3:6.2f} ms  "
+                  f"p99 {percentile(latencies, 0.99) * 1e3:6.2f} ms  "
+                  f"p99.9 {percentile(latencies, 0.999) * 1e3:6.2f} ms")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
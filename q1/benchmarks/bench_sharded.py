@@ -0,0 +1,58 @@
+"""
+Sharded Database Benchmark
+
+Measures batched put and get throughput of ShardedDB as the number of worker
+processes grows, against a single in-process InMemoryDB, and the round-trip
+latency of single calls.
+Run with: python benchmarks/bench_sharded.py [num_items] [batch_size]
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from sharded import ShardedDB
+
+
+def bench_batches(db, num_items, batch_size):
+    """Return (puts/s, gets/s) for batched calls."""
+    batches = [[(f"key{i}", f"field{i % 10}", "value") for i in range(start, start + batch_size)]
+               for start in range(0, num_items, batch_size)]
+    start = time.perf_counter()
+    for batch in batches:
+        db.put_many_at(1, batch)
+    put_rate = num_items / (time.perf_counter() - start)
+    reads = [[item[:2] for item in batch] for batch in batches]
+    start = time.perf_counter()
+    for batch in reads:
+        db.get_many_at(1, batch)
+    return put_rate, num_items / (time.perf_counter() - start)
+
+
+def bench_latency(db, num_calls):
+    start = time.perf_counter()
+    for i in range(num_calls):
+        db.get_at(1, f"key{i}", "field0")
+    return (time.perf_counter() - start) / num_calls
+
+
+def main():
+    num_items = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    print(f"{os.cpu_count()} CPUs, {num_items} items in batches of {batch_size}")
+
+    put_rate, get_rate = bench_batches(InMemoryDB(), num_items, batch_size)
+    print(f"in-process     put {put_rate:12,.0f}/s  get {get_rate:12,.0f}/s")
+    for shards in (1, 2, 4, 8):
+        with ShardedDB(shards=shards) as db:
+            put_rate, get_rate = bench_batches(db, num_items, batch_size)
+            latency = bench_latency(db, 2_000)
+        print(f"{shards} shard(s)     put {put_rate:12,.0f}/s  get {get_rate:12,.0f}/s"
+              f"  single get {latency * 1e6:7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Snapshot File Benchmark
+
+Measures exporting a backup to a memory-mapped snapshot file, attaching and
+restoring it in a fresh database, and reading through it afterwards.
+Run with: python benchmarks/bench_snapshot_file.py [num_keys] [fields_per_key]
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36}{elapsed * 1e3:10.3f} ms")
+    return result
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fields_per_key = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    db = InMemoryDB()
+    for k in range(num_keys):
+        for f in range(fields_per_key):
+            db.put_at_with_ttl(100, f"key{k}", f"field{f}", "value", 1000)
+    db.backup_at(200)
+    print(f"{num_keys} keys x {fields_per_key} fields")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "backup.snap")
+        timed("export_backup", lambda: db.export_backup(200, path))
+        print(f"{'file size':<36}{os.path.getsize(path) / 2**20:10.1f} MB")
+
+        fresh = InMemoryDB()
+        timestamp = timed("attach_backup", lambda: fresh.attach_backup(path))
+        timed("restore_at", lambda: fresh.restore_at(300, timestamp))
+        timed("first read of a key", lambda: fresh.get_at(300, "key1", "field0"))
+        timed("second read of the same key", lambda: fresh.get_at(300, "key1", "field1"))
+        timed("materialize_restore", lambda: fresh.materialize_restore())
+
+
+if __name__ == "__main__":
+    main()
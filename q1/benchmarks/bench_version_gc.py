@@ -0,0 +1,73 @@
+"""
+Version Garbage Collection Benchmark
+
+Runs an update-heavy workload (every key rewritten many times), then moves
+the GC watermark up to the latest write and reports the memory reclaimed and
+the collector's per-cycle statistics. It compares the worst operation
+latency while the collector runs in gc_budget slices with the pause of
+collecting everything at once.
+Run with: python benchmarks/bench_version_gc.py [num_keys] [versions_per_key]
+e.g. python benchmarks/bench_version_gc.py 100000 20
+"""
+
+import sys
+import os
+import gc
+import time
+import tracemalloc
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def load(num_keys, versions, gc_budget):
+    db = InMemoryDB(gc_budget=gc_budget)
+    for t in range(versions):
+        db.put_many_at(100 + t, [(f"user{i}", "score", str(t)) for i in range(num_keys)])
+    return db, 100 + versions - 1
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    versions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    gc.collect()
+    tracemalloc.start()
+    db, latest = load(num_keys, versions, gc_budget=0)
+    before = tracemalloc.get_traced_memory()[0]
+    db.set_gc_watermark(latest)
+    db.collect_garbage()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    cycle = db.gc_stats()["cycles"][-1]
+    print(f"{num_keys:,} keys x {versions} versions: {before / 2**20:8.1f} MB -> "
+          f"{after / 2**20:8.1f} MB")
+    print(f"cycle: {cycle.keys:,} keys, {cycle.versions_reclaimed:,} versions reclaimed, "
+          f"~{cycle.bytes_freed / 2**20:.1f} MB estimated freed")
+
+    db, latest = load(num_keys, versions, gc_budget=0)
+    db.set_gc_watermark(latest)
+    start = time.perf_counter()
+    db.collect_garbage()
+    print(f"collect_garbage() all at once: {(time.perf_counter() - start) * 1e3:8.1f} ms pause")
+
+    for budget in (64, 256, 1024):
+        db, latest = load(num_keys, versions, gc_budget=budget)
+        db.set_gc_watermark(latest)
+        worst = 0.0
+        operations = 0
+        start = time.perf_counter()
+        while db.gc_stats()["running"]:
+            began = time.perf_counter()
+            db.get_at(latest, f"user{operations % num_keys}", "score")
+            worst = max(worst, time.perf_counter() - began)
+            operations += 1
+        elapsed = time.perf_counter() - start
+        print(f"gc_budget={budget:<5} {operations:8,} operations over {elapsed * 1e3:8.1f} ms, "
+              f"worst operation {worst * 1e3:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Write-Ahead Log Benchmark
+
+Measures put throughput with each fsync policy, for a single database and for
+concurrent writers appending to one log, and the time to replay the log.
+Run with: python benchmarks/bench_wal.py [num_writes] [num_threads]
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from wal import OP_PUT, WriteAheadLog
+
+
+def bench_database(directory, fsync, num_writes):
+    path = os.path.join(directory, f"db-{fsync}.wal")
+    db = InMemoryDB(wal_path=path, wal_fsync=fsync, wal_group_commit_ms=5)
+    start = time.perf_counter()
+    for i in range(num_writes):
+        db.put_at(i, f"key{i % 1000}", f"field{i % 10}", "value")
+    elapsed = time.perf_counter() - start
+    db.close()
+    print(f"db put, fsync={fsync:<8}{num_writes / elapsed:12,.0f} writes/s")
+
+    start = time.perf_counter()
+    InMemoryDB(wal_path=path).close()
+    print(f"  replay {num_writes} records{(time.perf_counter() - start) * 1e3:15.1f} ms")
+
+
+def bench_concurrent(directory, fsync, num_writes, num_threads):
+    wal = WriteAheadLog(os.path.join(directory, f"threads-{fsync}.wal"), fsync=fsync,
+                        group_commit_ms=5)
+    per_thread = num_writes // num_threads
+
+    def writer(n):
+        for i in range(per_thread):
+            wal.append(OP_PUT, i, f"key{n}", "field", "value")
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    wal.close()
+    total = per_thread * num_threads
+    print(f"{num_threads} writers, fsync={fsync:<8}{total / elapsed:12,.0f} writes/s"
+          f"  ({wal.syncs} fsyncs)")
+
+
+def main():
+    num_writes = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    num_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    with tempfile.TemporaryDirectory() as directory:
+        for fsync in ("always", "group", "never"):
+            bench_database(directory, fsync, num_writes)
+        for fsync in ("always", "group", "never"):
+            bench_concurrent(directory, fsync, num_writes, num_threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Bulk Load Readers
+
+Turn the input of InMemoryDB.load_stream into chunks of records, reading a
+file or iterable lazily so that only one chunk is held at a time. A record is
+(key, field, value, timestamp, ttl); timestamp and ttl are None when absent.
+
+Formats:
+    jsonl    One JSON object per line with "key", "field" and "value" and
+             optionally "timestamp" and "ttl"; blank lines are skipped
+    csv      A header row naming the columns key, field and value and
+             optionally timestamp and ttl, in any order; empty timestamp and
+             ttl cells count as absent
+    records  (key, field, value), (key, field, value, timestamp) or
+             (key, field, value, timestamp, ttl) tuples
+
+Example usage:
+    lines = ['{"key": "user1", "field": "name", "value": "Alice"}',
+             '{"key": "user1", "field": "session", "value": "abc", "timestamp": 100, "ttl": 50}']
+    for chunk in read_chunks(lines, "jsonl", 1000):
+        chunk  # [("user1", "name", "Alice", None, None), ("user1", "session", "abc", 100, 50)]
+"""
+
+import csv
+import itertools
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+Record = Tuple[str, str, str, Optional[int], Optional[int]]
+
+FORMATS = ("jsonl", "csv", "records")
+REQUIRED_COLUMNS = ("key", "field", "value")
+
+
+def read_chunks(source: Union[str, os.PathLike, Iterable], format: str,
+                chunk_size: int) -> Iterator[List[Record]]:
+    """
+    Return an iterator over the records of source in lists of up to chunk_size.
+
+    Args:
+        source: A file path, or an iterable of lines (of record tuples for
+            the "records" format)
+        format: One of FORMATS
+        chunk_size: Maximum number of records per chunk
+
+    Raises:
+        ValueError: On an unknown format or chunk size here, and on a
+            malformed record when its chunk is read
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown load format: {format!r}")
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive: {chunk_size!r}")
+    return _chunks(source, format, chunk_size)
+
+
+def load_stats(records: int, seconds: float) -> Dict[str, float]:
+    """Return the report of a load of records that took seconds."""
+    return {"records": records, "seconds": seconds,
+            "records_per_second": records / seconds if seconds > 0 else 0.0}
+
+
+def _chunks(source: Union[str, os.PathLike, Iterable], format: str,
+            chunk_size: int) -> Iterator[List[Record]]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8") as file:
+            yield from _chunks(file, format, chunk_size)
+        return
+    records = _READERS[format](source)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _record(where: str, key: Any, field: Any, value: Any,
+            timestamp: Any, ttl: Any) -> Record:
+    """Check the types of a record's parts."""
+    if type(key) is not str or type(field) is not str or type(value) is not str:
+        raise ValueError(f"{where}: key, field and value must be strings")
+    if not (timestamp is None or type(timestamp) is int) or not (ttl is None or type(ttl) is int):
+        raise ValueError(f"{where}: timestamp and ttl must be integers")
+    return key, field, value, timestamp, ttl
+
+
+def _read_jsonl(lines: Iterable[str]) -> Iterator[Record]:
+    decode = json.JSONDecoder().decode
+    for number, line in enumerate(lines, 1):
+        if not line or line.isspace():
+            continue
+        try:
+            obj = decode(line)
+            parts = obj["key"], obj["field"], obj["value"], obj.get("timestamp"), obj.get("ttl")
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"Line {number}: malformed record: {exc!r}") from None
+        yield _record(f"Line {number}", *parts)
+
+
+def _read_csv(lines: Iterable[str]) -> Iterator[Record]:
+    rows = csv.reader(lines)
+    header = next(rows, None)
+    if header is None:
+        return
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"CSV header has no {', '.join(missing)} column: {header!r}")
+    key, field, value = (header.index(name) for name in REQUIRED_COLUMNS)
+    timestamp, ttl = (header.index(name) if name in header else None
+                      for name in ("timestamp", "ttl"))
+    width = len(header)
+    for number, row in enumerate(rows, 2):
+        if not row:
+            continue
+        if len(row) != width:
+            raise ValueError(f"Row {number}: expected {width} cells, got {len(row)}")
+        try:
+            at = int(row[timestamp]) if timestamp is not None and row[timestamp] else None
+            lifetime = int(row[ttl]) if ttl is not None and row[ttl] else None
+        except ValueError:
+            raise ValueError(f"Row {number}: timestamp and ttl must be integers") from None
+        yield row[key], row[field], row[value], at, lifetime
+
+
+def _read_records(items: Iterable[tuple]) -> Iterator[Record]:
+    for number, item in enumerate(items, 1):
+        if not 3 <= len(item) <= 5:
+            raise ValueError(f"Record {number}: expected 3 to 5 items, got {len(item)}")
+        yield _record(f"Record {number}", item[0], item[1], item[2],
+                      item[3] if len(item) > 3 else None, item[4] if len(item) > 4 else None)
+
+
+_READERS = {
+    "jsonl": _read_jsonl,
+    "csv": _read_csv,
+    "records": _read_records,
+}
@@ -0,0 +1,770 @@
+"""
+InMemoryDB Client
+
+Clients for `server.py` that offer the InMemoryDB methods, so application
+code can switch from an in-process database to a networked one without
+changes. Client is for threaded code and AsyncClient for asyncio; both keep
+connections open between calls, so a call costs one round trip and no
+connect.
+
+Client keeps a bounded pool of connections, each used by one thread at a
+time. A thread that finds every connection busy and the pool full waits for
+one to be released. AsyncClient instead shares a few connections between all
+of its coroutines: a call writes its request straight away and waits for its
+reply, and replies are matched to calls in order (the server answers in
+request order). Requests made in the same event loop iteration go out in
+one write, and no call waits for another's round trip to finish first.
+
+Both pools close connections that have been idle for idle_timeout seconds
+and ping a connection that has been idle for health_check_interval seconds
+before using it again, replacing it if the ping fails; this catches a
+server restart or a connection dropped by a firewall between calls.
+
+pipeline() queues calls and sends them in one write when the block ends,
+which suits many small calls that need not see each other's results:
+
+    with Client(port=7379) as client:
+        client.put("user1", "name", "Alice")
+        with client.pipeline() as pipe:
+            for i in range(100):
+                pipe.get(f"user{i}", "name")
+        pipe.results  # 100 values, in call order
+
+    async with AsyncClient(port=7379) as client:
+        await client.get("user1", "name")  # "Alice"
+
+Errors raised by the server come back as the same builtin exception
+(ValueError, TypeError, KeyError) or as RemoteError for anything else.
+Results travel as JSON, so tuples come back as lists.
+"""
+
+import asyncio
+import collections
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Deque, Iterator, List, Optional, Sequence, Tuple
+
+from protocol import DEFAULT_PORT, FrameDecoder, ProtocolError, decode, encode
+
+Call = Tuple[str, tuple]
+
+# Bytes read from a connection at a time
+READ_SIZE = 256 * 1024
+# Results fetched per round trip by the scan iterators
+SCAN_CHUNK = 256
+
+_BUILTIN_ERRORS = {
+    "ValueError": ValueError,
+    "TypeError": TypeError,
+    "KeyError": KeyError,
+    "ProtocolError": ProtocolError,
+}
+
+
+class RemoteError(Exception):
+    """The server raised an exception that has no builtin counterpart here."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+
+
+def _unwrap(reply: list) -> Any:
+    if reply[0]:
+        return reply[1]
+    error = _BUILTIN_ERRORS.get(reply[1])
+    raise error(reply[2]) if error else RemoteError(reply[1], reply[2])
+
+
+def _results(replies: List[list], raise_on_error: bool) -> list:
+    results = []
+    for reply in replies:
+        try:
+            results.append(_unwrap(reply))
+        except Exception as exc:
+            if raise_on_error:
+                raise
+            results.append(exc)
+    return results
+
+
+def _encode_calls(calls: Sequence[Call]) -> bytes:
+    return b"".join([encode([name, *args]) for name, args in calls])
+
+
+class _Commands(ABC):
+    """
+    The InMemoryDB methods, each forwarded to _call.
+
+    _call returns the result for Client, a coroutine for AsyncClient, and
+    nothing for pipelines, which only queue the call.
+    """
+
+    @abstractmethod
+    def _call(self, name: str, *args) -> Any:
+        """Send or queue the call name(*args)."""
+
+    def ping(self) -> Any:
+        return self._call("ping")
+
+    # ============================================================================
+    # LEVEL 1-3 METHODS
+    # ============================================================================
+
+    def get(self, key: str, field: str) -> Any:
+        return self._call("get", key, field)
+
+    def put(self, key: str, field: str, value: str) -> Any:
+        return self._call("put", key, field, value)
+
+    def delete(self, key: str, field: str) -> Any:
+        return self._call("delete", key, field)
+
+    def scan(self, key: str) -> Any:
+        return self._call("scan", key)
+
+    def scan_with_prefix(self, key: str, prefix: str) -> Any:
+        return self._call("scan_with_prefix", key, prefix)
+
+    def get_at(self, timestamp: int, key: str, field: str) -> Any:
+        return self._call("get_at", timestamp, key, field)
+
+    def put_at(self, timestamp: int, key: str, field: str, value: str) -> Any:
+        return self._call("put_at", timestamp, key, field, value)
+
+    def delete_at(self, timestamp: int, key: str, field: str) -> Any:
+        return self._call("delete_at", timestamp, key, field)
+
+    def scan_at(self, timestamp: int, key: str) -> Any:
+        return self._call("scan_at", timestamp, key)
+
+    def scan_with_prefix_at(self, timestamp: int, key: str, prefix: str) -> Any:
+        return self._call("scan_with_prefix_at", timestamp, key, prefix)
+
+    def put_at_with_ttl(self, timestamp: int, key: str, field: str, value: str, ttl: int) -> Any:
+        return self._call("put_at_with_ttl", timestamp, key, field, value, ttl)
+
+    # ============================================================================
+    # LEVEL 4 METHODS
+    # ============================================================================
+
+    def backup_at(self, timestamp: int) -> Any:
+        return self._call("backup_at", timestamp)
+
+    def restore_at(self, timestamp: int, restore_at_timestamp: int) -> Any:
+        return self._call("restore_at", timestamp, restore_at_timestamp)
+
+    def materialize_restore(self, budget: int = -1) -> Any:
+        return self._call("materialize_restore", budget)
+
+    def list_backups(self, start: Optional[int] = None, end: Optional[int] = None) -> Any:
+        return self._call("list_backups", start, end)
+
+    def compact_backups(self) -> Any:
+        return self._call("compact_backups")
+
+    def purge_expired(self, timestamp: int) -> Any:
+        return self._call("purge_expired", timestamp)
+
+    def checkpoint(self) -> Any:
+        return self._call("checkpoint")
+
+    def ttl_stats_at(self, timestamp: int, edges: Optional[Sequence[int]] = None) -> Any:
+        if edges is None:
+            return self._call("ttl_stats_at", timestamp)
+        return self._call("ttl_stats_at", timestamp, list(edges))
+
+    def set_gc_watermark(self, timestamp: int) -> Any:
+        return self._call("set_gc_watermark", timestamp)
+
+    def collect_garbage(self, budget: int = -1) -> Any:
+        return self._call("collect_garbage", budget)
+
+    def gc_stats(self) -> Any:
+        return self._call("gc_stats")
+
+    def scan_cache_stats(self) -> Any:
+        return self._call("scan_cache_stats")
+
+    # ============================================================================
+    # BATCH METHODS
+    # ============================================================================
+
+    def put_many(self, items: Sequence[tuple]) -> Any:
+        return self._call("put_many", items)
+
+    def get_many(self, items: Sequence[Tuple[str, str]]) -> Any:
+        return self._call("get_many", items)
+
+    def delete_many(self, items: Sequence[Tuple[str, str]]) -> Any:
+        return self._call("delete_many", items)
+
+    def scan_many(self, keys: Sequence[str]) -> Any:
+        return self._call("scan_many", keys)
+
+    def put_many_at(self, timestamp: int, items: Sequence[tuple]) -> Any:
+        return self._call("put_many_at", timestamp, items)
+
+    def get_many_at(self, timestamp: int, items: Sequence[Tuple[str, str]]) -> Any:
+        return self._call("get_many_at", timestamp, items)
+
+    def delete_many_at(self, timestamp: int, items: Sequence[Tuple[str, str]]) -> Any:
+        return self._call("delete_many_at", timestamp, items)
+
+    def scan_many_at(self, timestamp: int, keys: Sequence[str]) -> Any:
+        return self._call("scan_many_at", timestamp, keys)
+
+    # ============================================================================
+    # PAGED SCANS
+    # ============================================================================
+
+    def scan_page(self, key: str, prefix: str = "", after: Optional[str] = None,
+                  limit: int = 100) -> Any:
+        return self._call("scan_page", key, prefix, after, limit)
+
+    def scan_page_at(self, timestamp: int, key: str, prefix: str = "",
+                     after: Optional[str] = None, limit: int = 100) -> Any:
+        return self._call("scan_page_at", timestamp, key, prefix, after, limit)
+
+    # ============================================================================
+    # RANGE SCANS
+    # ============================================================================
+
+    def scan_range(self, key: str, start_field: Optional[str] = None,
+                   end_field: Optional[str] = None, limit: Optional[int] = None,
+                   reverse: bool = False) -> Any:
+        return self._call("scan_range", key, start_field, end_field, limit, reverse)
+
+    def scan_range_at(self, timestamp: int, key: str, start_field: Optional[str] = None,
+                      end_field: Optional[str] = None, limit: Optional[int] = None,
+                      reverse: bool = False) -> Any:
+        return self._call("scan_range_at", timestamp, key, start_field, end_field, limit,
+                          reverse)
+
+    # ============================================================================
+    # KEY SCANS
+    # ============================================================================
+
+    def scan_keys(self, prefix: str = "") -> Any:
+        return self._call("scan_keys", prefix)
+
+    def scan_keys_range(self, start: Optional[str] = None, end: Optional[str] = None,
+                        limit: Optional[int] = None) -> Any:
+        return self._call("scan_keys_range", start, end, limit)
+
+    def scan_keys_at(self, timestamp: int, prefix: str = "") -> Any:
+        return self._call("scan_keys_at", timestamp, prefix)
+
+    def scan_keys_range_at(self, timestamp: int, start: Optional[str] = None,
+                           end: Optional[str] = None, limit: Optional[int] = None) -> Any:
+        return self._call("scan_keys_range_at", timestamp, start, end, limit)
+
+
+class _Pipeline(_Commands):
+    def __init__(self, client):
+        self._client = client
+        self._calls: List[Call] = []
+        # Results of the last execute, in call order
+        self.results: Optional[list] = None
+
+    def _call(self, name: str, *args) -> None:
+        self._calls.append((name, args))
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _take(self) -> List[Call]:
+        calls, self._calls = self._calls, []
+        return calls
+
+
+# ============================================================================
+# THREADED CLIENT
+# ============================================================================
+
+class _Connection:
+    def __init__(self, host: str, port: int, timeout: Optional[float]):
+        self._sock = socket.create_connection((host, port), timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._decoder = FrameDecoder()
+        self.last_used = time.monotonic()
+
+    def roundtrip(self, frames: bytes, count: int) -> List[list]:
+        """Send frames and return the count replies to them."""
+        self._sock.sendall(frames)
+        replies = []
+        while len(replies) < count:
+            data = self._sock.recv(READ_SIZE)
+            if not data:
+                raise ConnectionError("Server closed the connection")
+            replies.extend(decode(payload) for payload in self._decoder.feed(data))
+            if self._decoder.error is not None:
+                raise self._decoder.error
+        self.last_used = time.monotonic()
+        return replies
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class ConnectionPool:
+    """
+    A bounded pool of connections to one server, each lent to one thread at a time.
+
+    Idle connections are reused most recently used first, so a lightly
+    loaded client keeps using the same few connections and the rest age
+    out after idle_timeout. Expired connections are closed lazily, when a
+    connection is acquired.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_size: int = 8,
+                 idle_timeout: float = 60.0, health_check_interval: float = 5.0,
+                 timeout: Optional[float] = 5.0):
+        if max_size < 1:
+            raise ValueError(f"max_size must be positive: {max_size}")
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._idle: List[_Connection] = []  # Least recently used first
+        self._size = 0  # Open connections, idle or lent out
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def acquire(self) -> _Connection:
+        """Lend out a healthy connection, opening one or waiting for one if none is idle."""
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise ConnectionError("Connection pool is closed")
+                    self._evict_idle()
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        conn = None
+                        break
+                    self._cond.wait()
+            if conn is None:
+                try:
+                    return _Connection(self.host, self.port, self.timeout)
+                except BaseException:
+                    self._forget()
+                    raise
+            if time.monotonic() - conn.last_used < self.health_check_interval or \
+                    self._healthy(conn):
+                return conn
+            self.discard(conn)
+
+    def release(self, conn: _Connection) -> None:
+        """Return a connection whose replies have all been read."""
+        with self._cond:
+            if not self._closed:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+        self.discard(conn)
+
+    def discard(self, conn: _Connection) -> None:
+        """Close a connection that failed or may be out of step with the server."""
+        conn.close()
+        self._forget()
+
+    def close(self) -> None:
+        """Close idle connections now and lent ones when they are returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def _forget(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        stale = 0
+        while stale < len(self._idle) and self._idle[stale].last_used < deadline:
+            self._idle[stale].close()
+            stale += 1
+        if stale:
+            del self._idle[:stale]
+            self._size -= stale
+
+    @staticmethod
+    def _healthy(conn: _Connection) -> bool:
+        try:
+            return conn.roundtrip(encode(["ping"]), 1) == [[True, "pong"]]
+        except (OSError, ProtocolError):
+            return False
+
+
+class Pipeline(_Pipeline):
+    """Calls queued on a Client and sent in one write by execute()."""
+
+    def execute(self, raise_on_error: bool = True) -> list:
+        """
+        Send the queued calls and return their results in call order.
+
+        Args:
+            raise_on_error: Raise the first failed call's exception; if False,
+                            the exception takes that call's place in the results
+        """
+        calls = self._take()
+        self.results = _results(self._client._roundtrip(calls), raise_on_error) if calls else []
+        return self.results
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.execute()
+
+
+class Client(_Commands):
+    """
+    InMemoryDB over the network, for use from any number of threads.
+
+    Args:
+        host, port: The server's address
+        pool_size: Most connections open at once; also the most calls in flight
+        idle_timeout: Seconds after which an unused connection is closed
+        health_check_interval: Seconds of idleness after which a connection
+                               is pinged before its next use
+        timeout: Seconds to wait to connect or for a reply; None waits forever
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, pool_size: int = 8,
+                 idle_timeout: float = 60.0, health_check_interval: float = 5.0,
+                 timeout: Optional[float] = 5.0):
+        self.pool = ConnectionPool(host, port, pool_size, idle_timeout,
+                                   health_check_interval, timeout)
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _call(self, name: str, *args) -> Any:
+        return _unwrap(self._roundtrip([(name, args)])[0])
+
+    def _roundtrip(self, calls: Sequence[Call]) -> List[list]:
+        conn = self.pool.acquire()
+        try:
+            replies = conn.roundtrip(_encode_calls(calls), len(calls))
+        except BaseException:
+            # Replies may still be on their way, so the connection cannot be reused
+            self.pool.discard(conn)
+            raise
+        self.pool.release(conn)
+        return replies
+
+    def pipeline(self) -> Pipeline:
+        return Pipeline(self)
+
+    def iter_scan(self, key: str) -> Iterator[str]:
+        return self._iter_scan(None, key, "")
+
+    def iter_scan_with_prefix(self, key: str, prefix: str) -> Iterator[str]:
+        return self._iter_scan(None, key, prefix)
+
+    def iter_scan_at(self, timestamp: int, key: str) -> Iterator[str]:
+        return self._iter_scan(timestamp, key, "")
+
+    def iter_scan_with_prefix_at(self, timestamp: int, key: str, prefix: str) -> Iterator[str]:
+        return self._iter_scan(timestamp, key, prefix)
+
+    def _iter_scan(self, timestamp: Optional[int], key: str, prefix: str) -> Iterator[str]:
+        """Yield scan results SCAN_CHUNK at a time, one round trip per chunk."""
+        after = None
+        while True:
+            if timestamp is None:
+                page, after = self.scan_page(key, prefix, after, SCAN_CHUNK)
+            else:
+                page, after = self.scan_page_at(timestamp, key, prefix, after, SCAN_CHUNK)
+            yield from page
+            if after is None:
+                return
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+# ============================================================================
+# ASYNCIO CLIENT
+# ============================================================================
+
+class _AsyncConnection:
+    """A connection shared by many coroutines, with replies matched to requests in order."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._decoder = FrameDecoder()
+        # [future, reply count, replies so far] per request batch, oldest first
+        self._waiting: Deque[list] = collections.deque()
+        # Requests made since the last flush, sent together by _flush
+        self._outgoing: List[bytes] = []
+        self.last_used = time.monotonic()
+        self.closed = False
+        self._task = asyncio.get_running_loop().create_task(self._read_replies())
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._waiting)
+
+    async def roundtrip(self, frames: bytes, count: int) -> List[list]:
+        """Send frames and return the count replies to them."""
+        if self._writer.transport.get_write_buffer_size():
+            # The server is not keeping up; wait while the buffer is over its limit
+            try:
+                await self._writer.drain()
+            except ConnectionError as exc:
+                self._fail(exc)
+        if self.closed:
+            raise ConnectionError("Connection is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.append([future, count, []])
+        if not self._outgoing:
+            loop.call_soon(self._flush)
+        self._outgoing.append(frames)
+        self.last_used = time.monotonic()
+        return await future
+
+    def _flush(self) -> None:
+        frames, self._outgoing = self._outgoing, []
+        if not self.closed:
+            self._writer.write(b"".join(frames))
+
+    async def _read_replies(self) -> None:
+        try:
+            while True:
+                data = await self._reader.read(READ_SIZE)
+                if not data:
+                    raise ConnectionError("Server closed the connection")
+                for payload in self._decoder.feed(data):
+                    if not self._waiting:
+                        raise ProtocolError("Reply to no request")
+                    entry = self._waiting[0]
+                    entry[2].append(decode(payload))
+                    if len(entry[2]) == entry[1]:
+                        self._waiting.popleft()
+                        # A caller that was cancelled no longer wants its replies
+                        if not entry[0].done():
+                            entry[0].set_result(entry[2])
+                if self._decoder.error is not None:
+                    raise self._decoder.error
+        except Exception as exc:
+            self._fail(exc)
+        except asyncio.CancelledError:
+            self._fail(ConnectionError("Connection is closed"))
+
+    def _fail(self, exc: BaseException) -> None:
+        self.closed = True
+        while self._waiting:
+            future = self._waiting.popleft()[0]
+            if not future.done():
+                future.set_exception(exc)
+        self._writer.close()
+
+    async def close(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._fail(ConnectionError("Connection is closed"))
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class AsyncConnectionPool:
+    """
+    Up to max_size connections to one server, shared by all coroutines.
+
+    A call goes to the open connection with the fewest requests in flight;
+    a new connection is opened only when every open one is busy and the pool
+    is not full. Connections with nothing in flight for idle_timeout seconds
+    are closed when a connection is next acquired.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_size: int = 4,
+                 idle_timeout: float = 60.0, health_check_interval: float = 5.0,
+                 timeout: Optional[float] = 5.0):
+        if max_size < 1:
+            raise ValueError(f"max_size must be positive: {max_size}")
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._connections: List[_AsyncConnection] = []
+        self._opening: Optional[asyncio.Lock] = None
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return len(self._connections)
+
+    async def acquire(self) -> _AsyncConnection:
+        """Pick a healthy connection to send on, opening one if all are busy and there is room."""
+        while True:
+            if self._closed:
+                raise ConnectionError("Connection pool is closed")
+            await self._evict_idle()
+            conn = min(self._connections, key=lambda c: c.in_flight, default=None)
+            if conn is None or conn.in_flight and len(self._connections) < self.max_size:
+                if self._opening is None:
+                    self._opening = asyncio.Lock()
+                async with self._opening:
+                    # Another caller may have filled the pool while this one waited
+                    if len(self._connections) < self.max_size:
+                        conn = await self._open()
+                    else:
+                        continue
+            if conn.in_flight or time.monotonic() - conn.last_used < self.health_check_interval:
+                return conn
+            try:
+                if await conn.roundtrip(encode(["ping"]), 1) == [[True, "pong"]]:
+                    return conn
+            except (OSError, ProtocolError):
+                pass
+            await self._discard(conn)
+
+    async def close(self) -> None:
+        self._closed = True
+        connections, self._connections = self._connections, []
+        for conn in connections:
+            await conn.close()
+
+    async def _open(self) -> _AsyncConnection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+        conn = _AsyncConnection(reader, writer)
+        self._connections.append(conn)
+        return conn
+
+    async def _discard(self, conn: _AsyncConnection) -> None:
+        if conn in self._connections:
+            self._connections.remove(conn)
+        await conn.close()
+
+    async def _evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        for conn in list(self._connections):
+            if conn.closed or not conn.in_flight and conn.last_used < deadline:
+                await self._discard(conn)
+
+
+class AsyncPipeline(_Pipeline):
+    """Calls queued on an AsyncClient and sent in one write by execute()."""
+
+    async def execute(self, raise_on_error: bool = True) -> list:
+        """
+        Send the queued calls and return their results in call order.
+
+        Args:
+            raise_on_error: Raise the first failed call's exception; if False,
+                            the exception takes that call's place in the results
+        """
+        calls = self._take()
+        self.results = (_results(await self._client._roundtrip(calls), raise_on_error)
+                        if calls else [])
+        return self.results
+
+    async def __aenter__(self) -> "AsyncPipeline":
+        return self
+
+    async def __aexit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            await self.execute()
+
+
+class AsyncClient(_Commands):
+    """
+    InMemoryDB over the network for asyncio; every method is a coroutine.
+
+    Args:
+        host, port: The server's address
+        pool_size: Most connections open at once
+        idle_timeout: Seconds after which a connection with nothing in flight is closed
+        health_check_interval: Seconds of idleness after which a connection
+                               is pinged before its next use
+        timeout: Seconds to wait to connect; None waits forever
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, pool_size: int = 4,
+                 idle_timeout: float = 60.0, health_check_interval: float = 5.0,
+                 timeout: Optional[float] = 5.0):
+        self.pool = AsyncConnectionPool(host, port, pool_size, idle_timeout,
+                                        health_check_interval, timeout)
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _call(self, name: str, *args) -> Any:
+        return _unwrap((await self._roundtrip([(name, args)]))[0])
+
+    async def _roundtrip(self, calls: Sequence[Call]) -> List[list]:
+        conn = await self.pool.acquire()
+        return await conn.roundtrip(_encode_calls(calls), len(calls))
+
+    def pipeline(self) -> AsyncPipeline:
+        return AsyncPipeline(self)
+
+    def iter_scan(self, key: str) -> AsyncIterator[str]:
+        return self._iter_scan(None, key, "")
+
+    def iter_scan_with_prefix(self, key: str, prefix: str) -> AsyncIterator[str]:
+        return self._iter_scan(None, key, prefix)
+
+    def iter_scan_at(self, timestamp: int, key: str) -> AsyncIterator[str]:
+        return self._iter_scan(timestamp, key, "")
+
+    def iter_scan_with_prefix_at(self, timestamp: int, key: str, prefix: str
+                                 ) -> AsyncIterator[str]:
+        return self._iter_scan(timestamp, key, prefix)
+
+    async def _iter_scan(self, timestamp: Optional[int], key: str, prefix: str
+                         ) -> AsyncIterator[str]:
+        """Yield scan results SCAN_CHUNK at a time, one round trip per chunk."""
+        after = None
+        while True:
+            if timestamp is None:
+                page, after = await self.scan_page(key, prefix, after, SCAN_CHUNK)
+            else:
+                page, after = await self.scan_page_at(timestamp, key, prefix, after, SCAN_CHUNK)
+            for result in page:
+                yield result
+            if after is None:
+                return
+
+    async def close(self) -> None:
+        await self.pool.close()
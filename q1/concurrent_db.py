@@ -0,0 +1,343 @@
+"""
+Thread-Safe InMemoryDB
+
+ConcurrentDB is an InMemoryDB that may be shared between threads. Keys are
+hashed onto a fixed number of stripes, so operations on keys in different
+stripes never wait for one another. Each stripe has two locks:
+
+    write lock  taken first by every write to the stripe's keys. backup_at
+                takes all of them, which holds off writes while reads carry
+                on, and takes its consistent cut in constant time
+    page lock   taken by every read and write of the stripe's keys, around
+                the pages themselves
+
+Batches take their stripes in stripe order, write locks before page locks.
+Operations that replace state behind the keys' backs (restore_at,
+materialize_restore, compact_backups, purge_expired, checkpoint,
+attach_backup, collect_garbage) take every lock. So does background work
+(expiry_budget, folding delta backups, restore_budget, gc_budget), which runs
+after an operation has released its own locks, in whichever thread gets to
+it first.
+
+The stripe locks are plain mutexes rather than readers-writer locks: a
+readers-writer lock written in Python costs several times more per
+operation than it saves while the GIL serializes the readers anyway.
+
+Example usage:
+    db = ConcurrentDB(lock_stripes=64)
+    threads = [threading.Thread(target=db.put, args=(f"user{n}", "name", "x"))
+               for n in range(8)]
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from impl import SCAN_CHUNK, TTL_BUCKETS, Chain, InMemoryDB, _KeyPage
+from radix_index import FOREVER
+
+
+class ConcurrentDB(InMemoryDB):
+    """An InMemoryDB whose methods may be called from several threads at once."""
+
+    def __init__(self, *args, lock_stripes: int = 64, **kwargs):
+        """
+        Initialize an empty database.
+
+        Args:
+            lock_stripes: Number of stripes that keys are hashed onto
+            *args, **kwargs: Options of InMemoryDB
+        """
+        if lock_stripes < 1:
+            raise ValueError(f"lock_stripes must be positive: {lock_stripes!r}")
+        self._num_stripes = lock_stripes
+        self._write_locks = [threading.Lock() for _ in range(lock_stripes)]
+        self._page_locks = [threading.Lock() for _ in range(lock_stripes)]
+        # Thread holding every lock, which may call other locking methods
+        self._owner: Optional[int] = None
+        # The expiry queue and the clock
+        self._mutex = threading.Lock()
+        # The key index, which writers of every stripe add keys to
+        self._keys_lock = threading.Lock()
+        # The key table, whose chunks writers of every stripe may copy
+        self._table_lock = threading.Lock()
+        # The scan result cache, which readers of every stripe fill and reorder
+        self._cache_lock = threading.Lock()
+        self._maintenance = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    # Reads
+
+    def get_at(self, timestamp: int, key: str, field: str) -> Optional[str]:
+        return self._read_key(key, InMemoryDB.get_at, self, timestamp, key, field)
+
+    def scan_at(self, timestamp: int, key: str) -> list:
+        return self._read_key(key, InMemoryDB.scan_at, self, timestamp, key)
+
+    def scan_with_prefix_at(self, timestamp: int, key: str, prefix: str) -> list:
+        return self._read_key(key, InMemoryDB.scan_with_prefix_at, self, timestamp, key, prefix)
+
+    def scan_page_at(self, timestamp: int, key: str, prefix: str = "",
+                     after: Optional[str] = None, limit: int = 100
+                     ) -> Tuple[list, Optional[str]]:
+        return self._read_key(key, InMemoryDB.scan_page_at, self, timestamp, key, prefix,
+                              after, limit)
+
+    def scan_range_at(self, timestamp: int, key: str, start_field: Optional[str] = None,
+                      end_field: Optional[str] = None, limit: Optional[int] = None,
+                      reverse: bool = False) -> list:
+        return self._read_key(key, InMemoryDB.scan_range_at, self, timestamp, key,
+                              start_field, end_field, limit, reverse)
+
+    def get_many_at(self, timestamp: int, items: Sequence[Tuple[str, str]]
+                    ) -> List[Optional[str]]:
+        return self._reading([item[0] for item in items], super().get_many_at, timestamp, items)
+
+    def scan_many_at(self, timestamp: int, keys: Sequence[str]) -> List[list]:
+        return self._reading(keys, super().scan_many_at, timestamp, keys)
+
+    # Writes
+
+    def put_at(self, timestamp: int, key: str, field: str, value: str) -> None:
+        self._write_key(key, InMemoryDB.put_at, self, timestamp, key, field, value)
+
+    def put_at_with_ttl(self, timestamp: int, key: str, field: str, value: str, ttl: int) -> None:
+        self._write_key(key, InMemoryDB.put_at_with_ttl, self, timestamp, key, field, value, ttl)
+
+    def delete_at(self, timestamp: int, key: str, field: str) -> bool:
+        return self._write_key(key, InMemoryDB.delete_at, self, timestamp, key, field)
+
+    def put_many_at(self, timestamp: int, items: Sequence[tuple]) -> None:
+        self._writing([item[0] for item in items], super().put_many_at, timestamp, items)
+
+    def delete_many_at(self, timestamp: int, items: Sequence[Tuple[str, str]]) -> List[bool]:
+        return self._writing([item[0] for item in items], super().delete_many_at,
+                             timestamp, items)
+
+    def _load_chunk(self, records: list, timestamp: int) -> None:
+        # load_stream reads each chunk unlocked and applies it with its keys' locks
+        self._writing([record[0] for record in records], super()._load_chunk, records, timestamp)
+
+    # Backups: writes are held off, reads carry on
+
+    def backup_at(self, timestamp: int) -> None:
+        with self._holding_all(pages=False):
+            super().backup_at(timestamp)
+        self._maintain()
+
+    def list_backups(self, start: Optional[int] = None, end: Optional[int] = None) -> List[int]:
+        with self._holding_all(pages=False):
+            return super().list_backups(start, end)
+
+    def export_backup(self, timestamp: int, path: str) -> int:
+        with self._holding_all(pages=False):
+            return super().export_backup(timestamp, path)
+
+    # Everything else holds every lock
+
+    def restore_at(self, timestamp: int, restore_at_timestamp: int) -> None:
+        with self._holding_all():
+            super().restore_at(timestamp, restore_at_timestamp)
+
+    def materialize_restore(self, budget: int = -1) -> bool:
+        with self._holding_all():
+            return super().materialize_restore(budget)
+
+    def compact_backups(self) -> int:
+        with self._holding_all():
+            return super().compact_backups()
+
+    def purge_expired(self, timestamp: int) -> int:
+        with self._holding_all():
+            return super().purge_expired(timestamp)
+
+    def ttl_stats_at(self, timestamp: int, edges: Sequence[int] = TTL_BUCKETS) -> dict:
+        with self._mutex:
+            return super().ttl_stats_at(timestamp, edges)
+
+    def set_gc_watermark(self, timestamp: int) -> None:
+        with self._holding_all():
+            super().set_gc_watermark(timestamp)
+
+    def collect_garbage(self, budget: int = -1) -> bool:
+        with self._holding_all():
+            return super().collect_garbage(budget)
+
+    def checkpoint(self) -> None:
+        with self._holding_all():
+            super().checkpoint()
+
+    def attach_backup(self, path: str) -> int:
+        with self._holding_all():
+            return super().attach_backup(path)
+
+    # Internal helpers
+
+    def _stripes_of(self, keys: Iterable[str]) -> List[int]:
+        """Return the stripes of keys, each once, in order."""
+        n = self._num_stripes
+        return sorted({hash(key) % n for key in keys})
+
+    def _read_key(self, key: str, method: Callable, *args):
+        """Call method with the page lock of key held."""
+        with self._page_locks[hash(key) % self._num_stripes]:
+            result = method(*args)
+        self._maintain()
+        return result
+
+    def _write_key(self, key: str, method: Callable, *args):
+        """Call method with the write and page locks of key held."""
+        i = hash(key) % self._num_stripes
+        write_lock = self._write_locks[i]
+        write_lock.acquire()
+        if self._pages_epoch != self._epoch:
+            write_lock.release()
+            return self._writing((key,), method, *args)
+        try:
+            with self._page_locks[i]:
+                result = method(*args)
+        finally:
+            write_lock.release()
+        self._maintain()
+        return result
+
+    def _reading(self, keys: Sequence[str], method: Callable, *args):
+        """Call method with the page locks of keys held."""
+        locks = [self._page_locks[i] for i in self._stripes_of(keys)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            result = method(*args)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        self._maintain()
+        return result
+
+    def _writing(self, keys: Sequence[str], method: Callable, *args):
+        """Call method with the write and page locks of keys held."""
+        stripes = self._stripes_of(keys)
+        locks = [self._write_locks[i] for i in stripes] + [self._page_locks[i] for i in stripes]
+        while True:
+            for lock in locks:
+                lock.acquire()
+            if self._pages_epoch == self._epoch:
+                break
+            # A backup holds the key table. Switch to a copy sharing its chunks
+            # with every write lock held, so that no other writer inserts into the old one
+            for lock in reversed(locks):
+                lock.release()
+            with self._holding_all(pages=False):
+                self._writable_pages()
+        try:
+            result = method(*args)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        self._maintain()
+        return result
+
+    @contextmanager
+    def _holding_all(self, pages: bool = True) -> Iterator[None]:
+        """Hold every write lock, and every page lock too if pages is set."""
+        if self._owner == threading.get_ident():
+            yield
+            return
+        locks = self._write_locks + self._page_locks if pages else self._write_locks
+        for lock in locks:
+            lock.acquire()
+        if pages:
+            self._owner = threading.get_ident()
+        try:
+            yield
+        finally:
+            self._owner = None
+            for lock in reversed(locks):
+                lock.release()
+
+    def _indexed_keys(self, prefix: str, start: Optional[str], end: Optional[str],
+                      after: Optional[str], count: int) -> List[str]:
+        while True:
+            with self._keys_lock:
+                if self._keys is not None:
+                    return super()._indexed_keys(prefix, start, end, after, count)
+            # Build the index from a key table that no writer is adding to
+            with self._holding_all(pages=False):
+                self._key_index()
+
+    def _key_visible(self, timestamp: int, key: str) -> bool:
+        with self._page_locks[hash(key) % self._num_stripes]:
+            return super()._key_visible(timestamp, key)
+
+    def _add_key(self, key: str) -> None:
+        with self._keys_lock:
+            self._keys.add(key)
+
+    def _remove_key(self, key: str) -> None:
+        with self._keys_lock:
+            self._keys.discard(key)
+
+    def _cache_get(self, scan: Tuple[str, str], stamp: int, timestamp: int) -> Optional[list]:
+        with self._cache_lock:
+            return super()._cache_get(scan, stamp, timestamp)
+
+    def _cache_put(self, scan: Tuple[str, str], stamp: int, timestamp: int,
+                   valid_until: float, results: list) -> None:
+        with self._cache_lock:
+            super()._cache_put(scan, stamp, timestamp, valid_until, results)
+
+    def _iter_scan(self, timestamp: int, key: str, prefix: str) -> Iterator:
+        # Each chunk is read under the key's page lock; writes may land between chunks
+        after = None
+        while True:
+            entries = self._read_key(key, self._scan_fields, timestamp, key, prefix, after,
+                                     SCAN_CHUNK)
+            yield from self._results(entries)
+            if len(entries) < SCAN_CHUNK:
+                return
+            after = entries[-1][0]
+
+    def _advance(self, timestamp: int) -> None:
+        # Only the clock moves here; the background work is left to _maintain
+        if timestamp > self._clock:
+            with self._mutex:
+                if timestamp > self._clock:
+                    self._clock = timestamp
+
+    def _background_due(self) -> bool:
+        # The expiry index's earliest time may be cached here, and _schedule changes it
+        with self._mutex:
+            return super()._background_due()
+
+    def _maintain(self) -> None:
+        """Do a step of background work if one is due and no other thread is doing it."""
+        if self._background_due() and self._maintenance.acquire(blocking=False):
+            try:
+                with self._holding_all():
+                    self._step_background()
+            finally:
+                self._maintenance.release()
+
+    def _schedule(self, page: _KeyPage, key: str, field: str, chain: Chain) -> None:
+        # Fields that never expire only touch their own page
+        if self._until(chain) == FOREVER:
+            InMemoryDB._schedule(self, page, key, field, chain)
+            return
+        with self._mutex:
+            InMemoryDB._schedule(self, page, key, field, chain)
+
+    def _schedule_many(self, entries: List[Tuple[int, str, str]]) -> None:
+        with self._mutex:
+            super()._schedule_many(entries)
+
+    def _unschedule(self, key: str, field: str) -> None:
+        with self._mutex:
+            super()._unschedule(key, field)
+
+    def _set_page(self, key: str, page: _KeyPage) -> None:
+        with self._table_lock:
+            super()._set_page(key, page)
+
+    def _remove_page(self, key: str) -> None:
+        with self._table_lock:
+            super()._remove_page(key)
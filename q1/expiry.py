@@ -0,0 +1,108 @@
+"""
+TTL Expiration Queue
+
+A min-heap of (until, key, field) entries used by InMemoryDB to physically
+reclaim fields once nothing in them can be read any more.
+
+The queue never updates entries in place. Rewriting a field pushes a new
+entry and leaves the old one behind; the database checks each popped entry
+against the field's current horizon and ignores the ones that are stale.
+Stale entries are compacted away once they make up half of the heap, so the
+queue stays proportional to the number of fields that can still expire.
+
+Example usage:
+    queue = ExpiryQueue()
+    queue.push(150, "user1", "session")
+    queue.push(120, "user1", "token")
+    list(queue.pop_due(130, limit=10))  # [(120, "user1", "token")]
+"""
+
+import heapq
+from bisect import bisect_left
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+Entry = Tuple[int, str, str]
+
+# Heaps smaller than this are never compacted
+MIN_COMPACT_SIZE = 1024
+
+
+class ExpiryQueue:
+    """Min-heap of field horizons, ordered by the time they are reached."""
+
+    # Entries are left to go stale rather than removed with their fields
+    tracks_fields = False
+
+    def __init__(self):
+        """Initialize an empty queue."""
+        self._heap: List[Entry] = []
+        self._compact_at = MIN_COMPACT_SIZE
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, until: int, key: str, field: str) -> None:
+        """Schedule a field to be checked once the clock reaches until."""
+        heapq.heappush(self._heap, (until, key, field))
+
+    def push_many(self, entries: Sequence[Entry]) -> None:
+        """Schedule several (until, key, field) entries, re-heapifying once for large batches."""
+        heap = self._heap
+        if 8 * len(entries) >= len(heap):
+            heap.extend(entries)
+            heapq.heapify(heap)
+        else:
+            for entry in entries:
+                heapq.heappush(heap, entry)
+
+    def next_due(self) -> float:
+        """Return the earliest scheduled time, or infinity if the queue is empty."""
+        return self._heap[0][0] if self._heap else float("inf")
+
+    def pop_due(self, horizon: int, limit: int = -1) -> Iterator[Entry]:
+        """
+        Pop and yield entries whose time is <= horizon, earliest first.
+
+        Args:
+            horizon: The latest time to pop entries for
+            limit: Maximum number of entries to pop; negative means no limit
+        """
+        heap = self._heap
+        while heap and heap[0][0] <= horizon and limit != 0:
+            yield heapq.heappop(heap)
+            limit -= 1
+
+    def needs_compaction(self) -> bool:
+        """Return True once the heap has doubled since it was last compacted."""
+        return len(self._heap) >= self._compact_at
+
+    def compact(self, is_current: Callable[[int, str, str], bool]) -> None:
+        """
+        Drop stale entries and duplicates, keeping those is_current accepts.
+
+        Args:
+            is_current: Called with (until, key, field); returns True if the
+                entry still matches the field's horizon
+        """
+        seen = set()
+        kept = []
+        for entry in self._heap:
+            until, key, field = entry
+            if (key, field) not in seen and is_current(until, key, field):
+                seen.add((key, field))
+                kept.append(entry)
+        heapq.heapify(kept)
+        self._heap = kept
+        self._compact_at = max(MIN_COMPACT_SIZE, 2 * len(kept))
+
+    def count_live(self, timestamp: int) -> int:
+        """Return the number of entries whose time is after timestamp; compact first to drop stale ones."""
+        return sum(1 for until, _, _ in self._heap if until > timestamp)
+
+    def histogram(self, timestamp: int, edges: Sequence[int]) -> List[int]:
+        """Bucket the remaining time of the entries after timestamp; see ExpiryColumns.histogram."""
+        counts = [0] * (len(edges) + 1)
+        for until, _, _ in self._heap:
+            if until > timestamp:
+                counts[bisect_left(edges, until - timestamp)] += 1
+        return counts
@@ -0,0 +1,233 @@
+"""
+Columnar Expiry Index
+
+The horizons of the fields that expire, held in an int64 column alongside a
+column of (key, field) references, one row per field. Unlike ExpiryQueue it
+holds no stale entries: rescheduling a field overwrites its row, and a field
+that stops expiring gives its row back. That makes bulk sweeps and
+statistics single mask operations over the column:
+
+    pop_due     rows whose horizon is <= the purge horizon
+    count_live  rows whose horizon is still ahead of a timestamp
+    histogram   remaining TTLs of those rows, bucketed by upper bounds
+
+The rows are also grouped in blocks of BLOCK_ROWS, each with its earliest
+horizon kept up to date as rows change, so next_due reads one value per
+block and pop_due scans only the blocks with something due.
+
+NumPy is optional. Without it the column is an array.array and the same
+operations run as plain Python loops.
+
+Example usage:
+    columns = ExpiryColumns()
+    columns.push(150, "user1", "session")
+    columns.push(120, "user1", "token")
+    columns.count_live(130)                   # 1
+    columns.histogram(100, (30, 60))          # [1, 1, 0]
+    list(columns.pop_due(130, limit=10))      # [(120, "user1", "token")]
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Entry = Tuple[int, str, str]
+
+# Horizon of an empty row; never due
+FREE = 2 ** 63 - 1
+BLOCK_ROWS = 1024
+# A multiple of BLOCK_ROWS, so the NumPy column is always whole blocks
+MIN_CAPACITY = 1024
+
+
+class ExpiryColumns:
+    """Exact per-field horizons in a column, swept with vectorized masks."""
+
+    # Rows follow the fields, so the database reports fields that stop expiring
+    tracks_fields = True
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._rows: Dict[Tuple[str, str], int] = {}
+        self._refs: List[Optional[Tuple[str, str]]] = []
+        self._free: List[int] = []
+        if np is not None:
+            self._until = np.full(MIN_CAPACITY, FREE, dtype=np.int64)
+            self._block_until = np.full(MIN_CAPACITY // BLOCK_ROWS, FREE, dtype=np.int64)
+        else:
+            self._until = array("q")
+            self._block_until = array("q")
+        # The earliest horizon, or None once it must be recomputed from the blocks
+        self._next_due: Optional[float] = float("inf")
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def push(self, until: int, key: str, field: str) -> None:
+        """Schedule a field to expire at until, replacing its previous horizon."""
+        ref = (key, field)
+        row = self._rows.get(ref)
+        if row is None:
+            row = self._allocate()
+            self._rows[ref] = row
+            self._refs[row] = ref
+        self._set(row, until)
+        if self._next_due is not None and until < self._next_due:
+            self._next_due = until
+
+    def push_many(self, entries: Sequence[Entry]) -> None:
+        """Schedule several (until, key, field) entries, as push would one by one."""
+        for until, key, field in entries:
+            self.push(until, key, field)
+
+    def discard(self, key: str, field: str) -> None:
+        """Forget a field that no longer expires."""
+        row = self._rows.pop((key, field), None)
+        if row is not None:
+            self._release(row)
+
+    def next_due(self) -> float:
+        """Return the earliest scheduled time, or infinity if the index is empty."""
+        if self._next_due is None:
+            if np is not None:
+                earliest = int(self._block_until.min())
+            else:
+                earliest = min(self._block_until, default=FREE)
+            self._next_due = float("inf") if earliest == FREE else earliest
+        return self._next_due
+
+    def pop_due(self, horizon: int, limit: int = -1) -> Iterator[Entry]:
+        """
+        Remove and return the entries whose time is <= horizon, earliest first.
+
+        Args:
+            horizon: The latest time to pop entries for
+            limit: Maximum number of entries to pop; negative means no limit
+        """
+        if limit == 0 or self.next_due() > horizon:
+            return iter(())
+        until = self._until
+        if np is not None:
+            blocks = np.flatnonzero(self._block_until <= horizon)
+            rows = (blocks[:, None] * BLOCK_ROWS + np.arange(BLOCK_ROWS)).ravel()
+            rows = rows[until[rows] <= horizon]
+            if 0 <= limit < len(rows):
+                rows = rows[np.argpartition(until[rows], limit - 1)[:limit]]
+            rows = rows[np.argsort(until[rows], kind="stable")]
+            due = until[rows].tolist()
+            until[rows] = FREE
+            blocks = np.unique(rows // BLOCK_ROWS)
+            self._block_until[blocks] = until.reshape(-1, BLOCK_ROWS)[blocks].min(axis=1)
+            rows = rows.tolist()
+        else:
+            blocks = [block for block, due in enumerate(self._block_until) if due <= horizon]
+            rows = sorted((row for block in blocks
+                           for row in range(block * BLOCK_ROWS,
+                                            min((block + 1) * BLOCK_ROWS, len(until)))
+                           if until[row] <= horizon),
+                          key=until.__getitem__)
+            if limit >= 0:
+                rows = rows[:limit]
+            due = [until[row] for row in rows]
+            for row in rows:
+                until[row] = FREE
+            for block in {row // BLOCK_ROWS for row in rows}:
+                self._refresh_block(block)
+        refs, index = self._refs, self._rows
+        entries = []
+        for row, time in zip(rows, due):
+            ref = refs[row]
+            refs[row] = None
+            del index[ref]
+            entries.append((time, ref[0], ref[1]))
+        self._free.extend(rows)
+        self._next_due = None
+        return iter(entries)
+
+    def count_live(self, timestamp: int) -> int:
+        """Return the number of fields whose horizon is after timestamp."""
+        until = self._until
+        if np is not None:
+            return int(np.count_nonzero((until > timestamp) & (until != FREE)))
+        return sum(1 for due in until if timestamp < due < FREE)
+
+    def histogram(self, timestamp: int, edges: Sequence[int]) -> List[int]:
+        """
+        Bucket the remaining TTL at timestamp of the fields still live then.
+
+        Args:
+            timestamp: The time to measure the remaining TTLs from
+            edges: Ascending upper bounds of the buckets
+
+        Returns:
+            len(edges) + 1 counts: count i is of remaining TTLs in
+            (edges[i - 1], edges[i]], and the last one is of those past edges[-1]
+        """
+        until = self._until
+        if np is not None:
+            remaining = until[(until > timestamp) & (until != FREE)] - timestamp
+            buckets = np.searchsorted(np.asarray(edges, dtype=np.int64), remaining, side="left")
+            return np.bincount(buckets, minlength=len(edges) + 1).tolist()
+        counts = [0] * (len(edges) + 1)
+        for due in until:
+            if timestamp < due < FREE:
+                counts[bisect_left(edges, due - timestamp)] += 1
+        return counts
+
+    def needs_compaction(self) -> bool:
+        """Return False: rows are reused in place, so there is nothing stale to compact."""
+        return False
+
+    def compact(self, is_current: Callable[[int, str, str], bool]) -> None:
+        """Do nothing; present for the ExpiryQueue interface."""
+
+    def clear(self) -> None:
+        """Drop every row."""
+        self.__init__()
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        row = len(self._refs)
+        self._refs.append(None)
+        if np is not None:
+            if row == len(self._until):
+                grown = np.full(2 * row, FREE, dtype=np.int64)
+                grown[:row] = self._until
+                self._until = grown
+                blocks = np.full(2 * row // BLOCK_ROWS, FREE, dtype=np.int64)
+                blocks[:len(self._block_until)] = self._block_until
+                self._block_until = blocks
+        else:
+            self._until.append(FREE)
+            if row % BLOCK_ROWS == 0:
+                self._block_until.append(FREE)
+        return row
+
+    def _release(self, row: int) -> None:
+        self._set(row, FREE)
+        self._refs[row] = None
+        self._free.append(row)
+
+    def _set(self, row: int, until: int) -> None:
+        """Change the horizon of a row, keeping its block's earliest horizon exact."""
+        block = row // BLOCK_ROWS
+        previous = self._until[row]
+        self._until[row] = until
+        if until < self._block_until[block]:
+            self._block_until[block] = until
+        elif previous == self._block_until[block] and until > previous:
+            if previous == self._next_due:
+                self._next_due = None
+            self._refresh_block(block)
+
+    def _refresh_block(self, block: int) -> None:
+        """Recompute the earliest horizon of one block of rows."""
+        start = block * BLOCK_ROWS
+        rows = self._until[start:start + BLOCK_ROWS]
+        self._block_until[block] = rows.min() if np is not None else min(rows, default=FREE)
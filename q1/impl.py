@@ -44,7 +44,408 @@ Example usage:
 Your implementation should pass all tests in test/test_level1.py, test/test_level2.py, test/test_level3.py, and test/test_level4.py
 """
 
-from typing import Optional, List
+import gc
+import itertools
+import os
+import pickle
+import time
+import warnings
+from bisect import bisect_left, bisect_right
+from sys import getsizeof, intern
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from backup_catalog import BackupCatalog
+from bulk_load import Record, load_stats, read_chunks
+from expiry import ExpiryQueue
+from expiry_columns import ExpiryColumns
+from key_table import KeyTable
+from radix_index import FOREVER, RadixFieldIndex
+from scan_cache import ScanCache
+from snapshot_file import MappedSnapshot, write_snapshot
+from wal import (OP_ATTACH, OP_BACKUP, OP_DELETE, OP_GC_WATERMARK, OP_PUT, OP_PUT_TTL,
+                 OP_RECLAIM, OP_RESTORE, WriteAheadLog)
+
+
+# A single write to a field: (timestamp, value) for a permanent entry, or
+# (timestamp, value, expires_at) for one with a TTL. A value of None marks a
+# deletion.
+Version = tuple
+# The history of a field: a lone Version until the field is written a second
+# time, then a list of Versions ordered by timestamp.
+Chain = Union[Version, List[Version]]
+
+
+def _version(timestamp: int, value: Optional[str], expires_at: Optional[int]) -> Version:
+    """Build a version, leaving out the expiry slot of permanent entries."""
+    if expires_at is None:
+        return (timestamp, value)
+    return (timestamp, value, expires_at)
+
+
+def _expires_at(version: Version) -> Optional[int]:
+    """Return when a version expires, or None if it is permanent."""
+    return version[2] if len(version) > 2 else None
+
+
+def _versions(chain: Chain) -> Sequence[Version]:
+    """Return the versions of a chain, oldest first."""
+    return chain if type(chain) is list else (chain,)
+
+
+# Chains up to this long are searched from the end rather than bisected
+_SHORT_CHAIN = 16
+
+
+def _written_after(chain: List[Version], timestamp: int) -> int:
+    """Return the index of the first version in a list chain written after timestamp."""
+    # The newest version answers current reads and in-order writes without a search
+    hi = len(chain) - 1
+    if chain[hi][0] <= timestamp:
+        return hi + 1
+    if hi <= _SHORT_CHAIN:
+        while hi > 0 and chain[hi - 1][0] > timestamp:
+            hi -= 1
+        return hi
+    lo = 0
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if chain[mid][0] <= timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class GcCycle(NamedTuple):
+    """What one pass of the version collector over the versioned keys reclaimed."""
+    
+    watermark: int
+    keys: int
+    versions_reclaimed: int
+    bytes_freed: int
+
+
+class ScanEntry(NamedTuple):
+    """
+    A scan result with scan_results="entry".
+    
+    Unpacks and compares like a (field, value, expires_at) tuple; str() gives
+    the default "field(value)" format.
+    """
+    
+    field: str
+    value: str
+    expires_at: Optional[int]
+    
+    def __str__(self) -> str:
+        return f"{self.field}({self.value})"
+
+
+class SortedFieldIndex:
+    """
+    The field names of a single key, kept in lexicographic order.
+    
+    Fields are inserted and removed with bisect, so scans walk the names in
+    order without sorting on every call, and prefix scans start at the first
+    candidate and stop at the first name past the prefix.
+    """
+    
+    __slots__ = ("_fields",)
+    
+    tracks_expiry = False
+    
+    def __init__(self):
+        """Initialize an empty index."""
+        self._fields: List[str] = []
+    
+    def __len__(self) -> int:
+        return len(self._fields)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+    
+    def __contains__(self, field: str) -> bool:
+        fields = self._fields
+        i = bisect_left(fields, field)
+        return i < len(fields) and fields[i] == field
+    
+    def copy(self) -> "SortedFieldIndex":
+        """Return an independent copy of the index."""
+        clone = SortedFieldIndex()
+        clone._fields = self._fields.copy()
+        return clone
+    
+    @classmethod
+    def from_sorted(cls, fields: Sequence[str],
+                    untils: Optional[Sequence[float]] = None) -> "SortedFieldIndex":
+        """
+        Build an index over distinct field names given in sorted order.
+        
+        The names are taken as they are, with no insertion per field. This
+        index does not track expiry, so untils is ignored.
+        """
+        index = cls()
+        index._fields = list(fields)
+        return index
+    
+    def add(self, field: str) -> None:
+        """Insert a field name, ignoring names that are already indexed."""
+        fields = self._fields
+        if not fields or fields[-1] < field:
+            fields.append(field)
+            return
+        i = bisect_left(fields, field)
+        if fields[i] != field:
+            fields.insert(i, field)
+    
+    def discard(self, field: str) -> None:
+        """Remove a field name if it is indexed."""
+        fields = self._fields
+        i = bisect_left(fields, field)
+        if i < len(fields) and fields[i] == field:
+            del fields[i]
+    
+    def iter_prefix(self, prefix: str, timestamp: Optional[int] = None,
+                    after: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield the indexed field names starting with prefix, in order.
+        
+        When after is given, starts at the first name sorting after it. This
+        index does not track expiry, so timestamp is ignored.
+        """
+        fields = self._fields
+        i = bisect_left(fields, prefix)
+        if after is not None:
+            i = bisect_right(fields, after, i)
+        n = len(fields)
+        while i < n and fields[i].startswith(prefix):
+            yield fields[i]
+            i += 1
+    
+    def iter_range(self, start: Optional[str] = None, end: Optional[str] = None,
+                   timestamp: Optional[int] = None, reverse: bool = False) -> Iterator[str]:
+        """
+        Yield the indexed field names in [start, end), in order or reversed.
+        
+        A bound of None leaves that side open. This index does not track
+        expiry, so timestamp is ignored.
+        """
+        fields = self._fields
+        lo = 0 if start is None else bisect_left(fields, start)
+        hi = len(fields) if end is None else bisect_left(fields, end, lo)
+        if reverse:
+            for i in range(hi - 1, lo - 1, -1):
+                yield fields[i]
+        else:
+            for i in range(lo, hi):
+                yield fields[i]
+
+
+FIELD_INDEXES = {
+    "sorted": SortedFieldIndex,
+    "radix": RadixFieldIndex,
+}
+
+EXPIRY_INDEXES = {
+    "heap": ExpiryQueue,
+    "columns": ExpiryColumns,
+}
+
+# Upper bounds of the remaining-TTL buckets ttl_stats_at reports by default
+TTL_BUCKETS = (10, 100, 1000, 10_000, 100_000)
+
+# Number of fields the iter_scan* generators fetch at a time
+SCAN_CHUNK = 256
+# Number of records load_stream reads and applies at a time
+LOAD_CHUNK = 50_000
+# Completed version collector cycles reported by gc_stats
+GC_HISTORY = 16
+# Decoded pages an attached backup keeps for the keys read from it last
+MAPPED_PAGE_CACHE = 1024
+
+
+class _KeyPage:
+    """
+    The fields of one key: a version chain per field plus the field index.
+    
+    Pages are shared between the live key table and the backups taken while
+    they were current. A page is only written in the epoch that created it;
+    after a backup, the first write to a key copies its page.
+    
+    The page also summarizes the expiry of its fields: a read at a timestamp
+    in [fast_from, fast_until) sees the latest version of every field, and
+    every field outside dead is live, so scans need no per-field checks.
+    ttl_fields counts the fields whose latest version expires (a TTL, or a
+    deletion, which expires the field at once).
+    """
+    
+    __slots__ = ("fields", "index", "epoch", "ttl_fields", "fast_from", "fast_until", "dead")
+    
+    def __init__(self, index, epoch: int):
+        self.fields: Dict[str, Chain] = {}
+        self.index = index
+        self.epoch = epoch
+        self.ttl_fields = 0
+        self.fast_from = -FOREVER
+        self.fast_until = FOREVER
+        self.dead: Optional[FrozenSet[str]] = None
+    
+    def copy(self, epoch: int) -> "_KeyPage":
+        """Return a copy of the page owned by epoch."""
+        page = _KeyPage(self.index.copy(), epoch)
+        page.fields = {field: chain.copy() if type(chain) is list else chain
+                       for field, chain in self.fields.items()}
+        page.ttl_fields = self.ttl_fields
+        page.fast_from = self.fast_from
+        page.fast_until = self.fast_until
+        page.dead = self.dead
+        return page
+
+
+class _Snapshot:
+    """
+    A backup: the key table as it was when backup_at was called.
+    
+    The table is shared with the live database, not copied, and visibility
+    and remaining TTLs are evaluated at timestamp when the backup is read.
+    A backup taken after a restore keeps that restore as its base layer.
+    
+    A checkpoint (parent is None) holds the whole key table. A delta holds
+    only the keys changed since its parent, with None for removed keys.
+    """
+    
+    __slots__ = ("timestamp", "pages", "base", "parent")
+    
+    def __init__(self, timestamp: int, pages: Dict[str, Optional[_KeyPage]],
+                 base: Optional[Tuple["_Snapshot", int]],
+                 parent: Optional["_Snapshot"] = None):
+        self.timestamp = timestamp
+        self.pages = pages
+        self.base = base
+        self.parent = parent
+    
+    def depth(self) -> int:
+        """Return the number of deltas between this backup and its checkpoint."""
+        depth = 0
+        snapshot = self
+        while snapshot.parent is not None:
+            snapshot = snapshot.parent
+            depth += 1
+        return depth
+    
+    def lookup(self, key: str) -> Optional[_KeyPage]:
+        """Return the page of key, walking the delta chain back to the checkpoint."""
+        snapshot = self
+        while snapshot.parent is not None:
+            if key in snapshot.pages:
+                return snapshot.pages[key]
+            snapshot = snapshot.parent
+        return snapshot.pages.get(key)
+
+
+class _FoldJob:
+    """
+    Incrementally turns a delta backup into a checkpoint.
+    
+    The checkpoint's key table is copied a slice at a time, then the deltas
+    up to the target are applied. Everything read here is frozen, so the
+    work can be spread across any number of operations.
+    """
+    
+    __slots__ = ("target", "deltas", "source", "table")
+    
+    def __init__(self, target: _Snapshot):
+        self.target = target
+        self.deltas: List[_Snapshot] = []
+        snapshot = target
+        while snapshot.parent is not None:
+            self.deltas.append(snapshot)
+            snapshot = snapshot.parent
+        self.deltas.reverse()
+        self.source = iter(snapshot.pages.items())
+        self.table: Dict[str, _KeyPage] = {}
+    
+    def step(self, budget: int) -> bool:
+        """Copy up to budget keys (negative: no limit); return True once folded."""
+        table = self.table
+        for key, page in self.source:
+            table[key] = page
+            budget -= 1
+            if budget == 0:
+                return False
+        for delta in self.deltas:
+            for key, page in delta.pages.items():
+                if page is None:
+                    table.pop(key, None)
+                else:
+                    table[key] = page
+        self.target.pages = table
+        self.target.parent = None
+        return True
+
+
+class _MappedBackup:
+    """
+    A backup attached from a snapshot file (`snapshot_file.py`).
+    
+    Stands in for a checkpoint _Snapshot. A key's page is decoded from the
+    mapped file when it is looked up, and the last MAPPED_PAGE_CACHE pages
+    decoded are kept, so repeated reads of a key decode it once while keys
+    nobody touches stay only in the page cache.
+    """
+    
+    __slots__ = ("file", "index_type", "_decoded")
+    
+    base = None
+    parent = None
+    
+    def __init__(self, file: MappedSnapshot, index_type):
+        self.file = file
+        self.index_type = index_type
+        # Emptied when full; single dict operations keep it safe for concurrent readers
+        self._decoded: Dict[str, Optional[_KeyPage]] = {}
+    
+    def __reduce__(self):
+        return _MappedBackup, (self.file, self.index_type)
+    
+    @property
+    def timestamp(self) -> int:
+        return self.file.timestamp
+    
+    @property
+    def pages(self) -> MappedSnapshot:
+        # Iterated by the lazy restore for the keys to copy
+        return self.file
+    
+    def depth(self) -> int:
+        return 0
+    
+    def lookup(self, key: str) -> Optional[_KeyPage]:
+        """Return the page of key, decoded from the file on its first lookup."""
+        page = self._decoded.get(key, self)
+        if page is not self:
+            return page
+        entries = self.file.lookup(key)
+        if entries is not None:
+            timestamp = self.file.timestamp
+            # Fields are stored sorted by their UTF-8 bytes, which is code point order
+            page = _KeyPage(self.index_type.from_sorted([entry[0] for entry in entries]), -1)
+            for field, value, ttl in entries:
+                page.fields[field] = _version(timestamp, value,
+                                              None if ttl is None else timestamp + ttl)
+        else:
+            page = None
+        if len(self._decoded) >= MAPPED_PAGE_CACHE:
+            self._decoded.clear()
+        self._decoded[key] = page
+        return page
+
+
+# Attributes saved by InMemoryDB.checkpoint; the rest is configuration
+_PERSISTED_STATE = (
+    "_index_type", "_pages", "_base", "_backups", "_epoch", "_pages_epoch",
+    "_dirty", "_last_backup", "_clock", "_expiry", "_gc_watermark",
+)
 
 
 class InMemoryDB:
@@ -58,10 +459,136 @@ class InMemoryDB:
     - Backup and restore functionality
     """
     
-    def __init__(self):
-        """Initialize an empty database."""
-        # TODO: Implement this method
-        pass
+    def __init__(self, field_index: str = "sorted", expiry_budget: int = 0,
+                 backup_mode: str = "cow", checkpoint_interval: int = 16,
+                 max_backup_chain: int = 64, compaction_budget: int = 256,
+                 backup_retention: Optional[Sequence[Tuple[int, int]]] = None,
+                 restore_budget: int = 0, max_base_depth: int = 8,
+                 wal_path: Optional[str] = None,
+                 wal_fsync: str = "always", wal_group_commit_ms: int = 10,
+                 scan_results: str = "string", gc_budget: int = 256,
+                 scan_cache_size: int = 0, expiry_index: str = "heap"):
+        """
+        Initialize an empty database.
+        
+        Args:
+            field_index: How each key indexes its fields, one of:
+                "sorted" - a sorted list maintained with bisect (default)
+                "radix"  - a compressed radix tree that stores shared field
+                           prefixes once and skips expired subtrees in
+                           timestamped scans
+            expiry_budget: Maximum number of expired fields reclaimed during
+                each operation as the clock advances. Reclaimed fields are
+                gone for reads at earlier timestamps too, so only enable this
+                when timestamps do not go backwards. 0 (default) leaves
+                reclamation to purge_expired
+            backup_mode: How backup_at stores backups, one of:
+                "cow"   - every backup shares the whole key table (default)
+                "delta" - backups store only the keys changed since the
+                          previous backup, on top of periodic checkpoints
+            checkpoint_interval: In delta mode, fold a backup into a
+                checkpoint once it is this many deltas past the last one
+            max_backup_chain: In delta mode, the most deltas a restore may
+                have to walk; backup_at takes a checkpoint itself rather
+                than exceed it
+            compaction_budget: In delta mode, the number of keys the
+                compactor copies per operation while folding a checkpoint
+            backup_retention: (age, spacing) tiers for thinning old backups,
+                e.g. [(3600, 3600), (86400, 86400)] keeps every backup from
+                the last hour, hourly ones for a day and daily ones after
+                that. None (default) keeps every backup
+            restore_budget: Number of keys copied out of a restored backup
+                per operation; 0 (default) leaves this to materialize_restore
+            max_base_depth: The most restored backups reads may walk through
+                for a key, counting the bases of the backup restored;
+                restore_at copies every key out at once rather than exceed it
+            wal_path: Path of a write-ahead log (`wal.py`). If set, the
+                database is rebuilt from its snapshot and log. Every put,
+                delete, backup, restore, attach_backup, reclaimed expired
+                field and GC watermark is appended to it before it is applied
+            wal_fsync: When the log is fsynced, one of:
+                "always" - before each write returns (default); concurrent
+                           writers share fsyncs
+                "group"  - every wal_group_commit_ms in the background
+                "never"  - left to the operating system
+            wal_group_commit_ms: Fsync interval of the "group" policy
+            scan_results: What the scan methods return for each field, one of:
+                "string" - "field(value)" (default)
+                "tuple"  - a (field, value, expires_at) tuple, skipping
+                           string formatting entirely
+                "entry"  - a ScanEntry, the same tuple with named fields
+                           that formats as "field(value)" only under str()
+            gc_budget: Number of keys the version collector examines per
+                operation once set_gc_watermark has been called; 0 leaves
+                collection to collect_garbage
+            scan_cache_size: Maximum number of results held by the scan
+                result cache (`scan_cache.py`), which answers repeated
+                scan_at and scan_with_prefix_at calls on unchanged keys;
+                0 (default) disables it
+            expiry_index: How the horizons of expiring fields are kept for
+                purge_expired and ttl_stats_at, one of:
+                "heap"    - a min-heap whose stale entries are dropped lazily;
+                            cheapest for small steps with expiry_budget (default)
+                "columns" - one row per field in an int64 column
+                            (`expiry_columns.py`), so purges and TTL
+                            statistics are vectorized NumPy masks, or plain
+                            loops when NumPy is not installed
+        """
+        if field_index not in FIELD_INDEXES:
+            raise ValueError(f"Unknown field index: {field_index!r}")
+        if backup_mode not in ("cow", "delta"):
+            raise ValueError(f"Unknown backup mode: {backup_mode!r}")
+        if expiry_index not in EXPIRY_INDEXES:
+            raise ValueError(f"Unknown expiry index: {expiry_index!r}")
+        if scan_results not in ("string", "tuple", "entry"):
+            raise ValueError(f"Unknown scan results: {scan_results!r}")
+        self._scan_results = scan_results
+        self._index_type = FIELD_INDEXES[field_index]
+        # Key table; keys missing from it are read through the restored base
+        self._pages = KeyTable()
+        # Backup that was restored and the timestamp it was restored at
+        self._base: Optional[Tuple[_Snapshot, int]] = None
+        self._backups = BackupCatalog(backup_retention)
+        # Attached backups whose snapshot files are open
+        self._attached: List[_MappedBackup] = []
+        # Bumped by every backup; pages and the key table from older epochs are shared
+        self._epoch = 0
+        self._pages_epoch = 0
+        # Delta backups: keys written since the last backup, and the compactor
+        self._dirty = set() if backup_mode == "delta" else None
+        self._last_backup: Optional[_Snapshot] = None
+        self._fold: Optional[_FoldJob] = None
+        self._checkpoint_interval = checkpoint_interval
+        self._max_backup_chain = max_backup_chain
+        self._compaction_budget = compaction_budget
+        # Sorted index of the keys, built by the first key scan and kept up to date after
+        self._keys = None
+        # Lazy restore: remaining keys of the base to copy into the key table
+        self._restoring: Optional[Iterator[str]] = None
+        self._restore_budget = restore_budget
+        self._max_base_depth = max_base_depth
+        # Latest timestamp seen; the untimed methods operate at this time.
+        self._clock = 0
+        self._expiry = EXPIRY_INDEXES[expiry_index]()
+        self._expiry_budget = expiry_budget
+        # Version GC: keys that may hold superseded versions, and the running cycle
+        self._versioned: Set[str] = set()
+        self._gc_watermark: Optional[int] = None
+        self._gc_requested = False
+        self._gc_kept: Optional[Set[str]] = None
+        self._gc_counts = [0, 0, 0]  # Keys, versions and bytes of the running cycle
+        self._gc_cycles: List[GcCycle] = []
+        self._gc_totals = [0, 0]  # Versions and bytes over all cycles
+        self._gc_budget = gc_budget
+        # Scan result cache, and the write stamp of each key written since it was last cleared
+        self._scan_cache = ScanCache(scan_cache_size) if scan_cache_size > 0 else None
+        self._stamps: Dict[str, int] = {}
+        self._write_stamps = itertools.count(1)
+        self._wal: Optional[WriteAheadLog] = None
+        if wal_path is not None:
+            wal = WriteAheadLog(wal_path, wal_fsync, wal_group_commit_ms)
+            self._recover(wal)
+            self._wal = wal
     
     # ============================================================================
     # LEVEL 1 METHODS
@@ -78,8 +605,7 @@ class InMemoryDB:
         Returns:
             The value if found, None otherwise
         """
-        # TODO: Implement this method
-        pass
+        return self.get_at(self._clock, key, field)
     
     def put(self, key: str, field: str, value: str) -> None:
         """
@@ -90,8 +616,7 @@ class InMemoryDB:
             field: The field within that key
             value: The value to store
         """
-        # TODO: Implement this method
-        pass
+        self.put_at(self._clock, key, field, value)
     
     def delete(self, key: str, field: str) -> bool:
         """
@@ -104,8 +629,7 @@ class InMemoryDB:
         Returns:
             True if the field was deleted, False if it didn't exist
         """
-        # TODO: Implement this method
-        pass
+        return self.delete_at(self._clock, key, field)
     
     # ============================================================================
     # LEVEL 2 METHODS
@@ -122,8 +646,7 @@ class InMemoryDB:
             List of strings in format ['field1(value1)', 'field2(value2)', ...]
             Returns empty list if key doesn't exist
         """
-        # TODO: Implement this method
-        pass
+        return self.scan_at(self._clock, key)
     
     def scan_with_prefix(self, key: str, prefix: str) -> List[str]:
         """
@@ -138,8 +661,7 @@ class InMemoryDB:
             Only includes fields that start with prefix
             Returns empty list if key doesn't exist or no fields match prefix
         """
-        # TODO: Implement this method
-        pass
+        return self.scan_with_prefix_at(self._clock, key, prefix)
     
     # ============================================================================
     # LEVEL 3 METHODS
@@ -157,8 +679,8 @@ class InMemoryDB:
         Returns:
             The value if found and not expired, None otherwise
         """
-        # TODO: Implement this method
-        pass
+        self._advance(timestamp)
+        return self._read(timestamp, key, field)
     
     def put_at(self, timestamp: int, key: str, field: str, value: str) -> None:
         """
@@ -170,8 +692,9 @@ class InMemoryDB:
             field: The field within that key
             value: The value to store
         """
-        # TODO: Implement this method
-        pass
+        self._advance(timestamp)
+        self._log(OP_PUT, timestamp, key, field, value)
+        self._write(timestamp, key, field, value, None)
     
     def delete_at(self, timestamp: int, key: str, field: str) -> bool:
         """
@@ -185,8 +708,12 @@ class InMemoryDB:
         Returns:
             True if the field was deleted, False if it didn't exist or was expired
         """
-        # TODO: Implement this method
-        pass
+        self._advance(timestamp)
+        if self._read(timestamp, key, field) is None:
+            return False
+        self._log(OP_DELETE, timestamp, key, field)
+        self._write(timestamp, key, field, None, None)
+        return True
     
     def scan_at(self, timestamp: int, key: str) -> List[str]:
         """
@@ -201,8 +728,8 @@ class InMemoryDB:
             Only includes non-expired entries
             Returns empty list if key doesn't exist or all entries are expired
         """
-        # TODO: Implement this method
-        pass
+        self._advance(timestamp)
+        return self._scan(timestamp, key, "")
     
     def scan_with_prefix_at(self, timestamp: int, key: str, prefix: str) -> List[str]:
         """
@@ -218,8 +745,8 @@ class InMemoryDB:
             Only includes fields that start with prefix and are not expired
             Returns empty list if key doesn't exist or no fields match prefix
         """
-        # TODO: Implement this method
-        pass
+        self._advance(timestamp)
+        return self._scan(timestamp, key, prefix)
     
     def put_at_with_ttl(self, timestamp: int, key: str, field: str, value: str, ttl: int) -> None:
         """
@@ -232,8 +759,9 @@ class InMemoryDB:
             value: The value to store
             ttl: Time to live - entry expires at timestamp + ttl
         """
-        # TODO: Implement this method
-        pass
+        self._advance(timestamp)
+        self._log(OP_PUT_TTL, timestamp, key, field, value, ttl)
+        self._write(timestamp, key, field, value, timestamp + ttl)
     
     # ============================================================================
     # LEVEL 4 METHODS
@@ -250,9 +778,36 @@ class InMemoryDB:
             - Only non-expired entries are included in the backup
             - TTL entries store their remaining TTL at backup time
             - Permanent entries are stored as-is
+            - Takes constant time: the key table is shared with the backup,
+              and its chunks and pages are copied by the first write that
+              touches them
+            - In delta mode, stores only the keys written since the previous
+              backup, so it takes time proportional to those keys
+            - Applies backup_retention with ages counted back from timestamp
         """
-        # TODO: Implement this method
-        pass
+        self._advance(timestamp)
+        previous = self._last_backup
+        if (self._dirty is not None and previous is not None
+                and previous.depth() < self._max_backup_chain):
+            delta = {key: self._pages.get(key) for key in self._dirty}
+            snapshot = _Snapshot(timestamp, delta, self._base, previous)
+            self._dirty = set()
+            # Deltas reference pages, not the key table, so a private table stays private
+            if self._pages_epoch == self._epoch:
+                self._pages_epoch += 1
+            if self._fold is None and snapshot.depth() >= self._checkpoint_interval:
+                self._fold = _FoldJob(snapshot)
+        else:
+            snapshot = _Snapshot(timestamp, self._pages, self._base)
+            if self._dirty is not None:
+                self._dirty = set()
+        self._backups.add(timestamp, snapshot)
+        # Ages count from the backup itself: reads move the clock but are not logged
+        if self._backups.thin(timestamp):
+            self._close_unused_files()
+        self._last_backup = snapshot
+        self._epoch += 1
+        self._log(OP_BACKUP, timestamp)
     
     def restore_at(self, timestamp: int, restore_at_timestamp: int) -> None:
         """
@@ -267,6 +822,1550 @@ class InMemoryDB:
             - Replaces current database state with backup state
             - Adjusts TTL entries: new_expiry = timestamp + remaining_ttl_at_backup
             - Permanent entries are restored as-is
+            - Takes constant time: the backup becomes a read-only base layer.
+              Reads compute each field's adjusted expiry from it, the first
+              write to a key copies that key out of it, and
+              materialize_restore copies the rest
+            - A backup taken after a restore reads through that restore's
+              base in turn; once restoring would leave more than
+              max_base_depth base layers, every key is copied out at once
+        """
+        self._advance(timestamp)
+        snapshot = self._backups.floor(restore_at_timestamp)
+        self._pages = KeyTable()
+        self._pages_epoch = self._epoch
+        self._base = None if snapshot is None else (snapshot, timestamp)
+        self._restoring = None
+        # The next backup cannot be a delta against the replaced table
+        self._last_backup = None
+        if self._dirty is not None:
+            self._dirty = set()
+        # Restored pages hold one version per field
+        self._versioned = set()
+        self._keys = None
+        self._clear_scan_cache()
+        if self._gc_kept is not None:
+            self._gc_kept = set()
+        # Expiry entries of the replaced pages are left to go stale; freeing
+        # them here would cost time proportional to the old database
+        if self._expiry.tracks_fields:
+            self._expiry.clear()
+        if self._base_depth() > self._max_base_depth:
+            self._copy_out_base(-1)
+        self._close_unused_files()
+        self._log(OP_RESTORE, timestamp, restore_at_timestamp)
+    
+    def materialize_restore(self, budget: int = -1) -> bool:
+        """
+        Copy keys out of the restored backup into the live database.
+        
+        Args:
+            budget: Maximum number of keys to copy; negative copies them all
+            
+        Returns:
+            True once nothing is read through the restored backup any more
+            
+        Behavior:
+            - Called with restore_budget keys per operation when that option
+              is set; otherwise runs only when called
+            - Once every key has been copied, the backup stops being a base layer
+        """
+        return self._copy_out_base(budget)
+    
+    def _copy_out_base(self, budget: int) -> bool:
+        """Copy up to budget keys out of the base layers; see materialize_restore."""
+        if self._base is None:
+            return True
+        if self._restoring is None:
+            self._restoring = self._base_keys(self._base)
+        for key in self._restoring:
+            if key not in self._pages:
+                source = self._base_source(key, self._base)
+                if source is not None:
+                    page = self._restored_page(*source, self._epoch)
+                    if page.fields:
+                        self._install(key, page)
+            budget -= 1
+            if budget == 0:
+                return False
+        self._base = None
+        self._restoring = None
+        # Later deltas cannot read through the dropped base, so start a new chain
+        self._last_backup = None
+        self._close_unused_files()
+        return True
+    
+    def list_backups(self, start: Optional[int] = None, end: Optional[int] = None) -> List[int]:
+        """
+        Return the timestamps of the retained backups within a range.
+        
+        Args:
+            start: The earliest timestamp to include, or None for no lower bound
+            end: The latest timestamp to include, or None for no upper bound
+            
+        Returns:
+            Backup timestamps in [start, end], in ascending order
+        """
+        return self._backups.range(start, end)
+    
+    def compact_backups(self) -> int:
+        """
+        Finish folding delta backups into checkpoints.
+        
+        Returns:
+            The number of backups turned into checkpoints
+            
+        Behavior:
+            - In delta mode this work is otherwise done a few keys at a time
+              during later operations
+            - Folds every backup that is checkpoint_interval or more deltas
+              away from its checkpoint
+        """
+        folded = 0
+        while True:
+            if self._fold is None:
+                targets = [snapshot for snapshot in self._backups.values()
+                           if snapshot.depth() >= self._checkpoint_interval]
+                if not targets:
+                    return folded
+                self._fold = _FoldJob(min(targets, key=_Snapshot.depth))
+            self._fold.step(-1)
+            self._fold = None
+            folded += 1
+    
+    # ============================================================================
+    # BATCH METHODS
+    # ============================================================================
+    
+    def put_many(self, items: Sequence[tuple]) -> None:
+        """
+        Store several values at the current time.
+        
+        Args:
+            items: (key, field, value) or (key, field, value, ttl) tuples
         """
-        # TODO: Implement this method
-        pass
\ No newline at end of file
+        self.put_many_at(self._clock, items)
+    
+    def get_many(self, items: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Retrieve several values at the current time.
+        
+        Args:
+            items: (key, field) pairs
+            
+        Returns:
+            The value of each pair, or None where there is none
+        """
+        return self.get_many_at(self._clock, items)
+    
+    def delete_many(self, items: Sequence[Tuple[str, str]]) -> List[bool]:
+        """
+        Delete several fields at the current time.
+        
+        Args:
+            items: (key, field) pairs
+            
+        Returns:
+            For each pair, True if the field was deleted
+        """
+        return self.delete_many_at(self._clock, items)
+    
+    def scan_many(self, keys: Sequence[str]) -> List[List[str]]:
+        """
+        Scan several keys at the current time.
+        
+        Args:
+            keys: The keys to scan
+            
+        Returns:
+            The scan_at result of each key
+        """
+        return self.scan_many_at(self._clock, keys)
+    
+    def put_many_at(self, timestamp: int, items: Sequence[tuple]) -> None:
+        """
+        Store several values at a specific timestamp.
+        
+        Args:
+            timestamp: The timestamp to store at
+            items: (key, field, value) or (key, field, value, ttl) tuples
+            
+        Behavior:
+            - Same result as calling put_at / put_at_with_ttl for each item
+              in order
+            - Consecutive items for the same key share one page lookup, and
+              the write-ahead log gets one write and one fsync for the batch,
+              before any item is applied
+        """
+        self._advance(timestamp)
+        if self._wal is not None:
+            self._wal.append_many([
+                (OP_PUT, (timestamp, item[0], item[1], item[2])) if len(item) <= 3
+                else (OP_PUT_TTL, (timestamp, item[0], item[1], item[2], item[3]))
+                for item in items
+            ])
+        write, schedule = self._write_page, self._schedule
+        tracks_expiry = self._index_type.tracks_expiry
+        current = page = None
+        for item in items:
+            key, field, value = item[0], item[1], item[2]
+            if key != current:
+                page = self._writable_page(key, create=True)
+                fields, add = page.fields, page.index.add
+                if timestamp > page.fast_from:
+                    page.fast_from = timestamp
+                current = key
+            expires_at = timestamp + item[3] if len(item) > 3 else None
+            if field in fields:
+                write(page, timestamp, key, field, value, expires_at)
+            else:
+                # A new field needs no chain ordering, the common case when loading
+                field = intern(field)
+                chain = fields[field] = _version(timestamp, value, expires_at)
+                add(field)
+                if expires_at is not None:
+                    self._note_expiry(page, field, FOREVER, self._until(chain))
+                if expires_at is not None or tracks_expiry:
+                    schedule(page, key, field, chain)
+    
+    def get_many_at(self, timestamp: int, items: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Retrieve several values at a specific timestamp.
+        
+        Args:
+            timestamp: The timestamp to read at
+            items: (key, field) pairs
+            
+        Returns:
+            The value of each pair, or None where there is none
+        """
+        self._advance(timestamp)
+        pages = self._pages
+        visible = self._visible
+        result = []
+        current = page = None
+        for key, field in items:
+            if key != current:
+                page = pages.get(key)
+                current = key
+            if page is None:
+                # Missing, or still read through a restored base
+                result.append(self._read(timestamp, key, field))
+            else:
+                chain = page.fields.get(field)
+                result.append(None if chain is None else visible(chain, timestamp))
+        return result
+    
+    def delete_many_at(self, timestamp: int, items: Sequence[Tuple[str, str]]) -> List[bool]:
+        """
+        Delete several fields at a specific timestamp.
+        
+        Args:
+            timestamp: The timestamp to delete at
+            items: (key, field) pairs
+            
+        Returns:
+            For each pair, True if the field was deleted, False if it didn't
+            exist or was expired
+        """
+        self._advance(timestamp)
+        # Find the deletions first, so they are logged before any is applied
+        deleted = {}
+        result = []
+        for key, field in items:
+            found = (key, field) not in deleted and self._read(timestamp, key, field) is not None
+            if found:
+                deleted[key, field] = None
+            result.append(found)
+        if deleted and self._wal is not None:
+            self._wal.append_many([(OP_DELETE, (timestamp, key, field)) for key, field in deleted])
+        for key, field in deleted:
+            self._write(timestamp, key, field, None, None)
+        return result
+    
+    def scan_many_at(self, timestamp: int, keys: Sequence[str]) -> List[List[str]]:
+        """
+        Scan several keys at a specific timestamp.
+        
+        Args:
+            timestamp: The timestamp to scan at
+            keys: The keys to scan
+            
+        Returns:
+            The scan_at result of each key
+        """
+        self._advance(timestamp)
+        return [self._scan(timestamp, key, "") for key in keys]
+    
+    # ============================================================================
+    # BULK LOADING
+    # ============================================================================
+    
+    def load_stream(self, source: Union[str, os.PathLike, Iterable], format: str = "jsonl",
+                    timestamp: Optional[int] = None,
+                    chunk_size: int = LOAD_CHUNK) -> Dict[str, float]:
+        """
+        Load (key, field, value, timestamp, ttl) records from a CSV or JSONL stream.
+        
+        Args:
+            source: A file path, or an iterable of lines (of record tuples
+                for the "records" format)
+            format: "jsonl" (default), "csv" or "records"; see `bulk_load.py`
+            timestamp: Timestamp of the records that carry none; defaults to
+                the current time
+            chunk_size: Number of records read and applied at a time
+            
+        Returns:
+            {"records": count, "seconds": elapsed, "records_per_second": rate}
+            
+        Behavior:
+            - Same result as calling put_at / put_at_with_ttl for each record
+              in order
+            - Reads one chunk at a time, so sources larger than memory stream
+            - The cycle garbage collector is paused until the load returns
+            - A chunk's records are grouped by key. A key with no fields yet
+              gets its fields, field index and expiry summary built at once
+              from its sorted field names; other keys are written as by
+              put_many_at
+            - Raises ValueError on an unknown format or a malformed record;
+              the chunks before the malformed record stay loaded
+        """
+        chunks = read_chunks(source, format, chunk_size)
+        if timestamp is None:
+            timestamp = self._clock
+        start = time.perf_counter()
+        records = 0
+        # Loading allocates millions of objects and frees almost none, so the
+        # cycle collector would only rescan the growing table
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for chunk in chunks:
+                self._load_chunk(chunk, timestamp)
+                records += len(chunk)
+        finally:
+            if collecting:
+                gc.enable()
+        return load_stats(records, time.perf_counter() - start)
+    
+    def _load_chunk(self, records: List[Record], timestamp: int) -> None:
+        """Apply a chunk of load_stream records, one key at a time."""
+        groups: Dict[str, List[Record]] = {}
+        for record in records:
+            group = groups.get(record[0])
+            if group is None:
+                groups[record[0]] = [record]
+            else:
+                group.append(record)
+        self._advance(max(timestamp if record[3] is None else record[3] for record in records))
+        if self._wal is not None:
+            self._wal.append_many([
+                (OP_PUT, (timestamp if at is None else at, key, field, value)) if ttl is None
+                else (OP_PUT_TTL, (timestamp if at is None else at, key, field, value, ttl))
+                for key, field, value, at, ttl in records
+            ])
+        for key, group in groups.items():
+            page = self._writable_page(key, create=True)
+            if page.fields:
+                self._extend_page(page, key, group, timestamp)
+            else:
+                self._build_page(page, key, group, timestamp)
+    
+    def _build_page(self, page: _KeyPage, key: str, group: List[Record], timestamp: int) -> None:
+        """Fill an empty page with a key's records, building its field index once."""
+        fields = page.fields
+        repeats = []
+        # Horizons of the fields with a TTL; the others never expire
+        untils: Dict[str, int] = {}
+        fast_from = -FOREVER
+        for record in group:
+            field = record[1]
+            if field in fields:
+                repeats.append(record)
+                continue
+            at = timestamp if record[3] is None else record[3]
+            if at > fast_from:
+                fast_from = at
+            field = intern(field)
+            ttl = record[4]
+            if ttl is None:
+                fields[field] = _version(at, record[2], None)
+            else:
+                fields[field] = _version(at, record[2], at + ttl)
+                untils[field] = at + ttl if ttl > 0 else at
+        names = sorted(fields)
+        page.index = self._index_type.from_sorted(
+            names, [untils.get(field, FOREVER) for field in names]
+            if self._index_type.tracks_expiry else None)
+        page.ttl_fields = len(untils)
+        page.fast_from = fast_from
+        page.fast_until = min(untils.values(), default=FOREVER)
+        page.dead = None
+        key = intern(key)
+        self._schedule_many([(until, key, field) for field, until in untils.items()])
+        # Later versions of a field keep their chains ordered the usual way
+        if repeats:
+            self._extend_page(page, key, repeats, timestamp)
+    
+    def _extend_page(self, page: _KeyPage, key: str, group: List[Record], timestamp: int) -> None:
+        """Apply a key's records to a page that already has fields, as put_many_at does."""
+        fields, add = page.fields, page.index.add
+        tracks_expiry = page.index.tracks_expiry
+        for _, field, value, at, ttl in group:
+            if at is None:
+                at = timestamp
+            expires_at = None if ttl is None else at + ttl
+            if field in fields:
+                self._write_page(page, at, key, field, value, expires_at)
+                continue
+            field = intern(field)
+            chain = fields[field] = _version(at, value, expires_at)
+            add(field)
+            if at > page.fast_from:
+                page.fast_from = at
+            if expires_at is not None:
+                self._note_expiry(page, field, FOREVER, self._until(chain))
+            if expires_at is not None or tracks_expiry:
+                self._schedule(page, key, field, chain)
+    
+    # ============================================================================
+    # SCAN ITERATORS
+    # ============================================================================
+    
+    def iter_scan(self, key: str) -> Iterator[str]:
+        """Yield the results of scan(key) lazily."""
+        return self.iter_scan_with_prefix_at(self._clock, key, "")
+    
+    def iter_scan_with_prefix(self, key: str, prefix: str) -> Iterator[str]:
+        """Yield the results of scan_with_prefix(key, prefix) lazily."""
+        return self.iter_scan_with_prefix_at(self._clock, key, prefix)
+    
+    def iter_scan_at(self, timestamp: int, key: str) -> Iterator[str]:
+        """Yield the results of scan_at(timestamp, key) lazily."""
+        return self.iter_scan_with_prefix_at(timestamp, key, "")
+    
+    def iter_scan_with_prefix_at(self, timestamp: int, key: str, prefix: str) -> Iterator[str]:
+        """
+        Yield the results of scan_with_prefix_at lazily.
+        
+        Args:
+            timestamp: The timestamp to scan at
+            key: The key to scan
+            prefix: The prefix to filter fields by
+            
+        Returns:
+            An iterator over strings in format 'field(value)', in order
+            
+        Behavior:
+            - Fields are fetched SCAN_CHUNK at a time with the scan_page
+              cursor, so memory stays bounded and the first result does not
+              wait for the whole key
+            - Writes to the key while iterating show up only in fields the
+              iterator has not reached yet
+        """
+        self._advance(timestamp)
+        return self._iter_scan(timestamp, key, prefix)
+    
+    def scan_page(self, key: str, prefix: str = "", after: Optional[str] = None,
+                  limit: int = 100) -> Tuple[List[str], Optional[str]]:
+        """Return one page of scan_with_prefix(key, prefix); see scan_page_at."""
+        return self.scan_page_at(self._clock, key, prefix, after, limit)
+    
+    def scan_page_at(self, timestamp: int, key: str, prefix: str = "",
+                     after: Optional[str] = None, limit: int = 100
+                     ) -> Tuple[List[str], Optional[str]]:
+        """
+        Return one page of scan_with_prefix_at results and a cursor to the next.
+        
+        Args:
+            timestamp: The timestamp to scan at
+            key: The key to scan
+            prefix: The prefix to filter fields by
+            after: Cursor returned by the previous page; None starts at the
+                first field
+            limit: Maximum number of results in the page
+            
+        Returns:
+            (results, cursor): up to limit strings in format 'field(value)',
+            and the cursor to pass as after for the next page, or None once
+            the scan is complete
+            
+        Behavior:
+            - The cursor is the last field returned, so the next page seeks
+              straight past it instead of rescanning earlier fields
+        """
+        if limit <= 0:
+            raise ValueError(f"limit must be positive: {limit!r}")
+        self._advance(timestamp)
+        entries = self._scan_fields(timestamp, key, prefix, after, limit)
+        cursor = entries[-1][0] if len(entries) == limit else None
+        return self._results(entries), cursor
+    
+    def _iter_scan(self, timestamp: int, key: str, prefix: str) -> Iterator[str]:
+        after = None
+        while True:
+            entries = self._scan_fields(timestamp, key, prefix, after, SCAN_CHUNK)
+            yield from self._results(entries)
+            if len(entries) < SCAN_CHUNK:
+                return
+            after = entries[-1][0]
+    
+    # ============================================================================
+    # RANGE SCANS
+    # ============================================================================
+    
+    def scan_range(self, key: str, start_field: Optional[str] = None,
+                   end_field: Optional[str] = None, limit: Optional[int] = None,
+                   reverse: bool = False) -> List[str]:
+        """Return the fields of key in [start_field, end_field); see scan_range_at."""
+        return self.scan_range_at(self._clock, key, start_field, end_field, limit, reverse)
+    
+    def scan_range_at(self, timestamp: int, key: str, start_field: Optional[str] = None,
+                      end_field: Optional[str] = None, limit: Optional[int] = None,
+                      reverse: bool = False) -> List[str]:
+        """
+        Return the fields of key in [start_field, end_field) visible at timestamp.
+        
+        Args:
+            timestamp: The timestamp to scan at
+            key: The key to scan
+            start_field: The first field to include, or None for no lower bound
+            end_field: The first field past the range, or None for no upper bound
+            limit: Maximum number of results, or None for no limit
+            reverse: Return the fields in descending order, so a limit keeps
+                the last fields of the range
+            
+        Returns:
+            List of strings in format ['field1(value1)', 'field2(value2)', ...]
+            
+        Behavior:
+            - The field index seeks straight to the bound the scan starts
+              from and stops after limit visible fields, so a scan costs
+              O(log n + limit) rather than a pass over the whole key
+            - With time-ordered field names such as 'evt:20261018T120000',
+              scan_range_at(t, key, 'evt:', 'evt;', 50, reverse=True) returns
+              the 50 latest events
+        """
+        if limit is not None and limit <= 0:
+            raise ValueError(f"limit must be positive: {limit!r}")
+        self._advance(timestamp)
+        entries = self._range_fields(timestamp, key, start_field, end_field,
+                                     -1 if limit is None else limit, reverse)
+        return self._results(entries)
+    
+    # ============================================================================
+    # KEY SCANS
+    # ============================================================================
+    
+    def scan_keys(self, prefix: str = "") -> List[str]:
+        """Return the keys starting with prefix that have visible fields; see scan_keys_at."""
+        return self.scan_keys_at(self._clock, prefix)
+    
+    def scan_keys_range(self, start: Optional[str] = None, end: Optional[str] = None,
+                        limit: Optional[int] = None) -> List[str]:
+        """Return the keys in [start, end) that have visible fields; see scan_keys_range_at."""
+        return self.scan_keys_range_at(self._clock, start, end, limit)
+    
+    def scan_keys_at(self, timestamp: int, prefix: str = "") -> List[str]:
+        """
+        Return the keys starting with prefix that have a visible field at timestamp.
+        
+        Args:
+            timestamp: The timestamp to scan at
+            prefix: The prefix to filter keys by
+            
+        Returns:
+            Matching keys in lexicographic order
+            
+        Behavior:
+            - Keys whose fields have all expired or been deleted are skipped
+            - The first key scan builds a sorted index of the keys, with the
+              same structure as field_index; later writes keep it up to
+              date, so a scan costs O(log n + k)
+        """
+        self._advance(timestamp)
+        return self._scan_keys(timestamp, prefix, None, None, None)
+    
+    def scan_keys_range_at(self, timestamp: int, start: Optional[str] = None,
+                           end: Optional[str] = None, limit: Optional[int] = None
+                           ) -> List[str]:
+        """
+        Return the keys in [start, end) that have a visible field at timestamp.
+        
+        Args:
+            timestamp: The timestamp to scan at
+            start: The first key to include, or None for no lower bound
+            end: The first key past the range, or None for no upper bound
+            limit: Maximum number of keys to return, or None for no limit
+            
+        Returns:
+            Matching keys in lexicographic order. To page through a range,
+            pass the last key returned + chr(0) as the next start
+        """
+        if limit is not None and limit <= 0:
+            raise ValueError(f"limit must be positive: {limit!r}")
+        self._advance(timestamp)
+        return self._scan_keys(timestamp, "", start, end, limit)
+    
+    def _scan_keys(self, timestamp: int, prefix: str, start: Optional[str],
+                   end: Optional[str], limit: Optional[int]) -> List[str]:
+        result = []
+        after = None
+        while True:
+            candidates = self._indexed_keys(prefix, start, end, after, SCAN_CHUNK)
+            for key in candidates:
+                if self._key_visible(timestamp, key):
+                    result.append(key)
+                    if len(result) == limit:
+                        return result
+            if len(candidates) < SCAN_CHUNK:
+                return result
+            after = candidates[-1]
+    
+    def _indexed_keys(self, prefix: str, start: Optional[str], end: Optional[str],
+                      after: Optional[str], count: int) -> List[str]:
+        """Return up to count indexed keys with prefix in [start, end) sorting after `after`."""
+        index = self._key_index()
+        keys = []
+        if after is None and start is not None:
+            after = start
+            if start.startswith(prefix) and (end is None or start < end) and start in index:
+                keys.append(start)
+        for key in index.iter_prefix(prefix, None, after):
+            if len(keys) == count or (end is not None and key >= end):
+                break
+            keys.append(key)
+        return keys
+    
+    def _key_visible(self, timestamp: int, key: str) -> bool:
+        return bool(self._scan_fields(timestamp, key, "", None, 1))
+    
+    def _key_index(self):
+        """Return the index of keys, building it on first use."""
+        if self._keys is None:
+            # Sorted insertion appends, so the build is linear after the sort
+            keys = self._index_type()
+            for key in sorted(set(self._pages).union(self._base_keys(self._base))):
+                keys.add(key)
+            self._keys = keys
+        return self._keys
+    
+    def _add_key(self, key: str) -> None:
+        self._keys.add(key)
+    
+    def _remove_key(self, key: str) -> None:
+        self._keys.discard(key)
+    
+    # ============================================================================
+    # SCAN CACHE
+    # ============================================================================
+    
+    def scan_cache_stats(self) -> Dict[str, int]:
+        """
+        Report how the scan result cache is doing.
+        
+        Returns:
+            A dict with the "hits", "misses" and "evictions" since the
+            database was created, and the cache's current "entries" and
+            "size" in results. All are 0 if the cache is disabled
+        """
+        if self._scan_cache is None:
+            return {"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "size": 0}
+        return self._scan_cache.stats()
+    
+    def _cache_get(self, scan: Tuple[str, str], stamp: int, timestamp: int) -> Optional[list]:
+        return self._scan_cache.get(scan, stamp, timestamp)
+    
+    def _cache_put(self, scan: Tuple[str, str], stamp: int, timestamp: int,
+                   valid_until: float, results: list) -> None:
+        self._scan_cache.put(scan, stamp, timestamp, valid_until, results)
+    
+    def _clear_scan_cache(self) -> None:
+        """Drop every cached scan, along with the write stamps they were checked against."""
+        if self._scan_cache is not None:
+            self._scan_cache.clear()
+            self._stamps = {}
+    
+    # ============================================================================
+    # PERSISTENCE
+    # ============================================================================
+    
+    def checkpoint(self) -> None:
+        """
+        Snapshot the database to its write-ahead log and empty the log.
+        
+        Behavior:
+            - Finishes pending backup folds and copies out any restored
+              backup first, so the snapshot holds no background work
+            - Must not run concurrently with writes to this database
+        """
+        if self._wal is None:
+            raise ValueError("No write-ahead log configured")
+        self.compact_backups()
+        self.materialize_restore()
+        self._wal.checkpoint(self._dump_state)
+    
+    def close(self) -> None:
+        """Fsync and close the write-ahead log, if any."""
+        if self._wal is not None:
+            self._wal.close()
+    
+    def export_backup(self, timestamp: int, path: str) -> int:
+        """
+        Write the backup restore_at would pick for timestamp to a snapshot file.
+        
+        Args:
+            timestamp: The timestamp to find the closest backup for
+            path: The file to write
+            
+        Returns:
+            The timestamp of the backup written
+            
+        Behavior:
+            - The file holds the fields visible at the backup's timestamp
+              with their remaining TTLs, in the format of `snapshot_file.py`
+            - Raises ValueError if there is no backup at or before timestamp
+        """
+        snapshot = self._backups.floor(timestamp)
+        if snapshot is None:
+            raise ValueError(f"No backup at or before {timestamp}")
+        write_snapshot(path, snapshot.timestamp, self._backup_entries(snapshot))
+        return snapshot.timestamp
+    
+    def attach_backup(self, path: str) -> int:
+        """
+        Add a snapshot file written by export_backup to the backups.
+        
+        Args:
+            path: The snapshot file
+            
+        Returns:
+            The backup's timestamp, for use with restore_at
+            
+        Behavior:
+            - Only the file's header is read; restore_at reads keys from the
+              memory-mapped file as they are accessed
+            - Replaces any backup with the same timestamp
+            - The file is closed once the backup has left the backups and
+              no restored base reads through it
+        """
+        backup = _MappedBackup(MappedSnapshot(path), self._index_type)
+        self._backups.add(backup.timestamp, backup)
+        self._attached.append(backup)
+        self._close_unused_files()
+        self._log(OP_ATTACH, path)
+        return backup.timestamp
+    
+    def _backup_entries(self, snapshot: _Snapshot
+                        ) -> Iterator[Tuple[str, List[Tuple[str, str, Optional[int]]]]]:
+        """Yield each key of a backup with its (field, value, remaining TTL) entries."""
+        base = (snapshot, snapshot.timestamp)
+        for key in set(self._base_keys(base)):
+            source = self._base_source(key, base)
+            if source is None:
+                continue
+            page, layers = source
+            entries = []
+            for field in page.index:
+                entry = self._restored_entry(page.fields[field], layers)
+                if entry is not None:
+                    value, expires_at = entry
+                    entries.append((field, value,
+                                    None if expires_at is None else expires_at - snapshot.timestamp))
+            yield key, entries
+    
+    def _log(self, op: int, *args) -> None:
+        """Append a call to the write-ahead log, if any."""
+        if self._wal is not None:
+            self._wal.append(op, *args)
+    
+    def _dump_state(self) -> bytes:
+        """Serialize everything _load_state restores."""
+        return pickle.dumps({name: getattr(self, name) for name in _PERSISTED_STATE},
+                            protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def _load_state(self, data: bytes) -> None:
+        """Replace the database state with a snapshot written by _dump_state."""
+        state = pickle.loads(data)
+        if (state["_index_type"] is not self._index_type
+                or (state["_dirty"] is None) != (self._dirty is None)
+                or type(state["_expiry"]) is not type(self._expiry)):
+            raise ValueError("Snapshot was written with a different field_index, backup_mode "
+                             "or expiry_index")
+        for name in _PERSISTED_STATE:
+            # Snapshots from before the GC watermark was saved lack it
+            if name in state:
+                setattr(self, name, state[name])
+        for backup in self._attached:
+            backup.file.close()
+        self._attached = list(self._reachable_files())
+        self._versioned = {key for key, page in self._pages.items()
+                           if any(type(chain) is list for chain in page.fields.values())}
+        self._keys = None
+        self._clear_scan_cache()
+    
+    def _recover(self, wal: WriteAheadLog) -> None:
+        """Rebuild the database from the log's snapshot and the records after it."""
+        snapshot = wal.load_snapshot()
+        if snapshot is not None:
+            self._load_state(snapshot[1])
+        replay = {
+            OP_PUT: self.put_at,
+            OP_PUT_TTL: self.put_at_with_ttl,
+            OP_DELETE: self.delete_at,
+            # Thins from its logged timestamp, so the same backups are kept as before
+            OP_BACKUP: self.backup_at,
+            OP_RESTORE: self.restore_at,
+            OP_ATTACH: self._replay_attach,
+            OP_RECLAIM: self._replay_reclaim,
+            OP_GC_WATERMARK: self.set_gc_watermark,
+        }
+        # Only the logged reclamations are replayed, not the sweeps the replay would trigger
+        expiry_budget, self._expiry_budget = self._expiry_budget, 0
+        try:
+            for _, op, args in wal.records():
+                replay[op](*args)
+        finally:
+            self._expiry_budget = expiry_budget
+    
+    def _replay_attach(self, path: str) -> None:
+        """Attach a logged snapshot file, warning instead of failing if it is gone."""
+        try:
+            self.attach_backup(path)
+        except (OSError, ValueError) as exc:
+            warnings.warn(f"Skipping attached backup {path}: {exc}", RuntimeWarning)
+    
+    # ============================================================================
+    # EXPIRATION
+    # ============================================================================
+    
+    def purge_expired(self, timestamp: int) -> int:
+        """
+        Reclaim every field that has nothing visible left at timestamp.
+        
+        Args:
+            timestamp: The timestamp to purge at
+            
+        Returns:
+            The number of fields reclaimed
+            
+        Behavior:
+            - Fields whose latest version expired or was deleted at or
+              before timestamp are removed along with their history
+            - Reads at timestamps before a reclaimed field's expiry no longer
+              see it
+        """
+        self._advance(timestamp)
+        return self._reclaim(timestamp, -1)
+    
+    def ttl_stats_at(self, timestamp: int, edges: Sequence[int] = TTL_BUCKETS) -> Dict[str, Any]:
+        """
+        Report the fields that expire, as seen at a specific timestamp.
+        
+        Args:
+            timestamp: The timestamp to measure at
+            edges: Ascending upper bounds of the remaining-TTL buckets
+            
+        Returns:
+            A dict with the number of expiring fields still "live" at
+            timestamp, the number already "expired" and awaiting
+            purge_expired, and a "histogram" of the live fields' remaining
+            TTL: len(edges) + 1 counts, count i covering (edges[i - 1],
+            edges[i]] and the last one everything past edges[-1]
+            
+        Behavior:
+            - Covers the fields loaded in the key table whose latest version
+              has a TTL or is a deletion, at timestamps from their latest
+              write on
+            - With expiry_index="columns" both counts are masks over one
+              column; the heap is compacted first, a pass in Python
+        """
+        self._expiry.compact(self._is_scheduled)
+        live = self._expiry.count_live(timestamp)
+        return {
+            "live": live,
+            "expired": len(self._expiry) - live,
+            "histogram": self._expiry.histogram(timestamp, edges),
+        }
+    
+    def _reclaim(self, horizon: int, limit: int) -> int:
+        """Reclaim up to limit fields whose horizon is <= horizon (negative: no limit)."""
+        # Stale entries may repeat a field; the dict keeps each once, in order
+        due = {}
+        for until, key, field in self._expiry.pop_due(horizon, limit):
+            chain = self._loaded_chain(key, field)
+            if chain is not None and self._until(chain) <= horizon:
+                due[key, field] = None
+        if due and self._wal is not None:
+            # Which fields a limited sweep reaches depends on reads too, so the fields are logged
+            self._wal.append_many([(OP_RECLAIM, (horizon, key, field)) for key, field in due])
+        for key, field in due:
+            self._drop_field(key, field)
+        return len(due)
+    
+    def _replay_reclaim(self, horizon: int, key: str, field: str) -> None:
+        """Reclaim a field as logged by _reclaim, copying its key out of the base if needed."""
+        page = self._writable_page(key, create=False)
+        chain = None if page is None else page.fields.get(field)
+        if chain is not None and self._until(chain) <= horizon:
+            self._drop_field(key, field)
+    
+    def _unschedule(self, key: str, field: str) -> None:
+        """Remove a field that no longer expires from an expiry index that tracks fields."""
+        self._expiry.discard(key, field)
+    
+    def _is_scheduled(self, until: int, key: str, field: str) -> bool:
+        """Return True if until is still the horizon of key/field."""
+        chain = self._loaded_chain(key, field)
+        return chain is not None and self._until(chain) == until
+    
+    # ============================================================================
+    # VERSION GARBAGE COLLECTION
+    # ============================================================================
+    
+    def set_gc_watermark(self, timestamp: int) -> None:
+        """
+        Promise that no read will ask for a timestamp below timestamp.
+        
+        Args:
+            timestamp: The earliest timestamp later reads may use
+            
+        Behavior:
+            - Starts a cycle of the version collector, which drops every
+              version superseded at or before the watermark, and fields
+              with nothing visible at it
+            - The collector examines gc_budget keys per operation; pages
+              shared with a retained backup are left alone, since the backup
+              holds those versions anyway
+            - Reads below the watermark may miss collected versions
+            - The watermark never moves back; lower values are ignored
+            - The watermark is logged and checkpointed, the collector's work
+              is not: it only drops what reads at or above the watermark
+              cannot see, so a recovered database collects it again
+        """
+        if self._gc_watermark is None or timestamp > self._gc_watermark:
+            self._log(OP_GC_WATERMARK, timestamp)
+            self._gc_watermark = timestamp
+            self._gc_requested = True
+    
+    def collect_garbage(self, budget: int = -1) -> bool:
+        """
+        Run the version collector.
+        
+        Args:
+            budget: Maximum number of keys to examine; negative finishes
+                    every cycle that is due
+            
+        Returns:
+            True once no collection is left to do for the current watermark
+        """
+        while not self._collect(budget):
+            if budget >= 0:
+                return False
+        return True
+    
+    def gc_stats(self) -> Dict[str, Any]:
+        """
+        Report what the version collector has reclaimed.
+        
+        Returns:
+            A dict with the current "watermark", whether a cycle is
+            "running", the "versions_reclaimed" and "bytes_freed" over all
+            cycles, and the last GC_HISTORY completed "cycles" as GcCycle
+            tuples, oldest first. Bytes are estimated with sys.getsizeof
+        """
+        return {
+            "watermark": self._gc_watermark,
+            "running": self._gc_requested or self._gc_kept is not None,
+            "versions_reclaimed": self._gc_totals[0],
+            "bytes_freed": self._gc_totals[1],
+            "cycles": list(self._gc_cycles),
+        }
+    
+    def _collect(self, budget: int) -> bool:
+        """Examine up to budget versioned keys (negative: no limit); True once no cycle is due."""
+        if self._gc_kept is None:
+            if not self._gc_requested:
+                return True
+            # A cycle drains _versioned into _gc_kept, which becomes the next cycle's set
+            self._gc_requested = False
+            self._gc_kept = set()
+            self._gc_counts = [0, 0, 0]
+        versioned, kept, counts = self._versioned, self._gc_kept, self._gc_counts
+        pinned = len(self._backups) > 0
+        while versioned and budget != 0:
+            key = versioned.pop()
+            budget -= 1
+            counts[0] += 1
+            page = self._pages.get(key)
+            if page is None:
+                continue
+            if page.epoch != self._epoch:
+                if pinned:
+                    kept.add(key)
+                    continue
+                page = self._writable_page(key, create=False)
+            if self._collect_page(page, key, counts):
+                kept.add(key)
+        if versioned:
+            return False
+        self._versioned = kept
+        self._gc_kept = None
+        cycle = GcCycle(self._gc_watermark, *counts)
+        self._gc_cycles = self._gc_cycles[-(GC_HISTORY - 1):] + [cycle]
+        self._gc_totals[0] += cycle.versions_reclaimed
+        self._gc_totals[1] += cycle.bytes_freed
+        return not self._gc_requested
+    
+    def _collect_page(self, page: _KeyPage, key: str, counts: List[int]) -> bool:
+        """Drop the versions of a writable page hidden at the watermark; True if history is left."""
+        watermark = self._gc_watermark
+        versioned = False
+        for field, chain in list(page.fields.items()):
+            if type(chain) is not list:
+                continue
+            i = _written_after(chain, watermark)
+            # The version visible at the watermark stays unless it shows nothing
+            keep_from = i - 1 if i and self._is_live(chain[i - 1], watermark) else i
+            if keep_from == 0:
+                versioned = True
+                continue
+            dropped = chain[:keep_from]
+            counts[1] += len(dropped)
+            values = [version[1] for version in dropped if version[1] is not None]
+            counts[2] += sum(map(getsizeof, dropped)) + sum(map(getsizeof, values))
+            if keep_from == len(chain):
+                counts[2] += getsizeof(chain)
+                self._drop_field(key, field)
+            elif keep_from == len(chain) - 1:
+                counts[2] += getsizeof(chain)
+                page.fields[field] = chain[-1]
+            else:
+                del chain[:keep_from]
+                versioned = True
+        return versioned
+    
+    # ============================================================================
+    # INTERNAL HELPERS
+    # ============================================================================
+    
+    def _advance(self, timestamp: int) -> None:
+        """Move the logical clock forward to timestamp and do a step of background work."""
+        if timestamp > self._clock:
+            self._clock = timestamp
+        self._step_background()
+    
+    def _background_due(self) -> bool:
+        """Return True if _step_background has anything to do."""
+        return bool((self._expiry_budget and self._expiry.next_due() <= self._clock)
+                    or self._fold is not None
+                    or (self._base is not None and self._restore_budget)
+                    or (self._gc_budget and (self._gc_requested or self._gc_kept is not None)))
+    
+    def _step_background(self) -> None:
+        """Reclaim expired fields, fold backups, copy out a restore and collect versions."""
+        if self._expiry_budget and self._expiry.next_due() <= self._clock:
+            self._reclaim(self._clock, self._expiry_budget)
+        if self._fold is not None and self._fold.step(self._compaction_budget):
+            self._fold = None
+        if self._base is not None and self._restore_budget:
+            self.materialize_restore(self._restore_budget)
+        if self._gc_budget and (self._gc_requested or self._gc_kept is not None):
+            self._collect(self._gc_budget)
+    
+    @staticmethod
+    def _version_at(chain: Chain, timestamp: int) -> Optional[Version]:
+        """Return the latest version written at or before timestamp, if any."""
+        if type(chain) is tuple:
+            return chain if chain[0] <= timestamp else None
+        i = _written_after(chain, timestamp)
+        return chain[i - 1] if i else None
+    
+    @staticmethod
+    def _is_live(version: Version, timestamp: int) -> bool:
+        """Return True if version holds a value that has not expired at timestamp."""
+        return version[1] is not None and (len(version) == 2 or timestamp < version[2])
+    
+    def _visible(self, chain: Chain, timestamp: int) -> Optional[str]:
+        """Return the value of a field as seen at timestamp, or None."""
+        version = self._version_at(chain, timestamp)
+        if version is None or not self._is_live(version, timestamp):
+            return None
+        return version[1]
+    
+    def _write(self, timestamp: int, key: str, field: str,
+               value: Optional[str], expires_at: Optional[int]) -> None:
+        """
+        Record a version of a field, keeping its chain ordered by timestamp.
+        
+        A value of None records a deletion. A field whose history is reduced to
+        deletions is dropped together with its index entry.
+        """
+        page = self._writable_page(key, create=value is not None)
+        if page is not None:
+            self._write_page(page, timestamp, key, field, value, expires_at)
+    
+    def _write_page(self, page: _KeyPage, timestamp: int, key: str, field: str,
+                    value: Optional[str], expires_at: Optional[int]) -> None:
+        """Record a version of a field in page, which must be writable."""
+        fields = page.fields
+        chain = fields.get(field)
+        version = _version(timestamp, value, expires_at)
+        old_until = FOREVER if chain is None else self._until(chain)
+        if chain is None:
+            if value is None:
+                return
+            # Field names repeat across keys; store one copy of each
+            field = intern(field)
+            chain = fields[field] = version
+            page.index.add(field)
+        elif type(chain) is tuple:
+            if chain[0] == timestamp:
+                chain = fields[field] = version
+            elif chain[0] < timestamp:
+                chain = fields[field] = [chain, version]
+                self._versioned.add(key)
+            else:
+                chain = fields[field] = [version, chain]
+                self._versioned.add(key)
+        else:
+            i = _written_after(chain, timestamp)
+            if i > 0 and chain[i - 1][0] == timestamp:
+                chain[i - 1] = version
+            else:
+                chain.insert(i, version)
+        
+        if timestamp > page.fast_from:
+            page.fast_from = timestamp
+        until = self._until(chain)
+        self._note_expiry(page, field, old_until, until)
+        if value is None and all(version[1] is None for version in _versions(chain)):
+            self._drop_field(key, field)
+            return
+        if until == FOREVER and old_until != FOREVER and self._expiry.tracks_fields:
+            self._unschedule(key, field)
+        self._schedule(page, key, field, chain)
+    
+    def _schedule(self, page: _KeyPage, key: str, field: str, chain: Chain) -> None:
+        """Register the horizon of a field with the expiry queue and the index."""
+        until = self._until(chain)
+        if until != FOREVER:
+            self._expiry.push(until, intern(key), intern(field))
+            if self._expiry.needs_compaction():
+                self._expiry.compact(self._is_scheduled)
+        if page.index.tracks_expiry:
+            page.index.set_until(field, until)
+    
+    def _schedule_many(self, entries: List[Tuple[int, str, str]]) -> None:
+        """Register the finite (until, key, field) horizons of several new fields at once."""
+        if entries:
+            self._expiry.push_many(entries)
+            if self._expiry.needs_compaction():
+                self._expiry.compact(self._is_scheduled)
+    
+    @staticmethod
+    def _note_expiry(page: _KeyPage, field: str, old_until: float, until: float) -> None:
+        """Update the expiry summary of page after the horizon of field changed."""
+        if old_until != FOREVER:
+            page.ttl_fields -= 1
+            if page.dead is not None and field in page.dead:
+                page.dead = page.dead - {field}
+        if until != FOREVER:
+            page.ttl_fields += 1
+            if until < page.fast_until:
+                page.fast_until = until
+        elif not page.ttl_fields:
+            page.fast_until = FOREVER
+            page.dead = None
+    
+    def _repair(self, page: _KeyPage, timestamp: int) -> None:
+        """
+        Recompute the expiry summary of page for reads from timestamp on.
+        
+        Fields that show nothing from timestamp on are recorded as dead, so
+        later reads skip them instead of checking every field.
+        """
+        ttl_fields = 0
+        fast_from = -FOREVER
+        fast_until = FOREVER
+        dead = []
+        for field, chain in page.fields.items():
+            latest = (chain if type(chain) is tuple else chain[-1])[0]
+            if latest > fast_from:
+                fast_from = latest
+            until = self._until(chain)
+            if until == FOREVER:
+                continue
+            ttl_fields += 1
+            if until <= timestamp:
+                dead.append(field)
+                if until > fast_from:
+                    fast_from = until
+            elif until < fast_until:
+                fast_until = until
+        page.ttl_fields = ttl_fields
+        page.fast_from = fast_from
+        page.fast_until = fast_until
+        page.dead = frozenset(dead) if dead else None
+    
+    def _drop_field(self, key: str, field: str) -> None:
+        """Remove a field and its history, dropping the key once it has no fields."""
+        page = self._writable_page(key, create=False)
+        until = self._until(page.fields.pop(field))
+        self._note_expiry(page, field, until, FOREVER)
+        if until != FOREVER and self._expiry.tracks_fields:
+            self._unschedule(key, field)
+        page.index.discard(field)
+        # Under a restored base, the empty page stays to hide the base's copy
+        if not page.fields and self._base is None:
+            self._remove_page(key)
+            if self._keys is not None:
+                self._remove_key(key)
+    
+    # ============================================================================
+    # PAGES AND SNAPSHOTS
+    # ============================================================================
+    
+    def _read(self, timestamp: int, key: str, field: str) -> Optional[str]:
+        """Return the value of key/field visible at timestamp, reading through the base."""
+        page = self._pages.get(key)
+        if page is not None:
+            chain = page.fields.get(field)
+            return None if chain is None else self._visible(chain, timestamp)
+        source = self._base_source(key, self._base)
+        if source is None:
+            return None
+        page, layers = source
+        chain = page.fields.get(field)
+        if chain is None:
+            return None
+        entry = self._layered_entry(chain, layers, timestamp)
+        return None if entry is None else entry[0]
+    
+    def _scan(self, timestamp: int, key: str, prefix: str) -> list:
+        """Return the scan results of key for fields starting with prefix at timestamp."""
+        if self._scan_cache is None:
+            return self._results(self._scan_fields(timestamp, key, prefix))
+        stamp = self._stamps.get(key, 0)
+        results = self._cache_get((key, prefix), stamp, timestamp)
+        if results is None:
+            entries, valid_until = self._scan_window(timestamp, key, prefix)
+            results = self._results(entries)
+            self._cache_put((key, prefix), stamp, timestamp, valid_until, results)
+        # Callers own the list they get back, so the cached one is never handed out
+        return list(results)
+    
+    def _scan_window(self, timestamp: int, key: str, prefix: str
+                     ) -> Tuple[List[Tuple[str, str, Optional[int]]], float]:
+        """
+        Return _scan_fields(timestamp, key, prefix) and the time it stays valid until.
+        
+        Without writes, the results hold from timestamp until the first of
+        their expiries, or of the versions in the scanned fields written
+        after timestamp.
+        """
+        source = self._scan_source(timestamp, key)
+        if source is None:
+            return [], FOREVER
+        page, layers, horizon = source
+        fields = page.index.iter_prefix(prefix, horizon)
+        if layers is not None:
+            entries = self._live_entries(timestamp, page, layers, fields, -1)
+            restored_at = layers[0][1]
+            valid_until = restored_at if timestamp < restored_at else FOREVER
+            for _, _, expires_at in entries:
+                if expires_at is not None and expires_at < valid_until:
+                    valid_until = expires_at
+            return entries, valid_until
+        chains = page.fields
+        entries = []
+        valid_until = FOREVER
+        for field in fields:
+            chain = chains[field]
+            if type(chain) is list:
+                i = _written_after(chain, timestamp)
+                if i < len(chain) and chain[i][0] < valid_until:
+                    valid_until = chain[i][0]
+                if i == 0:
+                    continue
+                version = chain[i - 1]
+            else:
+                version = chain
+                if version[0] > timestamp:
+                    if version[0] < valid_until:
+                        valid_until = version[0]
+                    continue
+            expires_at = _expires_at(version)
+            if expires_at is not None:
+                if expires_at <= timestamp:
+                    continue
+                if expires_at < valid_until:
+                    valid_until = expires_at
+            if version[1] is not None:
+                entries.append((field, version[1], expires_at))
+        return entries, valid_until
+    
+    def _results(self, entries: List[Tuple[str, str, Optional[int]]]) -> list:
+        """Convert (field, value, expires_at) triples to the configured scan results."""
+        if self._scan_results == "string":
+            return [f"{field}({value})" for field, value, _ in entries]
+        if self._scan_results == "entry":
+            return list(map(ScanEntry._make, entries))
+        return entries
+    
+    def _scan_fields(self, timestamp: int, key: str, prefix: str, after: Optional[str] = None,
+                     limit: int = -1) -> List[Tuple[str, str, Optional[int]]]:
+        """
+        Return (field, value, expires_at) for the fields of key visible at timestamp.
+        
+        Only fields starting with prefix and sorting after `after` are
+        returned, in order and at most limit of them (negative: no limit).
+        """
+        source = self._scan_source(timestamp, key)
+        if source is None:
+            return []
+        page, layers, horizon = source
+        fields = page.index.iter_prefix(prefix, horizon, after)
+        return self._live_entries(timestamp, page, layers, fields, limit)
+    
+    def _range_fields(self, timestamp: int, key: str, start: Optional[str], end: Optional[str],
+                      limit: int, reverse: bool) -> List[Tuple[str, str, Optional[int]]]:
+        """Return (field, value, expires_at) for the visible fields of key in [start, end)."""
+        source = self._scan_source(timestamp, key)
+        if source is None:
+            return []
+        page, layers, horizon = source
+        fields = page.index.iter_range(start, end, horizon, reverse)
+        return self._live_entries(timestamp, page, layers, fields, limit)
+    
+    def _scan_source(self, timestamp: int, key: str
+                     ) -> Optional[Tuple[_KeyPage, Optional[List[Tuple[int, int]]], Optional[int]]]:
+        """
+        Find the page a scan of key reads, or None if the key does not exist.
+        
+        Returns the page, the base layers it is read through (None for a
+        loaded page) and the timestamp its index may prune expired fields at.
+        """
+        page = self._pages.get(key)
+        if page is not None:
+            return page, None, timestamp
+        source = self._base_source(key, self._base)
+        if source is None:
+            return None
+        # Index horizons are in the backup's time frame, so nothing is pruned
+        return source[0], source[1], None
+    
+    def _live_entries(self, timestamp: int, page: _KeyPage,
+                      layers: Optional[List[Tuple[int, int]]], fields: Iterator[str],
+                      limit: int) -> List[Tuple[str, str, Optional[int]]]:
+        """Return (field, value, expires_at) for up to limit of fields visible at timestamp."""
+        chains = page.fields
+        result = []
+        if layers is None and page.fast_from <= timestamp:
+            if timestamp >= page.fast_until:
+                self._repair(page, timestamp)
+            # Every field shows its latest version, and all but the dead are live
+            dead = page.dead
+            for field in fields:
+                if dead is not None and field in dead:
+                    continue
+                chain = chains[field]
+                version = chain if type(chain) is tuple else chain[-1]
+                result.append((field, version[1], version[2] if len(version) == 3 else None))
+                if len(result) == limit:
+                    break
+            return result
+        for field in fields:
+            if layers is None:
+                version = self._version_at(chains[field], timestamp)
+                if version is None or not self._is_live(version, timestamp):
+                    continue
+                result.append((field, version[1], _expires_at(version)))
+            else:
+                entry = self._layered_entry(chains[field], layers, timestamp)
+                if entry is None:
+                    continue
+                result.append((field, entry[0], entry[1]))
+            if len(result) == limit:
+                break
+        return result
+    
+    def _loaded_chain(self, key: str, field: str) -> Optional[Chain]:
+        """Return the version chain of key/field without reading through the base."""
+        page = self._pages.get(key)
+        return None if page is None else page.fields.get(field)
+    
+    @staticmethod
+    def _base_source(key: str, base: Optional[Tuple[_Snapshot, int]]
+                     ) -> Optional[Tuple[_KeyPage, List[Tuple[int, int]]]]:
+        """
+        Find key in a restored backup and the base layers beneath it.
+        
+        Returns the page holding it and the (backup timestamp, restored at)
+        pairs of the restores between that page and the top layer, newest
+        first, or None if no layer has the key.
+        """
+        layers = []
+        while base is not None:
+            snapshot, restored_at = base
+            layers.append((snapshot.timestamp, restored_at))
+            page = snapshot.lookup(key)
+            if page is not None:
+                return page, layers
+            base = snapshot.base
+        return None
+    
+    def _restored_entry(self, chain: Chain,
+                        layers: List[Tuple[int, int]]) -> Optional[Tuple[str, Optional[int]]]:
+        """
+        Return the (value, expires_at) a field has after the restores in layers.
+        
+        Each restore rewrites the fields visible at its backup's timestamp at
+        restored_at, with their remaining TTL counted from restored_at.
+        """
+        written_at = None
+        value = expires_at = None
+        for backup_ts, restored_at in reversed(layers):
+            if written_at is None:
+                version = self._version_at(chain, backup_ts)
+                if version is None or not self._is_live(version, backup_ts):
+                    return None
+                value, expires_at = version[1], _expires_at(version)
+            elif backup_ts < written_at or (expires_at is not None and backup_ts >= expires_at):
+                return None
+            if expires_at is not None:
+                expires_at = restored_at + expires_at - backup_ts
+            written_at = restored_at
+        return value, expires_at
+    
+    def _layered_entry(self, chain: Chain, layers: List[Tuple[int, int]],
+                       timestamp: int) -> Optional[Tuple[str, Optional[int]]]:
+        """Return the (value, expires_at) of a base field visible at timestamp, or None."""
+        entry = self._restored_entry(chain, layers)
+        if entry is None or timestamp < layers[0][1]:
+            return None
+        expires_at = entry[1]
+        if expires_at is not None and timestamp >= expires_at:
+            return None
+        return entry
+    
+    def _restored_page(self, source: _KeyPage, layers: List[Tuple[int, int]],
+                       epoch: int) -> _KeyPage:
+        """Build the page a key from the base layers has in the live database."""
+        page = _KeyPage(self._index_type(), epoch)
+        restored_at = layers[0][1]
+        for field in source.index:
+            entry = self._restored_entry(source.fields[field], layers)
+            if entry is not None:
+                value, expires_at = entry
+                page.fields[field] = _version(restored_at, value, expires_at)
+                page.index.add(field)
+        self._repair(page, restored_at)
+        return page
+    
+    def _install(self, key: str, page: _KeyPage) -> None:
+        """Put a page copied out of the base into the key table."""
+        self._set_page(key, page)
+        for field, chain in page.fields.items():
+            self._schedule(page, key, field, chain)
+    
+    def _base_depth(self) -> int:
+        """Return the number of base layers reads of a missing key walk through."""
+        depth = 0
+        base = self._base
+        while base is not None:
+            depth += 1
+            base = base[0].base
+        return depth
+    
+    def _reachable_files(self) -> Iterator[_MappedBackup]:
+        """Yield the attached backups the backups or the restored base still read through."""
+        seen = set()
+        stack = list(self._backups.values())
+        if self._base is not None:
+            stack.append(self._base[0])
+        while stack:
+            snapshot = stack.pop()
+            if snapshot is None or id(snapshot) in seen:
+                continue
+            seen.add(id(snapshot))
+            if type(snapshot) is _MappedBackup:
+                yield snapshot
+            else:
+                stack.append(snapshot.parent)
+                if snapshot.base is not None:
+                    stack.append(snapshot.base[0])
+    
+    def _close_unused_files(self) -> None:
+        """Close the snapshot files of attached backups nothing reads through any more."""
+        if not self._attached:
+            return
+        reachable = {id(backup) for backup in self._reachable_files()}
+        for backup in self._attached:
+            if id(backup) not in reachable:
+                backup.file.close()
+        self._attached = [backup for backup in self._attached if id(backup) in reachable]
+    
+    @staticmethod
+    def _base_keys(base: Optional[Tuple[_Snapshot, int]]) -> Iterator[str]:
+        """Yield every key of a restored backup and its base layers, possibly more than once."""
+        # Collect the tables first: the compactor may fold these backups meanwhile
+        tables = []
+        while base is not None:
+            snapshot = base[0]
+            base = snapshot.base
+            while snapshot is not None:
+                tables.append(snapshot.pages)
+                snapshot = snapshot.parent
+        for table in tables:
+            yield from table
+    
+    def _writable_pages(self) -> KeyTable:
+        """Return the key table, switching to a copy sharing its chunks if a backup holds it."""
+        if self._pages_epoch != self._epoch:
+            self._pages = self._pages.copy()
+            self._pages_epoch = self._epoch
+        return self._pages
+    
+    def _writable_page(self, key: str, create: bool) -> Optional[_KeyPage]:
+        """Return a page of key that may be modified, copying a shared one."""
+        if self._dirty is not None:
+            self._dirty.add(key)
+        if self._scan_cache is not None:
+            self._stamps[key] = next(self._write_stamps)
+        page = self._pages.get(key)
+        if page is None and self._base is not None:
+            source = self._base_source(key, self._base)
+            if source is not None:
+                page = self._restored_page(*source, self._epoch)
+                self._install(key, page)
+        if page is None:
+            if not create:
+                return None
+            page = _KeyPage(self._index_type(), self._epoch)
+            key = intern(key)
+            self._set_page(key, page)
+            if self._keys is not None:
+                self._add_key(key)
+        elif page.epoch != self._epoch:
+            page = page.copy(self._epoch)
+            self._set_page(key, page)
+        return page
+    
+    def _set_page(self, key: str, page: _KeyPage) -> None:
+        """Put a page into the key table, copying its chunk first if a backup shares it."""
+        self._writable_pages()[key] = page
+    
+    def _remove_page(self, key: str) -> None:
+        """Take a key out of the key table."""
+        del self._writable_pages()[key]
+    
+    @staticmethod
+    def _until(chain: Chain) -> float:
+        """Return the time from which no version of a field is visible any more."""
+        version = chain if type(chain) is tuple else chain[-1]
+        if version[1] is None:
+            return version[0]
+        if len(version) == 2:
+            return FOREVER
+        return max(version[0], version[2])
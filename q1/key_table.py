@@ -0,0 +1,126 @@
+"""
+Key Table
+
+A mapping from keys to pages that a backup shares with the live database.
+Keys are spread by hash over a fixed directory of CHUNKS dict chunks, and
+copy() is constant time: both tables keep the same directory and chunks,
+and neither owns them any more. The first write either table makes after
+that copies the directory, and the first write to each chunk copies that
+chunk, so a write after a backup copies about 1/CHUNKS of the keys instead
+of the whole table.
+
+Chunks never split or rehash. A chunk made after the pages it holds would
+have the garbage collector walk those pages in hash order from then on,
+scattered over memory, so a table starts with every slot on one shared
+empty chunk and makes each chunk on the first write to it.
+
+Example usage:
+    table = KeyTable()
+    table["user1"] = page
+    backup = table.copy()      # Shares every chunk
+    table["user2"] = other     # Copies the directory and user2's chunk
+    "user2" in backup          # False
+"""
+
+from collections.abc import MutableMapping
+from typing import Any, Iterator, List, Tuple
+
+# A power of two: a key's chunk is picked by the low bits of its hash
+CHUNKS = 1024
+
+
+class _Chunk(dict):
+    """The keys whose hashes fall in one directory slot, with their values."""
+
+    __slots__ = ("owner",)
+
+
+def _chunk(items: Any, owner: object) -> _Chunk:
+    chunk = _Chunk(items)
+    chunk.owner = owner
+    return chunk
+
+
+# Shared by every table until its first write to a slot; owned by none
+_EMPTY = _chunk((), None)
+
+
+class KeyTable(MutableMapping):
+    """
+    A dict-like mapping whose copy() shares structure with the original.
+
+    Reads never copy anything. Writes copy the directory and the chunk they
+    touch when the table does not own them, so a table and its copies never
+    see each other's writes. Only one thread may write at a time; reads may
+    run alongside.
+    """
+
+    __slots__ = ("_directory", "_size", "_owner", "_owns_directory")
+
+    def __init__(self, items: Any = ()):
+        """Initialize a table, optionally filled from a mapping or (key, value) pairs."""
+        self._owner = object()
+        self._directory: List[_Chunk] = [_EMPTY] * CHUNKS
+        self._owns_directory = True
+        self._size = 0
+        self.update(items)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._directory:
+            yield from chunk
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._directory[hash(key) & (CHUNKS - 1)]
+
+    def __getitem__(self, key: str) -> Any:
+        return self._directory[hash(key) & (CHUNKS - 1)][key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value of key, or default if it is absent."""
+        return self._directory[hash(key) & (CHUNKS - 1)].get(key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        slot = hash(key) & (CHUNKS - 1)
+        chunk = self._directory[slot]
+        if chunk.owner is not self._owner or not self._owns_directory:
+            chunk = self._writable_chunk(slot)
+        if key not in chunk:
+            self._size += 1
+        chunk[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        slot = hash(key) & (CHUNKS - 1)
+        if key not in self._directory[slot]:
+            raise KeyError(key)
+        del self._writable_chunk(slot)[key]
+        self._size -= 1
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Yield the (key, value) pairs, chunk by chunk."""
+        for chunk in self._directory:
+            yield from chunk.items()
+
+    def copy(self) -> "KeyTable":
+        """Return a table with the same contents, sharing every chunk with this one."""
+        table = KeyTable.__new__(KeyTable)
+        table._directory = self._directory
+        table._size = self._size
+        table._owner = object()
+        table._owns_directory = False
+        # What this table owned until now is shared from here on
+        self._owner = object()
+        self._owns_directory = False
+        return table
+
+    def _writable_chunk(self, slot: int) -> _Chunk:
+        """Return the chunk in slot, copying it and the directory first if shared."""
+        if not self._owns_directory:
+            self._directory = list(self._directory)
+            self._owns_directory = True
+        chunk = self._directory[slot]
+        if chunk.owner is not self._owner:
+            chunk = self._directory[slot] = _chunk(chunk, self._owner)
+        return chunk
@@ -0,0 +1,107 @@
+"""
+Wire Protocol
+
+The framing spoken by `server.py` and its clients. Every message is a frame:
+a 4-byte big-endian payload length followed by the payload, a compact UTF-8
+JSON array.
+
+    request  [command, arg, ...]          e.g. ["put_at", 100, "user1", "name", "Alice"]
+    reply    [true, result]               e.g. [true, "Alice"]
+             [false, error type, message] e.g. [false, "ValueError", "limit must be positive: 0"]
+
+Commands are InMemoryDB method names (see COMMANDS) plus "ping". Tuples
+travel as arrays, so batch items are [key, field, value] arrays. Replies come
+back in request order, which lets a client send many requests before
+reading any replies (pipelining).
+
+Example usage:
+    frame = encode(["get", "user1", "name"])
+    decoder = FrameDecoder()
+    payloads = decoder.feed(frame[:3]) + decoder.feed(frame[3:])
+    decode(payloads[0])  # ["get", "user1", "name"]
+"""
+
+import json
+import struct
+from typing import Any, List, Optional
+
+DEFAULT_PORT = 7379
+# Frames longer than this are refused and the connection is closed
+MAX_FRAME = 64 << 20
+
+COMMANDS = frozenset({
+    "ping",
+    "get", "put", "delete", "scan", "scan_with_prefix",
+    "get_at", "put_at", "delete_at", "scan_at", "scan_with_prefix_at", "put_at_with_ttl",
+    "backup_at", "restore_at", "materialize_restore", "list_backups", "compact_backups",
+    "purge_expired", "ttl_stats_at", "checkpoint", "set_gc_watermark", "collect_garbage", "gc_stats",
+    "scan_cache_stats",
+    "put_many", "get_many", "delete_many", "scan_many",
+    "put_many_at", "get_many_at", "delete_many_at", "scan_many_at",
+    "scan_page", "scan_page_at",
+    "scan_range", "scan_range_at",
+    "scan_keys", "scan_keys_range", "scan_keys_at", "scan_keys_range_at",
+})
+
+_LENGTH = struct.Struct("!I")
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_decode = json.JSONDecoder().decode
+
+
+class ProtocolError(Exception):
+    """A peer sent something that is not a valid frame or message."""
+
+
+def encode(message: Any) -> bytes:
+    """Encode a request or reply as a frame."""
+    payload = _encoder.encode(message).encode()
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def decode(payload: bytes) -> Any:
+    """
+    Decode the payload of a frame.
+
+    Raises:
+        ProtocolError: If the payload is not UTF-8 JSON
+    """
+    try:
+        return _decode(payload.decode())
+    except ValueError as exc:
+        raise ProtocolError(f"Malformed payload: {exc}") from None
+
+
+class FrameDecoder:
+    """Splits a byte stream into frame payloads, however it is chunked."""
+
+    def __init__(self, max_frame: int = MAX_FRAME):
+        self._buffer = bytearray()
+        self._max_frame = max_frame
+        # Set once a frame over max_frame arrives; the stream cannot be resynchronized
+        self.error: Optional[ProtocolError] = None
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Add received bytes and return the payloads of the frames they complete.
+
+        Stops at a frame longer than max_frame and sets error; every later
+        call returns nothing.
+        """
+        if self.error is not None:
+            return []
+        buffer = self._buffer
+        buffer += data
+        payloads = []
+        offset = 0
+        while len(buffer) - offset >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(buffer, offset)
+            if length > self._max_frame:
+                self.error = ProtocolError(f"Frame of {length} bytes exceeds {self._max_frame}")
+                break
+            end = offset + _LENGTH.size + length
+            if end > len(buffer):
+                break
+            payloads.append(bytes(buffer[offset + _LENGTH.size:end]))
+            offset = end
+        del buffer[:offset]
+        return payloads
@@ -0,0 +1,282 @@
+"""
+Radix Tree Field Index
+
+A compressed radix tree (Patricia trie) over the field names of one key.
+Shared prefixes such as "session:web:eu-west:" are stored once on the edges,
+and a prefix query walks only the subtree below the prefix.
+
+Each node also records the time after which nothing in its subtree can be
+visible, so timestamped scans can skip subtrees whose fields have all expired
+or been deleted.
+
+Example usage:
+    index = RadixFieldIndex()
+    index.add("session:web:1")
+    index.add("session:web:2")
+    index.set_until("session:web:1", 150)  # Expires at 150
+    list(index.iter_prefix("session:"))       # ["session:web:1", "session:web:2"]
+    list(index.iter_prefix("session:", 160))  # ["session:web:2"]
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+FOREVER = float("inf")
+
+
+class _Node:
+    """A radix tree node; label is the edge string leading to it from its parent."""
+
+    __slots__ = ("label", "children", "is_field", "own_until", "until")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.children: Dict[str, "_Node"] = {}
+        self.is_field = False
+        # Visibility horizon of the field ending here, and of the whole subtree
+        self.own_until = -FOREVER
+        self.until = -FOREVER
+
+    def clone(self) -> "_Node":
+        """Return a deep copy of the subtree rooted at this node."""
+        node = _Node(self.label)
+        node.children = {first: child.clone() for first, child in self.children.items()}
+        node.is_field = self.is_field
+        node.own_until = self.own_until
+        node.until = self.until
+        return node
+
+    def refresh(self) -> None:
+        """Recompute the subtree horizon from this node and its children."""
+        until = self.own_until if self.is_field else -FOREVER
+        for child in self.children.values():
+            if child.until > until:
+                until = child.until
+        self.until = until
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _build(label: str, fields: Sequence[str], untils: Sequence[float],
+           lo: int, hi: int, depth: int) -> _Node:
+    """Build the subtree of fields[lo:hi], which share their first depth characters."""
+    node = _Node(label)
+    if len(fields[lo]) == depth:
+        node.is_field = True
+        node.own_until = untils[lo]
+        lo += 1
+    while lo < hi:
+        first = fields[lo][depth]
+        end = lo + 1
+        while end < hi and fields[end][depth] == first:
+            end += 1
+        # Sorted names: the first and last of a group share what they all share
+        common = _common_prefix_length(fields[lo], fields[end - 1])
+        node.children[first] = _build(fields[lo][depth:common], fields, untils, lo, end, common)
+        lo = end
+    node.refresh()
+    return node
+
+
+class RadixFieldIndex:
+    """
+    Field names of a single key stored in a compressed radix tree.
+
+    Supports the same operations as SortedFieldIndex, plus a per-field
+    visibility horizon (set_until) that lets iter_prefix prune subtrees
+    that hold nothing visible at the requested timestamp.
+    """
+
+    tracks_expiry = True
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._root = _Node("")
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_prefix("")
+
+    def __contains__(self, field: str) -> bool:
+        return self._find_path(field) is not None
+
+    def copy(self) -> "RadixFieldIndex":
+        """Return an independent copy of the index."""
+        clone = RadixFieldIndex()
+        clone._root = self._root.clone()
+        clone._size = self._size
+        return clone
+
+    @classmethod
+    def from_sorted(cls, fields: Sequence[str],
+                    untils: Optional[Sequence[float]] = None) -> "RadixFieldIndex":
+        """
+        Build an index over distinct field names given in sorted order.
+
+        The tree is built top down in one pass instead of splitting edges
+        field by field. untils gives the horizon of each field, as set_until
+        would; it defaults to FOREVER for every field.
+        """
+        index = cls()
+        if fields:
+            if untils is None:
+                untils = [FOREVER] * len(fields)
+            index._root = _build("", fields, untils, 0, len(fields), 0)
+            index._size = len(fields)
+        return index
+
+    def add(self, field: str) -> None:
+        """Insert a field name, ignoring names that are already indexed."""
+        node = self._root
+        rest = field
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                child = node.children[rest[0]] = _Node(rest)
+                node = child
+                break
+            common = _common_prefix_length(child.label, rest)
+            if common < len(child.label):
+                # Split the edge so that the shared part becomes its own node
+                middle = _Node(child.label[:common])
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                middle.until = child.until
+                node.children[rest[0]] = middle
+                child = middle
+            node = child
+            rest = rest[common:]
+        if not node.is_field:
+            node.is_field = True
+            self._size += 1
+
+    def discard(self, field: str) -> None:
+        """Remove a field name if it is indexed, merging nodes left with one child."""
+        path = self._find_path(field)
+        if path is None:
+            return
+        node = path[-1]
+        node.is_field = False
+        node.own_until = -FOREVER
+        self._size -= 1
+
+        for depth in range(len(path) - 1, 0, -1):
+            node, parent = path[depth], path[depth - 1]
+            if not node.is_field and not node.children:
+                del parent.children[node.label[0]]
+            elif not node.is_field and len(node.children) == 1:
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[child.label[0]] = child
+            else:
+                node.refresh()
+        self._root.refresh()
+
+    def set_until(self, field: str, until: float) -> None:
+        """
+        Record the visibility horizon of an indexed field.
+
+        The field is treated as invisible at any timestamp >= until.
+        Use FOREVER for fields that never stop being visible.
+        """
+        path = self._find_path(field)
+        if path is None:
+            return
+        path[-1].own_until = until
+        for node in reversed(path):
+            node.refresh()
+
+    def iter_prefix(self, prefix: str, timestamp: Optional[int] = None,
+                    after: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield the indexed field names starting with prefix, in lexicographic order.
+
+        When timestamp is given, subtrees whose horizon is <= timestamp are skipped.
+        When after is given, only names sorting after it are yielded, and
+        subtrees that sort entirely before it are skipped.
+        """
+        node = self._root
+        rest = prefix
+        name = ""
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                return
+            label = child.label
+            if rest.startswith(label):
+                rest = rest[len(label):]
+            elif label.startswith(rest):
+                rest = ""
+            else:
+                return
+            name += label
+            node = child
+
+        stack: List[Tuple[_Node, str]] = [(node, name)]
+        while stack:
+            node, name = stack.pop()
+            if timestamp is not None and node.until <= timestamp:
+                continue
+            if after is not None:
+                if name < after[:len(name)]:
+                    continue
+                if node.is_field and name > after:
+                    yield name
+            elif node.is_field:
+                yield name
+            for first in sorted(node.children, reverse=True):
+                child = node.children[first]
+                stack.append((child, name + child.label))
+
+    def iter_range(self, start: Optional[str] = None, end: Optional[str] = None,
+                   timestamp: Optional[int] = None, reverse: bool = False) -> Iterator[str]:
+        """
+        Yield the indexed field names in [start, end), in order or reversed.
+
+        A bound of None leaves that side open. Subtrees that sort entirely
+        outside the range, or whose horizon is <= timestamp, are skipped.
+        """
+        # A None node marks a name to yield once its subtree has been walked
+        stack: List[Tuple[Optional[_Node], str]] = [(self._root, "")]
+        while stack:
+            node, name = stack.pop()
+            if node is None:
+                yield name
+                continue
+            if timestamp is not None and node.until <= timestamp:
+                continue
+            # Every name below the node starts with name, so sorts at or after it
+            if start is not None and name < start[:len(name)]:
+                continue
+            if end is not None and name >= end:
+                continue
+            if node.is_field and (start is None or name >= start):
+                if reverse:
+                    stack.append((None, name))
+                else:
+                    yield name
+            for first in sorted(node.children, reverse=not reverse):
+                child = node.children[first]
+                stack.append((child, name + child.label))
+
+    def _find_path(self, field: str) -> Optional[List[_Node]]:
+        """Return the nodes from the root to the node of an indexed field."""
+        node = self._root
+        path = [node]
+        rest = field
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None or not rest.startswith(child.label):
+                return None
+            rest = rest[len(child.label):]
+            node = child
+            path.append(node)
+        return path if node.is_field else None
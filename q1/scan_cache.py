@@ -0,0 +1,85 @@
+"""
+Scan Result Cache
+
+A size-bounded LRU cache of scan results, used by InMemoryDB to answer
+repeated scans of unchanged keys without walking their fields again.
+
+Entries are never invalidated by writes directly. Each one records the
+write stamp its key had when the results were computed, and the window of
+timestamps [computed_at, valid_until) over which they cannot change on their
+own: valid_until is the earliest expiry among the results, or the earliest
+version written after computed_at. A lookup is a hit only if the key still
+has the same stamp and the scan's timestamp falls in the window; anything
+else is a miss, and the stale entry is replaced by the next put.
+
+Example usage:
+    cache = ScanCache(max_size=1000)
+    cache.put(("user1", "a"), 7, 100, 150, ["age(25)"])
+    cache.get(("user1", "a"), 7, 120)  # ["age(25)"]
+    cache.get(("user1", "a"), 7, 160)  # None: an entry expired at 150
+    cache.get(("user1", "a"), 8, 120)  # None: the key was written since
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# (stamp, computed_at, valid_until, results)
+Entry = Tuple[int, int, float, List[Any]]
+
+
+class ScanCache:
+    """LRU map from a scan's (key, prefix) to its results, bounded by total result count."""
+
+    def __init__(self, max_size: int):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size: Maximum number of results held over all entries; an
+                empty result counts as one, and larger results are not cached
+        """
+        self._entries: "OrderedDict[Hashable, Entry]" = OrderedDict()
+        self._max_size = max_size
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, scan: Hashable, stamp: int, timestamp: int) -> Optional[List[Any]]:
+        """Return the cached results of scan if still valid at stamp and timestamp, else None."""
+        entry = self._entries.get(scan)
+        if entry is None or entry[0] != stamp or not entry[1] <= timestamp < entry[2]:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(scan)
+        self.hits += 1
+        return entry[3]
+
+    def put(self, scan: Hashable, stamp: int, computed_at: int, valid_until: float,
+            results: List[Any]) -> None:
+        """Cache results computed at computed_at, evicting least recently used entries."""
+        old = self._entries.pop(scan, None)
+        if old is not None:
+            self._size -= max(len(old[3]), 1)
+        size = max(len(results), 1)
+        if size > self._max_size:
+            return
+        self._entries[scan] = (stamp, computed_at, valid_until, results)
+        self._size += size
+        while self._size > self._max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= max(len(evicted[3]), 1)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit, miss and eviction counters and the current occupancy."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._entries), "size": self._size}
@@ -0,0 +1,124 @@
+"""
+InMemoryDB Network Server
+
+Serves one InMemoryDB over TCP with asyncio, speaking the framed JSON
+protocol of `protocol.py`. Requests are pipelined: everything a read from
+the socket delivers is executed in order and answered with one write, so a
+client that sends many requests per round trip gets all the replies back in
+one round trip too. Each connection waits for its replies to drain before
+reading more, so a client that stops reading its replies is slowed down by
+TCP flow control instead of growing the server's buffers.
+
+Commands run on the event loop thread one at a time, so the database needs
+no locking and every connection sees each command applied atomically. A
+frame whose payload cannot be decoded gets an error reply; a frame over
+MAX_FRAME gets one too and closes the connection, since the stream cannot
+be followed past it.
+
+Run with: python server.py [--host 127.0.0.1] [--port 7379] [--field-index radix] ...
+"""
+
+import argparse
+import asyncio
+import functools
+import signal
+from typing import List, Optional
+
+from impl import InMemoryDB
+from protocol import COMMANDS, DEFAULT_PORT, FrameDecoder, decode, encode
+
+# Bytes read from a connection at a time
+READ_SIZE = 256 * 1024
+# Replies buffered per connection before the server stops reading from it
+WRITE_HIGH_WATER = 1 << 20
+
+
+def execute(db: InMemoryDB, payload: bytes) -> bytes:
+    """Run one request frame's payload against db and return the encoded reply."""
+    try:
+        request = decode(payload)
+        if not isinstance(request, list) or not request or request[0] not in COMMANDS:
+            raise ValueError(f"Unknown command: {request!r:.80}")
+        if request[0] == "ping":
+            return encode([True, "pong"])
+        return encode([True, getattr(db, request[0])(*request[1:])])
+    except Exception as exc:
+        return encode([False, type(exc).__name__, str(exc)])
+
+
+async def _handle(db: InMemoryDB, reader: asyncio.StreamReader,
+                  writer: asyncio.StreamWriter) -> None:
+    writer.transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+    decoder = FrameDecoder()
+    try:
+        while True:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                break
+            payloads = decoder.feed(data)
+            if payloads:
+                writer.write(b"".join([execute(db, payload) for payload in payloads]))
+            if decoder.error is not None:
+                writer.write(encode([False, "ProtocolError", str(decoder.error)]))
+                await writer.drain()
+                break
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(db: InMemoryDB, host: str = "127.0.0.1", port: int = DEFAULT_PORT
+                ) -> asyncio.AbstractServer:
+    """
+    Start serving db.
+
+    Args:
+        db: The database to serve
+        host: Interface to listen on
+        port: TCP port; 0 picks a free one (see server.sockets)
+
+    Returns:
+        The listening asyncio server
+    """
+    return await asyncio.start_server(functools.partial(_handle, db), host, port)
+
+
+async def _run(db: InMemoryDB, host: str, port: int) -> None:
+    server = await serve(db, host, port)
+    address = server.sockets[0].getsockname()
+    print(f"listening on {address[0]}:{address[1]}", flush=True)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    async with server:
+        await stop.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--field-index", default="sorted")
+    parser.add_argument("--backup-mode", default="cow")
+    parser.add_argument("--expiry-budget", type=int, default=0)
+    parser.add_argument("--wal-path")
+    parser.add_argument("--wal-fsync", default="always")
+    args = parser.parse_args(argv)
+    db = InMemoryDB(field_index=args.field_index, backup_mode=args.backup_mode,
+                    expiry_budget=args.expiry_budget, wal_path=args.wal_path,
+                    wal_fsync=args.wal_fsync)
+    try:
+        asyncio.run(_run(db, args.host, args.port))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Sharded InMemoryDB
+
+ShardedDB spreads a database over worker processes so that it is not
+limited to one core. Each worker owns an InMemoryDB holding the keys that
+hash to it (CRC-32 of the key modulo the number of shards, so placement is
+the same from run to run), and ShardedDB offers the InMemoryDB methods from
+the calling process, forwarding each call to its key's shard over a pipe.
+
+Batch methods send each shard one message with all of its items, so the
+shards work on a batch in parallel and the cost of a round trip is paid once
+per shard rather than once per item. Every message carries the router's
+clock, which every shard moves to before applying it, so the untimed methods,
+expiry and backup retention behave as they would in a single database.
+
+backup_at, restore_at and the other whole-database methods go to every
+shard, with every shard's lock held, so each shard snapshots or restores the
+same logical timestamp after the same calls. With wal_path set, shard i logs
+to `<wal_path>.<i>`; export_backup and attach_backup likewise use one file
+per shard, `<path>.<i>`.
+
+Example usage:
+    with ShardedDB(shards=4) as db:
+        db.put_many_at(100, [("user1", "name", "Alice"), ("user2", "name", "Bob")])
+        db.get_many_at(100, [("user1", "name"), ("user2", "name")])  # ["Alice", "Bob"]
+        db.backup_at(110)
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bulk_load import load_stats, read_chunks
+from impl import LOAD_CHUNK, SCAN_CHUNK, TTL_BUCKETS, InMemoryDB
+
+Call = Tuple[str, tuple]
+
+
+def _serve(conn, options: dict) -> None:
+    """Worker loop: apply each message's calls and reply with the clock and results."""
+    try:
+        db = InMemoryDB(**options)
+    except Exception as exc:
+        # Reported by ShardedDB.__init__, e.g. a log that cannot be recovered
+        conn.send((0, [(False, exc)]))
+        conn.close()
+        return
+    try:
+        conn.send((db._clock, []))
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            clock, calls = message
+            db._advance(clock)
+            results = []
+            for name, args in calls:
+                try:
+                    results.append((True, getattr(db, name)(*args)))
+                except Exception as exc:
+                    results.append((False, exc))
+            conn.send((db._clock, results))
+    finally:
+        db.close()
+        conn.close()
+
+
+class ShardedDB:
+    """An InMemoryDB partitioned by key hash over worker processes."""
+
+    def __init__(self, shards: Optional[int] = None, start_method: Optional[str] = None,
+                 **options):
+        """
+        Start the worker processes.
+
+        Args:
+            shards: Number of worker processes; defaults to the number of CPUs
+            start_method: multiprocessing start method for the workers, e.g.
+                "fork" or "spawn"; None uses the platform default
+            **options: Options of InMemoryDB, used by every shard
+        """
+        shards = shards or os.cpu_count() or 1
+        wal_path = options.pop("wal_path", None)
+        # Fail here rather than in every worker
+        InMemoryDB(**options)
+        context = multiprocessing.get_context(start_method)
+        self._conns = []
+        self._processes = []
+        for i in range(shards):
+            shard_options = dict(options)
+            if wal_path is not None:
+                shard_options["wal_path"] = f"{wal_path}.{i}"
+            conn, child = context.Pipe()
+            process = context.Process(target=_serve, args=(child, shard_options), daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(conn)
+            self._processes.append(process)
+        # One lock per shard keeps each pipe's messages and replies paired;
+        # calls on several shards take theirs in shard order
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._clock_lock = threading.Lock()
+        self._clock = 0
+        # Each worker reports its clock once started, which matters after recovery
+        errors = []
+        for conn in self._conns:
+            clock, failed = conn.recv()
+            self._advance(clock)
+            errors.extend(exc for _, exc in failed)
+        if errors:
+            self.close()
+            raise errors[0]
+
+    def __enter__(self) -> "ShardedDB":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def shards(self) -> int:
+        return len(self._conns)
+
+    def shard_of(self, key: str) -> int:
+        """Return the shard that owns key."""
+        return zlib.crc32(key.encode()) % len(self._conns)
+
+    # ============================================================================
+    # LEVEL 1-3 METHODS
+    # ============================================================================
+
+    def get(self, key: str, field: str) -> Optional[str]:
+        return self.get_at(self._clock, key, field)
+
+    def put(self, key: str, field: str, value: str) -> None:
+        self.put_at(self._clock, key, field, value)
+
+    def delete(self, key: str, field: str) -> bool:
+        return self.delete_at(self._clock, key, field)
+
+    def scan(self, key: str) -> list:
+        return self.scan_at(self._clock, key)
+
+    def scan_with_prefix(self, key: str, prefix: str) -> list:
+        return self.scan_with_prefix_at(self._clock, key, prefix)
+
+    def get_at(self, timestamp: int, key: str, field: str) -> Optional[str]:
+        return self._call(key, "get_at", timestamp, key, field)
+
+    def put_at(self, timestamp: int, key: str, field: str, value: str) -> None:
+        self._call(key, "put_at", timestamp, key, field, value)
+
+    def delete_at(self, timestamp: int, key: str, field: str) -> bool:
+        return self._call(key, "delete_at", timestamp, key, field)
+
+    def scan_at(self, timestamp: int, key: str) -> list:
+        return self._call(key, "scan_at", timestamp, key)
+
+    def scan_with_prefix_at(self, timestamp: int, key: str, prefix: str) -> list:
+        return self._call(key, "scan_with_prefix_at", timestamp, key, prefix)
+
+    def put_at_with_ttl(self, timestamp: int, key: str, field: str, value: str, ttl: int) -> None:
+        self._call(key, "put_at_with_ttl", timestamp, key, field, value, ttl)
+
+    # ============================================================================
+    # LEVEL 4 METHODS
+    # ============================================================================
+
+    def backup_at(self, timestamp: int) -> None:
+        self._broadcast(timestamp, "backup_at", timestamp)
+
+    def restore_at(self, timestamp: int, restore_at_timestamp: int) -> None:
+        self._broadcast(timestamp, "restore_at", timestamp, restore_at_timestamp)
+
+    def materialize_restore(self, budget: int = -1) -> bool:
+        return all(self._broadcast(self._clock, "materialize_restore", budget))
+
+    def list_backups(self, start: Optional[int] = None, end: Optional[int] = None) -> List[int]:
+        # Every shard sees the same backups at the same clock, so any one will do
+        return self._call_shard(0, "list_backups", start, end)
+
+    def compact_backups(self) -> int:
+        # Shards hold the same backups, so each folds the same number
+        return max(self._broadcast(self._clock, "compact_backups"))
+
+    def purge_expired(self, timestamp: int) -> int:
+        return sum(self._broadcast(timestamp, "purge_expired", timestamp))
+
+    def ttl_stats_at(self, timestamp: int, edges: Sequence[int] = TTL_BUCKETS) -> List[dict]:
+        """Return the TTL statistics of each shard at timestamp, in shard order."""
+        return self._broadcast(timestamp, "ttl_stats_at", timestamp, edges)
+
+    def set_gc_watermark(self, timestamp: int) -> None:
+        self._broadcast(self._clock, "set_gc_watermark", timestamp)
+
+    def collect_garbage(self, budget: int = -1) -> bool:
+        return all(self._broadcast(self._clock, "collect_garbage", budget))
+
+    def gc_stats(self) -> List[dict]:
+        """Return the version collector statistics of each shard, in shard order."""
+        return self._broadcast(self._clock, "gc_stats")
+
+    def scan_cache_stats(self) -> List[dict]:
+        """Return the scan result cache statistics of each shard, in shard order."""
+        return self._broadcast(self._clock, "scan_cache_stats")
+
+    # ============================================================================
+    # BATCH METHODS
+    # ============================================================================
+
+    def put_many(self, items: Sequence[tuple]) -> None:
+        self.put_many_at(self._clock, items)
+
+    def get_many(self, items: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+        return self.get_many_at(self._clock, items)
+
+    def delete_many(self, items: Sequence[Tuple[str, str]]) -> List[bool]:
+        return self.delete_many_at(self._clock, items)
+
+    def scan_many(self, keys: Sequence[str]) -> List[list]:
+        return self.scan_many_at(self._clock, keys)
+
+    def put_many_at(self, timestamp: int, items: Sequence[tuple]) -> None:
+        self._scatter(timestamp, "put_many_at", items, [item[0] for item in items])
+
+    def get_many_at(self, timestamp: int, items: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+        return self._scatter(timestamp, "get_many_at", items, [item[0] for item in items])
+
+    def delete_many_at(self, timestamp: int, items: Sequence[Tuple[str, str]]) -> List[bool]:
+        return self._scatter(timestamp, "delete_many_at", items, [item[0] for item in items])
+
+    def scan_many_at(self, timestamp: int, keys: Sequence[str]) -> List[list]:
+        return self._scatter(timestamp, "scan_many_at", keys, keys)
+
+    # ============================================================================
+    # BULK LOADING
+    # ============================================================================
+
+    def load_stream(self, source, format: str = "jsonl", timestamp: Optional[int] = None,
+                    chunk_size: int = LOAD_CHUNK) -> Dict[str, float]:
+        """
+        Read records here and load each chunk on the shards in parallel; see InMemoryDB.
+
+        Each shard receives its part of a chunk as parsed records, so parsing
+        is done once, by this process, while the shards build their pages.
+        """
+        chunks = read_chunks(source, format, chunk_size)
+        if timestamp is None:
+            timestamp = self._clock
+        start = time.perf_counter()
+        crc32, shards = zlib.crc32, len(self._conns)
+        records = 0
+        for chunk in chunks:
+            parts: Dict[int, list] = {}
+            for record in chunk:
+                shard = crc32(record[0].encode()) % shards
+                part = parts.get(shard)
+                if part is None:
+                    part = parts[shard] = []
+                part.append(record)
+            self._exchange({shard: [("load_stream", (part, "records", timestamp, len(part)))]
+                            for shard, part in parts.items()})
+            records += len(chunk)
+        return load_stats(records, time.perf_counter() - start)
+
+    # ============================================================================
+    # SCAN ITERATORS
+    # ============================================================================
+
+    def iter_scan(self, key: str) -> Iterator:
+        return self.iter_scan_with_prefix_at(self._clock, key, "")
+
+    def iter_scan_with_prefix(self, key: str, prefix: str) -> Iterator:
+        return self.iter_scan_with_prefix_at(self._clock, key, prefix)
+
+    def iter_scan_at(self, timestamp: int, key: str) -> Iterator:
+        return self.iter_scan_with_prefix_at(timestamp, key, "")
+
+    def iter_scan_with_prefix_at(self, timestamp: int, key: str, prefix: str) -> Iterator:
+        """Yield scan results SCAN_CHUNK at a time, one round trip per chunk."""
+        self._advance(timestamp)
+        return self._iter_scan(timestamp, key, prefix)
+
+    def scan_page(self, key: str, prefix: str = "", after: Optional[str] = None,
+                  limit: int = 100) -> Tuple[list, Optional[str]]:
+        return self.scan_page_at(self._clock, key, prefix, after, limit)
+
+    def scan_page_at(self, timestamp: int, key: str, prefix: str = "",
+                     after: Optional[str] = None, limit: int = 100
+                     ) -> Tuple[list, Optional[str]]:
+        return self._call(key, "scan_page_at", timestamp, key, prefix, after, limit)
+
+    # ============================================================================
+    # RANGE SCANS
+    # ============================================================================
+
+    def scan_range(self, key: str, start_field: Optional[str] = None,
+                   end_field: Optional[str] = None, limit: Optional[int] = None,
+                   reverse: bool = False) -> list:
+        return self.scan_range_at(self._clock, key, start_field, end_field, limit, reverse)
+
+    def scan_range_at(self, timestamp: int, key: str, start_field: Optional[str] = None,
+                      end_field: Optional[str] = None, limit: Optional[int] = None,
+                      reverse: bool = False) -> list:
+        return self._call(key, "scan_range_at", timestamp, key, start_field, end_field, limit,
+                          reverse)
+
+    # ============================================================================
+    # KEY SCANS
+    # ============================================================================
+
+    def scan_keys(self, prefix: str = "") -> List[str]:
+        return self.scan_keys_at(self._clock, prefix)
+
+    def scan_keys_range(self, start: Optional[str] = None, end: Optional[str] = None,
+                        limit: Optional[int] = None) -> List[str]:
+        return self.scan_keys_range_at(self._clock, start, end, limit)
+
+    def scan_keys_at(self, timestamp: int, prefix: str = "") -> List[str]:
+        """Merge the sorted key scans of every shard."""
+        return list(heapq.merge(*self._broadcast(timestamp, "scan_keys_at", timestamp, prefix)))
+
+    def scan_keys_range_at(self, timestamp: int, start: Optional[str] = None,
+                           end: Optional[str] = None, limit: Optional[int] = None
+                           ) -> List[str]:
+        """Merge the sorted key scans of every shard; each returns up to limit keys."""
+        if limit is not None and limit <= 0:
+            raise ValueError(f"limit must be positive: {limit!r}")
+        scans = self._broadcast(timestamp, "scan_keys_range_at", timestamp, start, end, limit)
+        return list(itertools.islice(heapq.merge(*scans), limit))
+
+    def _iter_scan(self, timestamp: int, key: str, prefix: str) -> Iterator:
+        after = None
+        while True:
+            results, after = self._call(key, "scan_page_at", timestamp, key, prefix, after,
+                                        SCAN_CHUNK)
+            yield from results
+            if after is None:
+                return
+
+    # ============================================================================
+    # PERSISTENCE
+    # ============================================================================
+
+    def checkpoint(self) -> None:
+        self._broadcast(self._clock, "checkpoint")
+
+    def export_backup(self, timestamp: int, path: str) -> int:
+        """Write each shard's part of a backup to `<path>.<shard>`; see InMemoryDB."""
+        return self._exchange({i: [("export_backup", (timestamp, f"{path}.{i}"))]
+                               for i in range(self.shards)})[0][0]
+
+    def attach_backup(self, path: str) -> int:
+        """Attach the files written by export_backup(timestamp, path) to their shards."""
+        return self._exchange({i: [("attach_backup", (f"{path}.{i}",))]
+                               for i in range(self.shards)})[0][0]
+
+    def close(self) -> None:
+        """Stop the worker processes, closing their write-ahead logs."""
+        for lock, conn in zip(self._locks, self._conns):
+            with lock:
+                if not conn.closed:
+                    try:
+                        conn.send(None)
+                    except OSError:
+                        pass  # The worker already exited
+                    conn.close()
+        for process in self._processes:
+            process.join()
+
+    # ============================================================================
+    # INTERNAL HELPERS
+    # ============================================================================
+
+    def _advance(self, timestamp: int) -> None:
+        if timestamp > self._clock:
+            with self._clock_lock:
+                if timestamp > self._clock:
+                    self._clock = timestamp
+
+    def _call(self, key: str, name: str, timestamp: int, *args):
+        """Advance the clock and make one call on the shard of key."""
+        self._advance(timestamp)
+        return self._call_shard(self.shard_of(key), name, timestamp, *args)
+
+    def _call_shard(self, shard: int, name: str, *args):
+        return self._exchange({shard: [(name, args)]})[shard][0]
+
+    def _broadcast(self, timestamp: int, name: str, *args) -> list:
+        """Make the same call on every shard; return each shard's result."""
+        self._advance(timestamp)
+        replies = self._exchange({i: [(name, args)] for i in range(self.shards)})
+        return [replies[i][0] for i in range(self.shards)]
+
+    def _scatter(self, timestamp: int, name: str, items: Sequence, keys: Sequence[str]) -> list:
+        """
+        Split a batch by shard, make one call per shard and merge the results.
+
+        Items keep their order within each shard, and the merged results
+        are in the order of items.
+        """
+        self._advance(timestamp)
+        crc32, shards = zlib.crc32, len(self._conns)
+        parts: Dict[int, list] = {}
+        positions: Dict[int, List[int]] = {}
+        for position, key in enumerate(keys):
+            shard = crc32(key.encode()) % shards
+            part = parts.get(shard)
+            if part is None:
+                part = parts[shard] = []
+                positions[shard] = []
+            part.append(items[position])
+            positions[shard].append(position)
+        replies = self._exchange({shard: [(name, (timestamp, part))]
+                                  for shard, part in parts.items()})
+        results = [None] * len(items)
+        for shard, part_results in replies.items():
+            if part_results[0] is None:
+                continue
+            for position, result in zip(positions[shard], part_results[0]):
+                results[position] = result
+        return results
+
+    def _exchange(self, batches: Dict[int, List[Call]]) -> Dict[int, list]:
+        """
+        Send each shard its calls and return each shard's results.
+
+        Raises the first exception a call raised, once every shard has
+        replied, so that the pipes stay in step.
+        """
+        shards = sorted(batches)
+        for shard in shards:
+            self._locks[shard].acquire()
+        try:
+            clock = self._clock
+            for shard in shards:
+                self._conns[shard].send((clock, batches[shard]))
+            replies = {}
+            for shard in shards:
+                shard_clock, replies[shard] = self._conns[shard].recv()
+                self._advance(shard_clock)
+        finally:
+            for shard in reversed(shards):
+                self._locks[shard].release()
+        results = {}
+        for shard in shards:
+            values = []
+            for ok, value in replies[shard]:
+                if not ok:
+                    raise value
+                values.append(value)
+            results[shard] = values
+        return results
@@ -0,0 +1,182 @@
+"""
+Memory-Mapped Snapshot Files
+
+A compact, page-aligned binary format for a single backup, opened with mmap
+so that attaching it only reads the header. Keys are found by binary search
+over a fixed-width key directory, and a key's fields are decoded when it is
+first looked up, so only the pages that are touched are faulted in. Several
+processes opening the same file share one page-cache copy.
+
+File layout (little-endian; every section starts on a PAGE_SIZE boundary):
+    header      magic, version, page size, backup timestamp, key and field
+                counts, and the offset of each section below
+    keys        one row per key, sorted by UTF-8 bytes: heap offset and
+                length of the key, index of its first field, field count
+    fields      one row per field, sorted by name within each key: heap
+                offsets and lengths of the name and the value
+    ttls        one signed 64-bit remaining TTL per field; -1 if permanent
+    heap        the UTF-8 bytes of keys, field names and values
+
+Example usage:
+    write_snapshot("backup.snap", 120, [("user1", [("name", "Alice", None)])])
+    snapshot = MappedSnapshot("backup.snap")
+    snapshot.lookup("user1")  # [("name", "Alice", None)]
+"""
+
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+PAGE_SIZE = 4096
+
+Entry = Tuple[str, str, Optional[int]]
+
+_MAGIC = b"IMDBMAP1"
+_VERSION = 1
+# magic, version, page size, timestamp, keys, fields, section offsets
+_HEADER = struct.Struct("<8sIIqQQQQQQ")
+_KEY_ROW = struct.Struct("<QIQI")
+_FIELD_ROW = struct.Struct("<QQII")
+_TTL = struct.Struct("<q")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // PAGE_SIZE) * PAGE_SIZE
+
+
+def write_snapshot(path: str, timestamp: int,
+                   entries: Iterable[Tuple[str, Iterable[Entry]]]) -> None:
+    """
+    Write a snapshot file.
+
+    Args:
+        path: File to create or replace; a replaced file is swapped out
+            whole, so processes that have it mapped keep reading the old one
+        timestamp: The backup's timestamp
+        entries: (key, [(field, value, remaining TTL or None), ...]) pairs,
+            in any order; keys without fields are skipped
+    """
+    heap = bytearray()
+    key_rows = []
+    field_rows = []
+    ttls = []
+
+    def intern(text: str) -> Tuple[int, int]:
+        data = text.encode()
+        offset = len(heap)
+        heap.extend(data)
+        return offset, len(data)
+
+    encoded = sorted((key.encode(), key, fields) for key, fields in entries)
+    for _, key, fields in encoded:
+        fields = sorted((field.encode(), field, value, ttl) for field, value, ttl in fields)
+        if not fields:
+            continue
+        key_offset, key_length = intern(key)
+        key_rows.append(_KEY_ROW.pack(key_offset, key_length, len(ttls), len(fields)))
+        for _, field, value, ttl in fields:
+            name_offset, name_length = intern(field)
+            value_offset, value_length = intern(value)
+            field_rows.append(_FIELD_ROW.pack(name_offset, value_offset, name_length, value_length))
+            ttls.append(_TTL.pack(-1 if ttl is None else ttl))
+
+    keys_offset = _align(_HEADER.size)
+    fields_offset = _align(keys_offset + len(key_rows) * _KEY_ROW.size)
+    ttls_offset = _align(fields_offset + len(field_rows) * _FIELD_ROW.size)
+    heap_offset = _align(ttls_offset + len(ttls) * _TTL.size)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, PAGE_SIZE, timestamp, len(key_rows),
+                             len(field_rows), keys_offset, fields_offset, ttls_offset,
+                             heap_offset))
+        for offset, rows in ((keys_offset, key_rows), (fields_offset, field_rows),
+                             (ttls_offset, ttls), (heap_offset, [bytes(heap)])):
+            f.seek(offset)
+            f.write(b"".join(rows))
+        # Pad the file to a whole number of pages
+        f.truncate(_align(heap_offset + len(heap)))
+        f.flush()
+        os.fsync(f.fileno())
+    # Truncating a mapped file in place would fault or change its readers' pages
+    os.replace(temp_path, path)
+
+
+class MappedSnapshot:
+    """A snapshot file mapped read-only into memory."""
+
+    def __init__(self, path: str):
+        """
+        Map a snapshot file, reading only its header.
+
+        Raises:
+            ValueError: If the file is not a snapshot in this format
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) >= _HEADER.size:
+            (magic, version, page_size, self.timestamp, self._num_keys, self._num_fields,
+             self._keys, self._fields, self._ttls, self._heap) = _HEADER.unpack_from(self._map)
+            if magic == _MAGIC and version == _VERSION and page_size == PAGE_SIZE:
+                return
+        self._map.close()
+        raise ValueError(f"Not a snapshot file: {path}")
+
+    def __reduce__(self):
+        # Pickle by path; the mapping is reopened on load
+        return MappedSnapshot, (self.path,)
+
+    def __len__(self) -> int:
+        return self._num_keys
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._num_keys):
+            yield self._key(i).decode()
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key.encode()) >= 0
+
+    def lookup(self, key: str) -> Optional[List[Entry]]:
+        """Return the (field, value, remaining TTL or None) entries of key, if present."""
+        i = self._find(key.encode())
+        if i < 0:
+            return None
+        _, _, first, count = _KEY_ROW.unpack_from(self._map, self._keys + i * _KEY_ROW.size)
+        entries = []
+        for j in range(first, first + count):
+            name_offset, value_offset, name_length, value_length = _FIELD_ROW.unpack_from(
+                self._map, self._fields + j * _FIELD_ROW.size)
+            (ttl,) = _TTL.unpack_from(self._map, self._ttls + j * _TTL.size)
+            entries.append((self._text(name_offset, name_length),
+                            self._text(value_offset, value_length),
+                            None if ttl < 0 else ttl))
+        return entries
+
+    @property
+    def closed(self) -> bool:
+        return self._map.closed
+
+    def close(self) -> None:
+        """Unmap the file; closing it again does nothing."""
+        self._map.close()
+
+    def _key(self, i: int) -> bytes:
+        offset, length, _, _ = _KEY_ROW.unpack_from(self._map, self._keys + i * _KEY_ROW.size)
+        start = self._heap + offset
+        return self._map[start:start + length]
+
+    def _text(self, offset: int, length: int) -> str:
+        start = self._heap + offset
+        return self._map[start:start + length].decode()
+
+    def _find(self, key: bytes) -> int:
+        """Return the row of key in the key directory, or -1."""
+        lo, hi = 0, self._num_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._num_keys and self._key(lo) == key else -1
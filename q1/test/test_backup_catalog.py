@@ -0,0 +1,135 @@
+"""
+Backup Catalog Unit Tests
+
+Test suite for the timestamp-indexed backup catalog and its retention policy.
+Run with: python -m pytest test/test_backup_catalog.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from backup_catalog import BackupCatalog
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class TestBackupCatalog:
+    """Test cases for the BackupCatalog class."""
+
+    def test_floor_finds_closest_earlier_backup(self):
+        """Test floor lookups between, on and around backup timestamps."""
+        catalog = BackupCatalog()
+        for timestamp in (100, 200, 300):
+            catalog.add(timestamp, f"b{timestamp}")
+
+        assert catalog.floor(99) is None
+        assert catalog.floor(100) == "b100"
+        assert catalog.floor(250) == "b200"
+        assert catalog.floor(10_000) == "b300"
+
+    def test_out_of_order_and_repeated_adds(self):
+        """Test that late and repeated timestamps keep the catalog ordered."""
+        catalog = BackupCatalog()
+        catalog.add(300, "b300")
+        catalog.add(100, "b100")
+        catalog.add(300, "b300-again")
+
+        assert list(catalog) == [100, 300]
+        assert catalog.floor(300) == "b300-again"
+        assert len(catalog) == 2
+
+    def test_range(self):
+        """Test inclusive and open-ended range queries."""
+        catalog = BackupCatalog()
+        for timestamp in range(0, 100, 10):
+            catalog.add(timestamp, timestamp)
+
+        assert catalog.range(20, 50) == [20, 30, 40, 50]
+        assert catalog.range(None, 15) == [0, 10]
+        assert catalog.range(85, None) == [90]
+        assert catalog.range(41, 49) == []
+
+    def test_tiered_retention(self):
+        """Test keeping all recent, hourly older and daily oldest backups."""
+        catalog = BackupCatalog([(HOUR, HOUR), (DAY, DAY)])
+        now = 3 * DAY
+        # One backup every 10 minutes for three days
+        for timestamp in range(0, now + 1, 600):
+            catalog.add(timestamp, timestamp)
+            catalog.thin(timestamp)
+
+        recent = catalog.range(now - HOUR, now)
+        hourly = catalog.range(now - DAY, now - HOUR - 1)
+        daily = catalog.range(None, now - DAY - 1)
+
+        assert recent == list(range(now - HOUR, now + 1, 600))
+        assert all(timestamp % HOUR == 0 for timestamp in hourly)
+        assert len(hourly) == 23
+        assert daily == [0, DAY]
+
+    def test_thin_reports_dropped_backups(self):
+        """Test that thin returns the timestamps it removed."""
+        catalog = BackupCatalog([(100, 50)])
+        for timestamp in (0, 10, 60, 200):
+            catalog.add(timestamp, timestamp)
+
+        assert catalog.thin(200) == [10]
+        assert list(catalog) == [0, 60, 200]
+        assert catalog.floor(59) == 0
+
+    def test_invalid_retention_rejected(self):
+        """Test that non-increasing ages and non-positive spacings raise ValueError."""
+        with pytest.raises(ValueError):
+            BackupCatalog([(DAY, DAY), (HOUR, HOUR)])
+        with pytest.raises(ValueError):
+            BackupCatalog([(HOUR, 0)])
+
+
+class TestDatabaseBackupListing:
+    """Test cases for InMemoryDB.list_backups and retention."""
+
+    def test_list_backups(self):
+        """Test listing backups taken by backup_at."""
+        db = InMemoryDB()
+        for timestamp in (100, 150, 200):
+            db.backup_at(timestamp)
+
+        assert db.list_backups() == [100, 150, 200]
+        assert db.list_backups(120, 200) == [150, 200]
+
+    def test_restore_uses_thinned_catalog(self):
+        """Test that restore_at falls back to the closest retained backup."""
+        db = InMemoryDB(backup_retention=[(100, 100)])
+        db.put_at(0, "key1", "field1", "a")
+        db.backup_at(0)
+        db.put_at(50, "key1", "field1", "b")
+        db.backup_at(50)
+        db.put_at(300, "key1", "field1", "c")
+        db.backup_at(300)
+
+        assert db.list_backups() == [0, 300]
+        db.restore_at(400, 60)
+        assert db.get_at(400, "key1", "field1") == "a"
+
+    def test_reads_do_not_age_backups(self):
+        """Test that a read far in the future does not thin backups taken before it."""
+        db = InMemoryDB(backup_retention=[(10, 5)])
+        db.put_at(1, "key1", "field1", "a")
+        db.backup_at(1)
+        db.put_at(2, "key1", "field1", "b")
+        db.backup_at(2)
+        assert db.get_at(10**9, "key1", "field1") == "b"
+        db.backup_at(3)
+
+        assert db.list_backups() == [1, 2, 3]
+        db.backup_at(20)
+        assert db.list_backups() == [1, 20]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
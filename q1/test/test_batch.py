@@ -0,0 +1,110 @@
+"""
+Batch Operation Unit Tests
+
+Test suite for put_many, get_many, delete_many, scan_many and their _at variants.
+Run with: python -m pytest test/test_batch.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+@pytest.fixture(params=["sorted", "radix"])
+def db(request):
+    return InMemoryDB(field_index=request.param)
+
+
+class TestBatchOperations:
+    """Test cases for the batched entry points."""
+
+    def test_put_many_matches_single_puts(self, db):
+        """Test that put_many_at stores values and TTLs like put_at calls."""
+        db.put_many_at(100, [
+            ("user1", "name", "Alice"),
+            ("user1", "session", "abc", 50),
+            ("user2", "name", "Bob"),
+            ("user1", "age", "30"),
+        ])
+
+        assert db.scan_at(100, "user1") == ["age(30)", "name(Alice)", "session(abc)"]
+        assert db.get_at(149, "user1", "session") == "abc"
+        assert db.get_at(150, "user1", "session") is None
+        assert db.get_at(100, "user2", "name") == "Bob"
+
+    def test_later_item_wins(self, db):
+        """Test that items for the same field are applied in order."""
+        db.put_many_at(100, [("user1", "name", "Alice"), ("user1", "name", "Alicia")])
+        assert db.get_at(100, "user1", "name") == "Alicia"
+
+    def test_get_many(self, db):
+        """Test reading present, missing and expired fields in one call."""
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at_with_ttl(100, "user1", "session", "abc", 10)
+
+        assert db.get_many_at(120, [
+            ("user1", "name"),
+            ("user1", "session"),
+            ("user1", "missing"),
+            ("nobody", "name"),
+        ]) == ["Alice", None, None, None]
+
+    def test_delete_many(self, db):
+        """Test deleting several fields, including one deleted twice."""
+        db.put_many_at(100, [("user1", "a", "1"), ("user1", "b", "2"), ("user2", "a", "3")])
+
+        assert db.delete_many_at(110, [
+            ("user1", "a"), ("user1", "a"), ("user2", "a"), ("user3", "a"),
+        ]) == [True, False, True, False]
+        assert db.scan_at(110, "user1") == ["b(2)"]
+        assert db.scan_at(110, "user2") == []
+
+    def test_scan_many(self, db):
+        """Test scanning several keys in one call."""
+        db.put_many_at(100, [("user1", "b", "2"), ("user1", "a", "1"), ("user2", "a", "3")])
+        assert db.scan_many_at(100, ["user1", "user2", "user3"]) == [
+            ["a(1)", "b(2)"], ["a(3)"], [],
+        ]
+
+    def test_untimed_variants(self, db):
+        """Test that the untimed batch methods operate at the current time."""
+        db.put_at(100, "user1", "clock", "set")
+        db.put_many([("user1", "name", "Alice"), ("user1", "session", "abc", 10)])
+
+        assert db.get_many([("user1", "name"), ("user1", "session")]) == ["Alice", "abc"]
+        assert db.delete_many([("user1", "name")]) == [True]
+        assert db.scan_many(["user1"]) == [["clock(set)", "session(abc)"]]
+        assert db.get_at(110, "user1", "session") is None
+
+    def test_batches_through_restored_base(self, db):
+        """Test batch reads and writes of keys still in a restored backup."""
+        db.put_many_at(100, [("user1", "name", "Alice"), ("user2", "name", "Bob")])
+        db.backup_at(110)
+        db.restore_at(200, 110)
+
+        assert db.get_many_at(200, [("user1", "name"), ("user2", "name")]) == ["Alice", "Bob"]
+        db.put_many_at(210, [("user1", "age", "30")])
+        assert db.scan_many_at(210, ["user1", "user2"]) == [
+            ["age(30)", "name(Alice)"], ["name(Bob)"],
+        ]
+
+    def test_batches_replayed_from_wal(self, tmp_path):
+        """Test that batched writes are logged and replayed."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path)
+        db.put_many_at(100, [("user1", "name", "Alice"), ("user1", "session", "abc", 50)])
+        db.delete_many_at(110, [("user1", "name")])
+        db.close()
+
+        db = InMemoryDB(wal_path=path)
+        assert db.scan_at(120, "user1") == ["session(abc)"]
+        assert db.get_at(150, "user1", "session") is None
+        db.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
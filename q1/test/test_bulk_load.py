@@ -0,0 +1,181 @@
+"""
+Bulk Load Unit Tests
+
+Test suite for load_stream and the CSV, JSONL and record readers.
+Run with: python -m pytest test/test_bulk_load.py -v
+"""
+
+import json
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from concurrent_db import ConcurrentDB
+from impl import InMemoryDB
+from radix_index import RadixFieldIndex
+from sharded import ShardedDB
+
+
+def random_records(rng, count, keys=30, fields=8):
+    records = []
+    for _ in range(count):
+        timestamp = rng.choice([None, rng.randrange(100, 200)])
+        ttl = rng.randrange(1, 60) if timestamp is not None and rng.random() < 0.3 else None
+        records.append((f"user{rng.randrange(keys)}", f"f{rng.randrange(fields)}",
+                        str(rng.randrange(1000)), timestamp, ttl))
+    return records
+
+
+def put_each(db, records, timestamp):
+    for key, field, value, at, ttl in records:
+        at = timestamp if at is None else at
+        if ttl is None:
+            db.put_at(at, key, field, value)
+        else:
+            db.put_at_with_ttl(at, key, field, value, ttl)
+
+
+def contents(db, keys=30):
+    return [[db.scan_at(t, f"user{k}") for k in range(keys)] for t in (100, 150, 250)]
+
+
+class TestBulkLoad:
+    """Test cases for InMemoryDB.load_stream."""
+
+    @pytest.mark.parametrize("field_index", ["sorted", "radix"])
+    def test_matches_puts(self, field_index):
+        """Test that loading records in chunks matches putting them one by one, over existing keys too."""
+        rng = random.Random(5)
+        existing = random_records(rng, 200)
+        records = random_records(rng, 2000)
+        loaded = InMemoryDB(field_index=field_index)
+        put = InMemoryDB(field_index=field_index)
+        for db in (loaded, put):
+            put_each(db, existing[:100], 120)
+        stats = loaded.load_stream(existing[100:] + records, format="records", timestamp=120,
+                                   chunk_size=300)
+        put_each(put, existing[100:] + records, 120)
+        assert stats["records"] == 2100 and stats["records_per_second"] > 0
+        assert contents(loaded) == contents(put)
+        assert loaded._clock == put._clock
+        assert loaded.ttl_stats_at(150) == put.ttl_stats_at(150)
+        assert loaded.purge_expired(250) == put.purge_expired(250)
+        assert contents(loaded) == contents(put)
+
+    def test_jsonl_and_csv_files(self, tmp_path):
+        """Test reading JSONL and CSV files with optional timestamp and ttl columns."""
+        jsonl = tmp_path / "records.jsonl"
+        jsonl.write_text("\n".join([
+            json.dumps({"key": "user1", "field": "name", "value": "Alice"}),
+            "",
+            json.dumps({"key": "user1", "field": "session", "value": "abc",
+                        "timestamp": 100, "ttl": 50}),
+            json.dumps({"key": "user2", "field": "name", "value": "Bob", "timestamp": 90}),
+        ]) + "\n")
+        csv_file = tmp_path / "records.csv"
+        csv_file.write_text('ttl,value,key,field,timestamp\n'
+                            ',Alice,user1,name,\n'
+                            '50,abc,user1,session,100\n'
+                            ',"Bob, Jr.",user2,name,90\n')
+        for path, format, bob in ((jsonl, "jsonl", "Bob"), (csv_file, "csv", "Bob, Jr.")):
+            db = InMemoryDB()
+            assert db.load_stream(str(path), format=format, timestamp=95)["records"] == 3
+            assert db._clock == 100
+            assert db.scan_at(120, "user1") == ["name(Alice)", "session(abc)"]
+            assert db.scan_at(150, "user1") == ["name(Alice)"]
+            assert db.get_at(94, "user1", "name") is None
+            assert db.get_at(90, "user2", "name") == bob
+
+    def test_streams_one_chunk_at_a_time(self):
+        """Test that lines are read lazily, a chunk ahead of what is loaded at most."""
+        db = InMemoryDB()
+
+        def lines():
+            for i in range(1000):
+                assert len(db._pages) >= i - 100
+                yield json.dumps({"key": f"user{i}", "field": "name", "value": str(i)})
+
+        db.load_stream(lines(), chunk_size=100)
+        assert len(db._pages) == 1000
+
+    def test_malformed_input(self, tmp_path):
+        """Test that malformed input raises ValueError and leaves earlier chunks loaded."""
+        db = InMemoryDB()
+        lines = [json.dumps({"key": f"user{i}", "field": "name", "value": "x"}) for i in range(5)]
+        with pytest.raises(ValueError, match="Line 4"):
+            db.load_stream(lines[:3] + ['{"key": "user9"'] + lines[3:], chunk_size=2)
+        assert sorted(db._pages) == ["user0", "user1"]
+        with pytest.raises(ValueError, match="Line 1"):
+            db.load_stream([json.dumps({"key": "user1", "field": "age", "value": 25})])
+        with pytest.raises(ValueError, match="value"):
+            db.load_stream(["key,field,timestamp", "user1,name,100"], format="csv")
+        with pytest.raises(ValueError, match="Row 2"):
+            db.load_stream(["key,field,value,ttl", "user1,name,Alice,soon"], format="csv")
+        with pytest.raises(ValueError):
+            db.load_stream([], format="parquet")
+        with pytest.raises(ValueError):
+            db.load_stream([], chunk_size=0)
+
+    def test_backups_restores_and_wal(self, tmp_path):
+        """Test that loads leave earlier backups alone, write through a restored base and are logged."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path, backup_mode="delta")
+        db.put_at(100, "user1", "name", "Alice")
+        db.backup_at(100)
+        db.load_stream([("user1", "age", "25", 110), ("user2", "name", "Bob", 110, 30)],
+                       format="records")
+        db.backup_at(115)
+        db.restore_at(120, 100)
+        db.load_stream([("user1", "city", "Oslo", 130), ("user3", "name", "Cy", 130)],
+                       format="records")
+        assert db.scan_many_at(130, ["user1", "user2", "user3"]) == \
+            [["city(Oslo)", "name(Alice)"], [], ["name(Cy)"]]
+        db.close()
+
+        db = InMemoryDB(wal_path=path, backup_mode="delta")
+        assert db.scan_many_at(130, ["user1", "user2", "user3"]) == \
+            [["city(Oslo)", "name(Alice)"], [], ["name(Cy)"]]
+        db.restore_at(140, 115)
+        assert db.scan_many_at(140, ["user1", "user2", "user3"]) == \
+            [["age(25)", "name(Alice)"], ["name(Bob)"], []]
+        db.close()
+
+    def test_radix_from_sorted_matches_inserts(self):
+        """Test that a radix index built in one pass equals one built field by field."""
+        rng = random.Random(2)
+        names = sorted({"".join(rng.choice("ab:") for _ in range(rng.randrange(0, 7)))
+                        for _ in range(200)})
+        untils = [rng.randrange(100, 200) for _ in names]
+        built = RadixFieldIndex.from_sorted(names, untils)
+        inserted = RadixFieldIndex()
+        for name, until in zip(names, untils):
+            inserted.add(name)
+            inserted.set_until(name, until)
+        assert len(built) == len(inserted) == len(names)
+        for timestamp in (None, 120, 160, 200):
+            for prefix in ("", "a", "b:", "ab"):
+                assert list(built.iter_prefix(prefix, timestamp)) == \
+                    list(inserted.iter_prefix(prefix, timestamp))
+            assert list(built.iter_range("a:", "b", timestamp, reverse=True)) == \
+                list(inserted.iter_range("a:", "b", timestamp, reverse=True))
+
+    def test_concurrent_and_sharded(self):
+        """Test that ConcurrentDB and ShardedDB load the same records as InMemoryDB."""
+        records = random_records(random.Random(8), 1000)
+        expected = InMemoryDB()
+        expected.load_stream(records, format="records", timestamp=110)
+        concurrent = ConcurrentDB(lock_stripes=4)
+        concurrent.load_stream(records, format="records", timestamp=110, chunk_size=128)
+        assert contents(concurrent) == contents(expected)
+        with ShardedDB(shards=3) as sharded:
+            assert sharded.load_stream(records, format="records", timestamp=110,
+                                       chunk_size=128)["records"] == 1000
+            assert contents(sharded) == contents(expected)
+            assert sharded._clock == expected._clock
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
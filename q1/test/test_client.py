@@ -0,0 +1,177 @@
+"""
+Client Unit Tests
+
+Test suite for the pooled, pipelining clients of the network server.
+Run with: python -m pytest test/test_client.py -v
+"""
+
+import asyncio
+import pytest
+import socket
+import threading
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from client import AsyncClient, Client, ConnectionPool
+from impl import InMemoryDB
+from protocol import encode
+from server import serve
+
+
+@pytest.fixture
+def port():
+    """Serve a fresh InMemoryDB from a background event loop and yield its port."""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(serve(InMemoryDB(), port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.close()
+
+
+class TestClient:
+    """Test cases for the threaded Client."""
+
+    def test_methods_mirror_the_database(self, port):
+        """Test that calls behave as on a local InMemoryDB."""
+        with Client(port=port) as client:
+            assert client.ping() == "pong"
+            client.put_at(100, "user1", "name", "Alice")
+            client.put_at_with_ttl(100, "user1", "session", "abc", 50)
+            assert client.get_at(120, "user1", "name") == "Alice"
+            assert client.scan_at(120, "user1") == ["name(Alice)", "session(abc)"]
+            assert client.get_many_at(160, [("user1", "name"), ("user1", "session")]) == \
+                ["Alice", None]
+            client.backup_at(170)
+            assert client.list_backups() == [170]
+
+    def test_errors_raised_as_builtin_types(self, port):
+        """Test that a failed call raises the server's exception type and the client keeps working."""
+        with Client(port=port) as client:
+            with pytest.raises(ValueError):
+                client.scan_page("user1", limit=0)
+            assert client.delete("user1", "name") is False
+
+    def test_pipeline_sends_calls_together(self, port):
+        """Test that pipelined calls get their results in order from one connection."""
+        with Client(port=port) as client:
+            with client.pipeline() as pipe:
+                for i in range(100):
+                    pipe.put_at(100, "user1", f"f{i:03d}", str(i))
+                for i in range(100):
+                    pipe.get_at(100, "user1", f"f{i:03d}")
+                assert len(pipe) == 200
+            assert pipe.results == [None] * 100 + [str(i) for i in range(100)]
+            assert client.pool.size == 1
+
+            pipe = client.pipeline()
+            pipe.scan_page("user1", limit=0)
+            pipe.get_at(100, "user1", "f001")
+            results = pipe.execute(raise_on_error=False)
+            assert isinstance(results[0], ValueError) and results[1] == "1"
+
+    def test_iterators_page_through_scans(self, port):
+        """Test that the scan iterators return every field across several pages."""
+        with Client(port=port) as client:
+            client.put_many_at(100, [("user1", f"field{i:03d}", "x") for i in range(600)])
+            assert len(list(client.iter_scan_at(100, "user1"))) == 600
+            assert len(list(client.iter_scan_with_prefix("user1", "field1"))) == 100
+
+    def test_pool_is_bounded(self, port):
+        """Test that many threads share no more than pool_size connections."""
+        client = Client(port=port, pool_size=2)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(50):
+                    client.put(f"user{n}", f"f{i}", str(i))
+                    assert client.get(f"user{n}", f"f{i}") == str(i)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert client.pool.size <= 2
+        client.close()
+
+    def test_idle_connections_evicted(self, port):
+        """Test that connections idle past idle_timeout are closed on the next acquire."""
+        pool = ConnectionPool(port=port, max_size=4, idle_timeout=0.0)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        assert pool.size == 2
+        conn = pool.acquire()
+        assert pool.size == 1 and conn is not first and conn is not second
+        pool.release(conn)
+        pool.close()
+        assert pool.size == 0
+
+    def test_dead_connection_replaced_after_health_check(self, port):
+        """Test that a connection the server dropped is pinged, found dead and replaced."""
+        pool = ConnectionPool(port=port, health_check_interval=0.0)
+        conn = pool.acquire()
+        conn._sock.shutdown(socket.SHUT_RDWR)
+        pool.release(conn)
+        replacement = pool.acquire()
+        assert replacement is not conn
+        assert replacement.roundtrip(encode(["ping"]), 1) == [[True, "pong"]]
+        assert pool.size == 1
+        pool.close()
+
+
+class TestAsyncClient:
+    """Test cases for the asyncio AsyncClient."""
+
+    def test_concurrent_calls_share_connections(self, port):
+        """Test that many concurrent coroutines get their own results over few connections."""
+        async def run():
+            async with AsyncClient(port=port, pool_size=2) as client:
+                await asyncio.gather(*(client.put("user1", f"f{i}", str(i)) for i in range(200)))
+                values = await asyncio.gather(*(client.get("user1", f"f{i}")
+                                                for i in range(200)))
+                assert values == [str(i) for i in range(200)]
+                assert client.pool.size <= 2
+                with pytest.raises(ValueError):
+                    await client.scan_page("user1", limit=0)
+                assert await client.ping() == "pong"
+        asyncio.run(run())
+
+    def test_pipeline_and_iterators(self, port):
+        """Test async pipelines and the async scan iterators."""
+        async def run():
+            async with AsyncClient(port=port) as client:
+                async with client.pipeline() as pipe:
+                    pipe.put_many_at(100, [("user1", f"field{i:03d}", "x") for i in range(300)])
+                    pipe.get_at(100, "user1", "field007")
+                assert pipe.results == [None, "x"]
+                fields = [field async for field in client.iter_scan_at(100, "user1")]
+                assert len(fields) == 300
+        asyncio.run(run())
+
+    def test_connection_failure_fails_waiting_calls(self, port):
+        """Test that calls waiting on a dropped connection raise and later calls reconnect."""
+        async def run():
+            async with AsyncClient(port=port, pool_size=1) as client:
+                await client.put("user1", "name", "Alice")
+                conn = await client.pool.acquire()
+                conn._writer.transport.abort()
+                with pytest.raises(ConnectionError):
+                    await client.get("user1", "name")
+                assert await client.get("user1", "name") == "Alice"
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
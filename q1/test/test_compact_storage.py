@@ -0,0 +1,68 @@
+"""
+Compact Storage Unit Tests
+
+Test suite for the compact version chain representation.
+Run with: python -m pytest test/test_compact_storage.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+class TestCompactStorage:
+    """Test cases for lone versions and expiry-free permanent entries."""
+
+    def test_single_write_stores_lone_version(self):
+        """Test that a field written once holds a bare tuple, without an expiry slot."""
+        db = InMemoryDB()
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at_with_ttl(100, "user1", "session", "abc", 50)
+
+        fields = db._pages["user1"].fields
+        assert fields["name"] == (100, "Alice")
+        assert fields["session"] == (100, "abc", 150)
+
+    def test_second_write_grows_a_chain(self):
+        """Test that writes before and after a lone version keep history ordered."""
+        db = InMemoryDB()
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at(50, "user1", "name", "Early")
+        db.put_at(150, "user1", "name", "Late")
+
+        assert db._pages["user1"].fields["name"] == [(50, "Early"), (100, "Alice"), (150, "Late")]
+        values = [db.get_at(t, "user1", "name") for t in (40, 50, 120, 150)]
+        assert values == [None, "Early", "Alice", "Late"]
+
+    def test_rewrite_at_same_timestamp_replaces(self):
+        """Test that rewriting a lone version at its timestamp keeps it lone."""
+        db = InMemoryDB()
+        db.put_at_with_ttl(100, "user1", "session", "abc", 50)
+        db.put_at(100, "user1", "session", "def")
+
+        assert db._pages["user1"].fields["session"] == (100, "def")
+        assert db.get_at(200, "user1", "session") == "def"
+
+    def test_deleting_lone_version_drops_field(self):
+        """Test that deleting a field written once removes it entirely."""
+        db = InMemoryDB()
+        db.put_at(100, "user1", "name", "Alice")
+        assert db.delete_at(100, "user1", "name") is True
+        assert "user1" not in db._pages
+
+    def test_field_names_are_shared_across_keys(self):
+        """Test that equal field names built separately are stored once."""
+        db = InMemoryDB()
+        for i in range(3):
+            db.put_at(100, f"user{i}", "".join(["na", "me"]), "x")
+
+        names = [next(iter(db._pages[f"user{i}"].fields)) for i in range(3)]
+        assert names[0] is names[1] is names[2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,159 @@
+"""
+Concurrency Unit Tests
+
+Test suite for ConcurrentDB, the thread-safe InMemoryDB.
+Run with: python -m pytest test/test_concurrency.py -v
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from concurrent_db import ConcurrentDB
+
+
+def run_threads(target, count):
+    errors = []
+
+    def wrapper(n):
+        try:
+            target(n)
+        except Exception as exc:  # surfaced by the assertion below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=wrapper, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+class TestConcurrentDB:
+    """Test cases for ConcurrentDB used from several threads."""
+
+    @pytest.mark.parametrize("field_index", ["sorted", "radix"])
+    def test_writers_and_readers_on_shared_keys(self, field_index):
+        """Test that concurrent puts, deletes, gets and scans leave the expected state."""
+        db = ConcurrentDB(field_index=field_index, lock_stripes=4)
+
+        def worker(n):
+            for i in range(300):
+                key = f"key{i % 10}"
+                db.put_at(i, key, f"f{n}-{i}", str(i))
+                db.get_at(i, key, f"f{n}-{i}")
+                db.scan_with_prefix_at(i, key, f"f{n}")
+                if i % 3 == 0:
+                    assert db.delete_at(i, key, f"f{n}-{i}")
+
+        run_threads(worker, 8)
+        for n in range(8):
+            fields = [field for i in range(10)
+                      for field in db.scan_with_prefix_at(1000, f"key{i}", f"f{n}-")]
+            assert len(fields) == 200
+
+    def test_backup_is_a_consistent_cut(self):
+        """Test that a batch written during backups is never split across one."""
+        db = ConcurrentDB(lock_stripes=8)
+        stop = threading.Event()
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                i += 1
+                db.put_many_at(i, [("a", "x", str(i)), ("b", "x", str(i))])
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        for backup in range(50):
+            db.backup_at(backup)
+            time.sleep(0.001)
+        stop.set()
+        thread.join()
+
+        for backup in range(50):
+            db.restore_at(10**9, backup)
+            assert db.get_at(10**9, "a", "x") == db.get_at(10**9, "b", "x")
+
+    @pytest.mark.parametrize("backup_mode", ["cow", "delta"])
+    def test_reads_continue_through_backups_and_restores(self, backup_mode):
+        """Test writers, readers, backups and restores running together."""
+        db = ConcurrentDB(backup_mode=backup_mode, checkpoint_interval=4,
+                          compaction_budget=8, restore_budget=16, lock_stripes=16)
+        for i in range(200):
+            db.put_at(0, f"key{i}", "count", "0")
+
+        def worker(n):
+            for i in range(200):
+                key = f"key{(n * 37 + i) % 200}"
+                if n == 0 and i % 20 == 0:
+                    db.backup_at(i)
+                elif n == 1 and i % 50 == 49:
+                    db.restore_at(i, i - 10)
+                elif n % 2:
+                    db.put_at(i, key, "count", str(i))
+                else:
+                    db.scan_at(i, key)
+                    db.get_at(i, key, "count")
+
+        run_threads(worker, 8)
+        assert db.materialize_restore()
+        for i in range(200):
+            value = db.get_at(1000, f"key{i}", "count")
+            assert value is None or value.isdigit()
+
+    def test_iterator_runs_beside_writers(self):
+        """Test that a lazy scan interleaved with writes to the same key does not fail."""
+        db = ConcurrentDB(field_index="radix")
+        for i in range(1000):
+            db.put_at(0, "key", f"field{i:04d}", "x")
+
+        def worker(n):
+            if n == 0:
+                assert len(list(db.iter_scan_at(0, "key"))) >= 500
+            else:
+                for i in range(500):
+                    db.put_at(0, "key", f"extra{n}-{i}", "y")
+                    db.delete_at(0, "key", f"field{i:04d}")
+
+        run_threads(worker, 4)
+
+    def test_background_work_runs_in_one_thread(self):
+        """Test that expired fields are reclaimed by the threads' own operations."""
+        db = ConcurrentDB(expiry_budget=1000)
+        for i in range(100):
+            db.put_at_with_ttl(0, f"key{i}", "session", "abc", 10)
+
+        run_threads(lambda n: [db.get_at(20 + i, "other", "f") for i in range(50)], 4)
+        assert db.purge_expired(100) == 0
+
+    def test_reads_proceed_while_writes_are_held_off(self):
+        """Test that a read does not wait for the locks a backup holds."""
+        db = ConcurrentDB(lock_stripes=4)
+        db.put_at(100, "user1", "name", "Alice")
+        done = threading.Event()
+
+        def writer():
+            db.put_at(110, "user1", "name", "Bob")
+            done.set()
+
+        with db._holding_all(pages=False):
+            thread = threading.Thread(target=writer)
+            thread.start()
+            assert db.get_at(120, "user1", "name") == "Alice"
+            assert not done.wait(0.05)
+        thread.join()
+        assert db.get_at(120, "user1", "name") == "Bob"
+
+    def test_invalid_stripes_rejected(self):
+        """Test that lock_stripes below one raises ValueError."""
+        with pytest.raises(ValueError):
+            ConcurrentDB(lock_stripes=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
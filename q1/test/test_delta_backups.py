@@ -0,0 +1,129 @@
+"""
+Delta Backup Unit Tests
+
+Test suite for delta backups, checkpoints and the backup compactor.
+Run with: python -m pytest test/test_delta_backups.py -v
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+def random_workload(dbs, seed, steps=400):
+    """Apply the same random operations to every database; return backup timestamps."""
+    rng = random.Random(seed)
+    backups = []
+    for timestamp in range(1, steps + 1):
+        op = rng.random()
+        key = f"key{rng.randrange(8)}"
+        field = f"field{rng.randrange(6)}"
+        ttl = rng.randrange(1, 40)
+        for db in dbs:
+            if op < 0.45:
+                db.put_at(timestamp, key, field, f"v{timestamp}")
+            elif op < 0.65:
+                db.put_at_with_ttl(timestamp, key, field, f"t{timestamp}", ttl)
+            elif op < 0.8:
+                db.delete_at(timestamp, key, field)
+            elif op < 0.95:
+                db.backup_at(timestamp)
+            else:
+                db.restore_at(timestamp, timestamp - ttl)
+        if 0.8 <= op < 0.95:
+            backups.append(timestamp)
+    return backups
+
+
+class TestDeltaBackups:
+    """Test cases for InMemoryDB(backup_mode="delta")."""
+
+    def test_unknown_backup_mode_rejected(self):
+        """Test that an unknown backup mode raises ValueError."""
+        with pytest.raises(ValueError):
+            InMemoryDB(backup_mode="full")
+
+    def test_delta_holds_only_changed_keys(self):
+        """Test that a delta backup records just the keys written since the last backup."""
+        db = InMemoryDB(backup_mode="delta")
+        for i in range(10):
+            db.put_at(100, f"key{i}", "field1", "value")
+        db.backup_at(110)  # First backup is a checkpoint
+
+        db.put_at(120, "key3", "field1", "changed")
+        db.delete_at(120, "key4", "field1")
+        db.backup_at(130)
+
+        assert set(db._backups[130].pages) == {"key3", "key4"}
+
+        db.restore_at(200, 130)
+        assert db.get_at(200, "key3", "field1") == "changed"
+        assert db.get_at(200, "key4", "field1") is None
+        assert db.get_at(200, "key5", "field1") == "value"
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_copy_on_write_backups(self, seed):
+        """Test that delta backups restore exactly what full backups restore."""
+        full = InMemoryDB()
+        delta = InMemoryDB(backup_mode="delta", checkpoint_interval=3,
+                           max_backup_chain=5, compaction_budget=2)
+        backups = random_workload([full, delta], seed)
+        assert backups
+
+        timestamp = 10_000
+        for backup in backups:
+            timestamp += 100
+            full.restore_at(timestamp, backup)
+            delta.restore_at(timestamp, backup)
+            for i in range(8):
+                for offset in (0, 20, 50):
+                    assert (delta.scan_at(timestamp + offset, f"key{i}")
+                            == full.scan_at(timestamp + offset, f"key{i}"))
+
+    def test_chain_limit_forces_checkpoint(self):
+        """Test that backup_at takes a checkpoint instead of exceeding max_backup_chain."""
+        db = InMemoryDB(backup_mode="delta", checkpoint_interval=100,
+                        max_backup_chain=2, compaction_budget=0)
+        for timestamp in range(100, 150, 10):
+            db.put_at(timestamp, "key1", f"field{timestamp}", "value")
+            db.backup_at(timestamp)
+
+        assert [db._backups[t].depth() for t in range(100, 150, 10)] == [0, 1, 2, 0, 1]
+
+    def test_compactor_folds_long_chains(self):
+        """Test that deltas past checkpoint_interval are folded into checkpoints."""
+        db = InMemoryDB(backup_mode="delta", checkpoint_interval=2,
+                        max_backup_chain=10, compaction_budget=1)
+        for i in range(5):
+            db.put_at(100, f"key{i}", "field1", "value")
+        for timestamp in (110, 120, 130):
+            db.put_at(timestamp, "key0", "field1", f"v{timestamp}")
+            db.backup_at(timestamp)
+
+        # The fold of the backup at 130 proceeds one key per operation
+        assert db._backups[130].depth() == 2
+        for _ in range(10):
+            db.get_at(140, "key0", "field1")
+        assert db._backups[130].depth() == 0
+
+        db.put_at(150, "key0", "field1", "v150")
+        db.backup_at(150)
+        db.put_at(160, "key0", "field1", "v160")
+        db.backup_at(160)
+        db.put_at(170, "key0", "field1", "v170")
+        db.backup_at(170)
+        assert db.compact_backups() >= 1
+        assert max(snapshot.depth() for snapshot in db._backups.values()) < 2
+
+        db.restore_at(300, 160)
+        assert db.get_at(300, "key0", "field1") == "v160"
+        assert db.get_at(300, "key4", "field1") == "value"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
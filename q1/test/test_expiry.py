@@ -0,0 +1,116 @@
+"""
+Expiration Unit Tests
+
+Test suite for the TTL expiration queue and InMemoryDB.purge_expired.
+Run with: python -m pytest test/test_expiry.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from expiry import ExpiryQueue, MIN_COMPACT_SIZE
+
+
+class TestExpiryQueue:
+    """Test cases for the ExpiryQueue class."""
+
+    def test_pop_due_in_order(self):
+        """Test that due entries are popped earliest first."""
+        queue = ExpiryQueue()
+        queue.push(150, "key1", "b")
+        queue.push(120, "key1", "a")
+        queue.push(200, "key2", "c")
+
+        assert list(queue.pop_due(160)) == [(120, "key1", "a"), (150, "key1", "b")]
+        assert queue.next_due() == 200
+        assert len(queue) == 1
+
+    def test_pop_due_respects_limit(self):
+        """Test that pop_due stops after limit entries."""
+        queue = ExpiryQueue()
+        for i in range(5):
+            queue.push(100 + i, "key1", f"f{i}")
+
+        assert len(list(queue.pop_due(200, limit=2))) == 2
+        assert len(queue) == 3
+
+    def test_compact_drops_stale_and_duplicate_entries(self):
+        """Test that compaction keeps one current entry per field."""
+        queue = ExpiryQueue()
+        for i in range(MIN_COMPACT_SIZE):
+            queue.push(100 + i, "key1", "session")
+        queue.push(5000, "key1", "session")
+
+        assert queue.needs_compaction()
+        queue.compact(lambda until, key, field: until == 5000)
+
+        assert len(queue) == 1
+        assert not queue.needs_compaction()
+
+
+class TestPurgeExpired:
+    """Test cases for reclaiming expired fields from InMemoryDB."""
+
+    def test_purge_expired_reclaims_fields(self):
+        """Test that purged fields are gone even for earlier reads."""
+        db = InMemoryDB()
+        db.put_at(100, "key1", "permanent", "p")
+        db.put_at_with_ttl(100, "key1", "session", "s", 50)
+        db.put_at_with_ttl(100, "key2", "session", "s", 10)
+
+        assert db.purge_expired(140) == 1
+
+        # key2 is gone entirely; key1 keeps its live and not yet expired fields
+        assert db.scan_at(105, "key2") == []
+        assert db.scan_at(120, "key1") == ["permanent(p)", "session(s)"]
+
+        assert db.purge_expired(150) == 1
+        assert db.scan_at(120, "key1") == ["permanent(p)"]
+
+    def test_purge_expired_reclaims_deleted_fields(self):
+        """Test that deletions are reclaimed together with their history."""
+        db = InMemoryDB()
+        db.put_at(100, "key1", "field1", "value1")
+        db.delete_at(150, "key1", "field1")
+
+        assert db.get_at(120, "key1", "field1") == "value1"
+        assert db.purge_expired(150) == 1
+        assert db.get_at(120, "key1", "field1") is None
+
+    def test_purge_expired_skips_rewritten_fields(self):
+        """Test that a field refreshed with a longer TTL survives the purge."""
+        db = InMemoryDB()
+        db.put_at_with_ttl(100, "key1", "session", "old", 50)
+        db.put_at_with_ttl(140, "key1", "session", "new", 50)
+
+        assert db.purge_expired(160) == 0
+        assert db.get_at(160, "key1", "session") == "new"
+        assert db.purge_expired(190) == 1
+        assert db.get_at(160, "key1", "session") is None
+
+    def test_active_expiry_is_bounded_per_operation(self):
+        """Test that the clock-driven sweep reclaims at most expiry_budget fields per call."""
+        db = InMemoryDB(expiry_budget=2)
+        for i in range(5):
+            db.put_at_with_ttl(100, "key1", f"f{i}", "v", 10)
+
+        # Every call reclaims up to two fields before doing its own work
+        assert len(db.scan_at(200, "key1")) == 0
+        assert len(db.scan_at(105, "key1")) == 1
+        assert len(db.scan_at(105, "key1")) == 0
+
+    def test_active_expiry_disabled_by_default(self):
+        """Test that without a budget, reads can still go back in time."""
+        db = InMemoryDB()
+        db.put_at_with_ttl(100, "key1", "session", "s", 10)
+
+        assert db.get_at(500, "key1", "session") is None
+        assert db.get_at(105, "key1", "session") == "s"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
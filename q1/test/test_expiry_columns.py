@@ -0,0 +1,186 @@
+"""
+Columnar Expiry Index Unit Tests
+
+Test suite for ExpiryColumns and the expiry_index="columns" option, with and
+without NumPy.
+Run with: python -m pytest test/test_expiry_columns.py -v
+"""
+
+import pytest
+import random
+import sys
+import os
+import threading
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import expiry_columns
+from concurrent_db import ConcurrentDB
+from expiry_columns import ExpiryColumns
+from impl import InMemoryDB
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    """Run a test against the NumPy column and against the pure-Python fallback."""
+    if request.param == "numpy":
+        if expiry_columns.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(expiry_columns, "np", None)
+    return request.param
+
+
+class TestExpiryColumns:
+    """Test cases for the columnar expiry index."""
+
+    def test_rows_follow_fields(self, backend):
+        """Test that rescheduling overwrites a row and discarding frees it for reuse."""
+        columns = ExpiryColumns()
+        columns.push(150, "user1", "session")
+        columns.push(120, "user1", "token")
+        assert len(columns) == 2 and columns.next_due() == 120
+        columns.push(170, "user1", "token")
+        assert len(columns) == 2 and columns.next_due() == 150
+        columns.discard("user1", "session")
+        columns.discard("user1", "missing")
+        assert columns.next_due() == 170
+        columns.push(130, "user2", "session")
+        assert len(columns._refs) == 2  # The freed row was reused
+        assert columns.next_due() == 130
+
+    def test_pop_due_earliest_first_with_limit(self, backend):
+        """Test that pop_due returns due entries in time order, at most limit of them."""
+        columns = ExpiryColumns()
+        for i, until in enumerate([140, 110, 200, 120, 130]):
+            columns.push(until, f"user{i}", "session")
+        assert list(columns.pop_due(135, limit=2)) == [(110, "user1", "session"),
+                                                      (120, "user3", "session")]
+        assert list(columns.pop_due(135)) == [(130, "user4", "session")]
+        assert list(columns.pop_due(135)) == []
+        assert len(columns) == 2 and columns.next_due() == 140
+
+    def test_counts_and_histogram(self, backend):
+        """Test live counts and remaining-TTL buckets, including growth past the initial capacity."""
+        columns = ExpiryColumns()
+        for i in range(3000):
+            columns.push(100 + i, f"user{i}", "session")
+        columns.discard("user0", "session")
+        assert columns.count_live(1100) == 1999
+        assert columns.histogram(1100, (10, 100, 1000)) == [10, 90, 900, 999]
+        assert sum(1 for _ in columns.pop_due(1100)) == 1000
+        assert columns.count_live(0) == 1999
+
+
+    def test_block_minimums_stay_exact(self, backend):
+        """Test that next_due and pop_due match a plain dict across many blocks of rows."""
+        rng = random.Random(11)
+        columns = ExpiryColumns()
+        expected = {}
+        for _ in range(10_000):
+            ref = (f"user{rng.randrange(5000)}", "session")
+            action = rng.random()
+            if action < 0.7:
+                expected[ref] = rng.randrange(100, 100_000)
+                columns.push(expected[ref], *ref)
+            elif action < 0.95:
+                expected.pop(ref, None)
+                columns.discard(*ref)
+            else:
+                horizon = rng.randrange(100, 10_000)
+                popped = list(columns.pop_due(horizon, limit=rng.choice([-1, 5])))
+                assert popped == sorted(popped, key=lambda entry: entry[0])
+                for until, key, field in popped:
+                    assert until <= horizon and expected.pop((key, field)) == until
+                if popped:
+                    assert min(expected.values(), default=float("inf")) >= popped[-1][0]
+            assert columns.next_due() == min(expected.values(), default=float("inf"))
+
+
+class TestColumnsOption:
+    """Test cases for InMemoryDB(expiry_index="columns")."""
+
+    def test_purge_and_ttl_stats(self, backend):
+        """Test that purges, rewrites and deletes keep the rows exact."""
+        db = InMemoryDB(expiry_index="columns")
+        db.put_at_with_ttl(100, "user1", "session", "abc", 50)
+        db.put_at_with_ttl(100, "user1", "token", "t", 500)
+        db.put_at_with_ttl(100, "user2", "session", "xyz", 5)
+        db.put_at(100, "user2", "name", "Bob")
+        assert db.ttl_stats_at(120) == {"live": 2, "expired": 1, "histogram": [0, 1, 1, 0, 0, 0]}
+
+        db.put_at(120, "user1", "token", "forever")
+        db.delete_at(120, "user2", "name")
+        assert len(db._expiry) == 3
+        assert db.ttl_stats_at(130, edges=(25,)) == {"live": 1, "expired": 2, "histogram": [1, 0]}
+        assert db.purge_expired(160) == 3
+        assert len(db._expiry) == 0
+        assert db.scan_at(160, "user1") == ["token(forever)"]
+        assert db.scan_at(160, "user2") == []
+
+    def test_restore_clears_rows(self, backend):
+        """Test that a restore drops the rows of the replaced pages and restored keys rejoin as loaded."""
+        db = InMemoryDB(expiry_index="columns", restore_budget=10)
+        db.put_at_with_ttl(100, "user1", "session", "abc", 50)
+        db.backup_at(110)
+        db.put_at_with_ttl(120, "user2", "session", "xyz", 50)
+        db.restore_at(200, 110)
+        assert db.ttl_stats_at(200)["live"] == 0
+        db.get_at(201, "user1", "session")  # Copies the restored key in
+        assert db.ttl_stats_at(201) == {"live": 1, "expired": 0,
+                                        "histogram": [0, 1, 0, 0, 0, 0]}
+
+    def test_matches_the_heap(self, backend):
+        """Test random TTL writes, deletes and purges against the same database on the heap."""
+        rng = random.Random(9)
+        heap = InMemoryDB()
+        columns = InMemoryDB(expiry_index="columns")
+        for step in range(4000):
+            t = 100 + step // 4
+            key = f"user{rng.randrange(20)}"
+            field = f"f{rng.randrange(4)}"
+            roll = rng.random()
+            ttl = rng.randrange(1, 200)
+            for db in (heap, columns):
+                if roll < 0.4:
+                    db.put_at_with_ttl(t, key, field, "v", ttl)
+                elif roll < 0.6:
+                    db.put_at(t, key, field, "v")
+                elif roll < 0.7:
+                    db.delete_at(t, key, field)
+            if step % 200 == 0:
+                assert columns.ttl_stats_at(t) == heap.ttl_stats_at(t)
+                assert columns.purge_expired(t - 50) == heap.purge_expired(t - 50)
+        assert columns.ttl_stats_at(t) == heap.ttl_stats_at(t)
+        assert [columns.scan_at(t, f"user{i}") for i in range(20)] == \
+            [heap.scan_at(t, f"user{i}") for i in range(20)]
+
+    def test_concurrent_db_and_bad_option(self, backend):
+        """Test ConcurrentDB on columns and that an unknown expiry index is refused."""
+        db = ConcurrentDB(lock_stripes=4, expiry_index="columns")
+        db.put_many_at(100, [(f"user{i}", "session", "s", 10 * i + 10) for i in range(10)])
+        assert db.ttl_stats_at(150)["live"] == 5
+        assert db.purge_expired(150) == 5
+        with pytest.raises(ValueError):
+            InMemoryDB(expiry_index="bitmap")
+
+
+    def test_concurrent_due_check_holds_mutex(self, monkeypatch):
+        """Test that ConcurrentDB reads the earliest horizon under the lock _schedule takes."""
+        db = ConcurrentDB(lock_stripes=4, expiry_index="columns", expiry_budget=10)
+        next_due = db._expiry.next_due
+        checked = []
+
+        def locked_next_due():
+            # Background steps hold every write lock instead, which keeps _schedule out too
+            checked.append(db._mutex.locked() or db._owner == threading.get_ident())
+            return next_due()
+
+        monkeypatch.setattr(db._expiry, "next_due", locked_next_due)
+        db.put_at_with_ttl(100, "user1", "session", "abc", 10)
+        db.get_at(120, "user1", "session")
+        assert checked and all(checked)
+        assert db.ttl_stats_at(120)["live"] == 0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,99 @@
+"""
+Expiry Summary Unit Tests
+
+Test suite for the per-key expiry summary behind the scan fast path.
+Run with: python -m pytest test/test_expiry_summary.py -v
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import FOREVER, InMemoryDB
+
+
+def summary(db, key):
+    page = db._pages[key]
+    return page.ttl_fields, page.fast_from, page.fast_until, page.dead
+
+
+class TestExpirySummary:
+    """Test cases for ttl_fields, fast_from, fast_until and dead on key pages."""
+
+    def test_keys_without_ttls(self):
+        """Test that a key without TTLs is fast from its latest write on."""
+        db = InMemoryDB()
+        db.put_many_at(100, [("user1", "name", "Alice"), ("user1", "age", "25")])
+        db.put_at(110, "user1", "name", "Bob")
+        assert summary(db, "user1") == (0, 110, FOREVER, None)
+        assert db.scan_at(120, "user1") == ["age(25)", "name(Bob)"]
+        assert db.scan_at(105, "user1") == ["age(25)", "name(Alice)"]
+
+    def test_expired_fields_are_repaired_in_place(self):
+        """Test that the first read past an expiry marks the field dead and keeps later reads fast."""
+        db = InMemoryDB()
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at_with_ttl(100, "user1", "session", "abc", 50)
+        db.put_at_with_ttl(100, "user1", "token", "t", 80)
+        assert summary(db, "user1") == (2, 100, 150, None)
+        assert db.scan_at(149, "user1") == ["name(Alice)", "session(abc)", "token(t)"]
+
+        assert db.scan_at(160, "user1") == ["name(Alice)", "token(t)"]
+        assert summary(db, "user1") == (2, 150, 180, frozenset({"session"}))
+        assert db.scan_at(200, "user1") == ["name(Alice)"]
+        assert summary(db, "user1") == (2, 180, FOREVER, frozenset({"session", "token"}))
+        assert db.scan_at(120, "user1") == ["name(Alice)", "session(abc)", "token(t)"]
+
+        db.put_at(210, "user1", "session", "xyz")
+        assert summary(db, "user1")[0] == 1 and summary(db, "user1")[3] == frozenset({"token"})
+        assert db.scan_at(220, "user1") == ["name(Alice)", "session(xyz)"]
+        db.purge_expired(220)
+        assert summary(db, "user1") == (0, 210, FOREVER, None)
+
+    def test_deletions_expire_fields(self):
+        """Test that a deleted field counts as expiring at its deletion."""
+        db = InMemoryDB()
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at(100, "user1", "age", "25")
+        db.delete_at(110, "user1", "age")
+        assert summary(db, "user1") == (1, 110, 110, None)
+        assert db.scan_at(110, "user1") == ["name(Alice)"]
+        assert summary(db, "user1")[3] == frozenset({"age"})
+        db.put_at(100, "user1", "gone", "x")
+        db.delete_at(100, "user1", "gone")
+        assert summary(db, "user1")[0] == 1
+
+    @pytest.mark.parametrize("field_index", ["sorted", "radix"])
+    def test_scans_match_field_reads(self, field_index):
+        """Test random TTL writes, deletes, backups and restores with scans checked against get_at."""
+        rng = random.Random(3)
+        db = InMemoryDB(field_index=field_index)
+        fields = [f"f{i}" for i in range(6)]
+        for step in range(3000):
+            key = f"user{rng.randrange(3)}"
+            t = rng.randrange(100, 300) if rng.random() < 0.3 else 100 + step // 10
+            roll = rng.random()
+            if roll < 0.3:
+                db.put_at(t, key, rng.choice(fields), str(t))
+            elif roll < 0.6:
+                db.put_at_with_ttl(t, key, rng.choice(fields), str(t), rng.randrange(1, 40))
+            elif roll < 0.7:
+                db.delete_at(t, key, rng.choice(fields))
+            elif roll < 0.71:
+                db.backup_at(t)
+            elif roll < 0.715:
+                db.restore_at(t, t - 20)
+            elif roll < 0.72:
+                db.purge_expired(t - 100)
+            expected = [f"{field}({value})" for field in fields
+                        for value in [db.get_at(t, key, field)] if value is not None]
+            assert db.scan_at(t, key) == expected
+            assert db.scan_range_at(t, key, "f2", "f5") == \
+                [entry for entry in expected if "f2" <= entry[:2] < "f5"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,92 @@
+"""
+Field Index Unit Tests
+
+Test suite for the sorted per-key field index used by the scan methods.
+Run with: python -m pytest test/test_field_index.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB, SortedFieldIndex
+
+
+class TestSortedFieldIndex:
+    """Test cases for the SortedFieldIndex class."""
+
+    def test_add_keeps_lexicographic_order(self):
+        """Test that fields are kept sorted regardless of insertion order."""
+        index = SortedFieldIndex()
+
+        for field in ["zebra", "apple", "mango", "banana"]:
+            index.add(field)
+
+        assert list(index) == ["apple", "banana", "mango", "zebra"]
+
+    def test_add_ignores_duplicates(self):
+        """Test that adding an indexed field twice stores it once."""
+        index = SortedFieldIndex()
+
+        index.add("apple")
+        index.add("apple")
+
+        assert list(index) == ["apple"]
+        assert len(index) == 1
+
+    def test_discard(self):
+        """Test removing present and absent fields."""
+        index = SortedFieldIndex()
+        index.add("apple")
+        index.add("banana")
+
+        index.discard("apple")
+        index.discard("cherry")  # Absent fields are ignored
+
+        assert list(index) == ["banana"]
+
+    def test_iter_prefix_stops_after_matches(self):
+        """Test that prefix iteration yields only the matching run of fields."""
+        index = SortedFieldIndex()
+        for field in ["a", "ab", "abc", "abd", "ac", "b", ""]:
+            index.add(field)
+
+        assert list(index.iter_prefix("ab")) == ["ab", "abc", "abd"]
+        assert list(index.iter_prefix("")) == ["", "a", "ab", "abc", "abd", "ac", "b"]
+        assert list(index.iter_prefix("z")) == []
+
+    def test_iter_prefix_after(self):
+        """Test resuming iteration after a field, including ones not indexed."""
+        index = SortedFieldIndex()
+        fields = ["", "a", "ab", "abc", "abd", "ac", "b"]
+        for field in fields:
+            index.add(field)
+
+        for after in ["", "a", "abb", "abd", "b", "z"]:
+            assert list(index.iter_prefix("", after=after)) == [f for f in fields if f > after]
+        assert list(index.iter_prefix("ab", after="abc")) == ["abd"]
+        assert list(index.iter_prefix("b", after="a")) == ["b"]
+
+    def test_index_follows_database_writes(self):
+        """Test that put and delete keep the database index in sync."""
+        db = InMemoryDB()
+
+        db.put("key1", "cherry", "3")
+        db.put("key1", "apple", "1")
+        db.put("key1", "banana", "2")
+        db.delete("key1", "banana")
+        db.put("key1", "apple", "one")
+
+        assert db.scan("key1") == ["apple(one)", "cherry(3)"]
+
+        # Deleting the last field drops the key entirely
+        db.delete("key1", "apple")
+        db.delete("key1", "cherry")
+        assert db.scan("key1") == []
+        assert db.scan_with_prefix("key1", "") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
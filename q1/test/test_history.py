@@ -0,0 +1,80 @@
+"""
+Field History Unit Tests
+
+Test suite for reads at past timestamps through per-field version chains.
+Run with: python -m pytest test/test_history.py -v
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+class TestHistory:
+    """Test cases for time-travel reads and out-of-order writes."""
+
+    def test_reads_at_any_past_timestamp(self):
+        """Test that every earlier value stays readable without a backup."""
+        db = InMemoryDB()
+        for t in range(100, 1100, 10):
+            db.put_at(t, "sensor1", "reading", str(t))
+
+        assert db.get_at(99, "sensor1", "reading") is None
+        assert db.get_at(100, "sensor1", "reading") == "100"
+        assert db.get_at(555, "sensor1", "reading") == "550"
+        assert db.scan_at(1000, "sensor1") == ["reading(1000)"]
+        assert db.get("sensor1", "reading") == "1090"
+
+    def test_out_of_order_writes_land_in_place(self):
+        """Test that late writes are slotted into history by timestamp."""
+        db = InMemoryDB()
+        for t in (500, 100, 300, 200, 400, 300):
+            db.put_at(t, "user1", "name", f"v{t}")
+
+        chain = db._pages["user1"].fields["name"]
+        assert [version[0] for version in chain] == [100, 200, 300, 400, 500]
+        assert [db.get_at(t, "user1", "name") for t in (150, 250, 350, 450, 550)] == \
+            ["v100", "v200", "v300", "v400", "v500"]
+
+    def test_matches_a_reference_history(self):
+        """Test random puts, TTL puts and deletes at random timestamps against a model."""
+        rng = random.Random(7)
+        for field_index in ("sorted", "radix"):
+            db = InMemoryDB(field_index=field_index)
+            history = {}  # field -> {timestamp: (value, expires_at)}
+            for _ in range(2000):
+                field = f"f{rng.randrange(8)}"
+                t = rng.randrange(1, 500)
+                roll = rng.random()
+                if roll < 0.6:
+                    db.put_at(t, "user1", field, str(t))
+                    history.setdefault(field, {})[t] = (str(t), None)
+                elif roll < 0.8:
+                    ttl = rng.randrange(1, 50)
+                    db.put_at_with_ttl(t, "user1", field, str(t), ttl)
+                    history.setdefault(field, {})[t] = (str(t), t + ttl)
+                elif db.delete_at(t, "user1", field):
+                    history[field][t] = (None, None)
+
+            def expected(field, t):
+                written = [ts for ts in history.get(field, {}) if ts <= t]
+                if not written:
+                    return None
+                value, expires_at = history[field][max(written)]
+                return value if expires_at is None or t < expires_at else None
+
+            for t in range(0, 560, 7):
+                for i in range(8):
+                    assert db.get_at(t, "user1", f"f{i}") == expected(f"f{i}", t)
+                assert db.scan_at(t, "user1") == [
+                    f"f{i}({expected(f'f{i}', t)})" for i in range(8)
+                    if expected(f"f{i}", t) is not None]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
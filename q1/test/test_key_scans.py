@@ -0,0 +1,133 @@
+"""
+Key Scan Unit Tests
+
+Test suite for scans across keys through the sorted key index.
+Run with: python -m pytest test/test_key_scans.py -v
+"""
+
+import pytest
+import threading
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from concurrent_db import ConcurrentDB
+from impl import InMemoryDB
+from sharded import ShardedDB
+
+
+def tenants(db):
+    """Load keys of two tenants, with one key holding only a TTL field."""
+    db.put_many_at(100, [(f"tenant{t}:user:{u}", "name", "x") for t in (1, 2) for u in range(5)])
+    db.put_at_with_ttl(100, "tenant1:user:9", "session", "abc", 50)
+
+
+class TestKeyScans:
+    """Test cases for scan_keys and scan_keys_range."""
+
+    @pytest.mark.parametrize("field_index", ["sorted", "radix"])
+    def test_prefix_scan(self, field_index):
+        """Test that a prefix scan returns the matching keys in order, skipping expired ones."""
+        db = InMemoryDB(field_index=field_index)
+        tenants(db)
+        assert db.scan_keys_at(120, "tenant1:") == \
+            [f"tenant1:user:{u}" for u in range(5)] + ["tenant1:user:9"]
+        assert db.scan_keys_at(150, "tenant1:") == [f"tenant1:user:{u}" for u in range(5)]
+        assert db.scan_keys_at(150, "tenant3:") == []
+        assert len(db.scan_keys()) == 10
+
+    @pytest.mark.parametrize("field_index", ["sorted", "radix"])
+    def test_range_scan_with_limit(self, field_index):
+        """Test half-open ranges, limits and paging by the last key returned."""
+        db = InMemoryDB(field_index=field_index)
+        tenants(db)
+        assert db.scan_keys_range_at(120, "tenant1:user:3", "tenant2:user:1") == [
+            "tenant1:user:3", "tenant1:user:4", "tenant1:user:9", "tenant2:user:0"]
+        page = db.scan_keys_range_at(120, None, None, limit=4)
+        assert page == [f"tenant1:user:{u}" for u in range(4)]
+        page = db.scan_keys_range_at(120, page[-1] + chr(0), None, limit=4)
+        assert page == ["tenant1:user:4", "tenant1:user:9", "tenant2:user:0", "tenant2:user:1"]
+        with pytest.raises(ValueError):
+            db.scan_keys_range(limit=0)
+
+    @pytest.mark.parametrize("field_index", ["sorted", "radix"])
+    def test_empty_and_inverted_ranges(self, field_index):
+        """Test that a range whose end is at or before an existing start key is empty."""
+        db = InMemoryDB(field_index=field_index)
+        tenants(db)
+        key = "tenant1:user:3"
+        assert db.scan_keys_range_at(120, key, key) == []
+        assert db.scan_keys_range_at(120, key, "tenant1:user:1") == []
+        assert db.scan_keys_range(key, key) == []
+        assert db.scan_keys_range_at(120, key, key + chr(0)) == [key]
+        concurrent = ConcurrentDB(lock_stripes=4, field_index=field_index)
+        tenants(concurrent)
+        assert concurrent.scan_keys_range_at(120, key, key) == []
+
+    def test_index_follows_writes_after_first_scan(self):
+        """Test that keys created or dropped after the index is built are reflected."""
+        db = InMemoryDB()
+        tenants(db)
+        db.scan_keys()
+        db.put_at(110, "tenant1:admin", "name", "root")
+        db.delete_at(110, "tenant1:user:0", "name")
+        assert db.scan_keys_at(110, "tenant1:")[:2] == ["tenant1:admin", "tenant1:user:1"]
+        assert db.scan_keys_at(105, "tenant1:")[:2] == ["tenant1:user:0", "tenant1:user:1"]
+        db.purge_expired(200)
+        assert "tenant1:user:0" not in db._keys and "tenant1:user:9" not in db._keys
+
+    def test_many_keys_across_chunks(self):
+        """Test scans that run past several index chunks with most keys expired."""
+        db = InMemoryDB()
+        db.put_many_at(100, [(f"k{i:05d}", "f", "v", 10) for i in range(2000)])
+        db.put_many_at(100, [(f"k{i:05d}", "g", "v") for i in range(0, 2000, 500)])
+        assert db.scan_keys_at(200, "k") == ["k00000", "k00500", "k01000", "k01500"]
+        assert db.scan_keys_range_at(200, "k00001", limit=2) == ["k00500", "k01000"]
+
+    def test_restored_keys_are_scanned(self):
+        """Test that keys read through a restored backup appear and deleted ones do not."""
+        db = InMemoryDB()
+        tenants(db)
+        db.scan_keys()
+        db.backup_at(110)
+        db.put_at(120, "tenant3:user:0", "name", "x")
+        db.restore_at(130, 110)
+        db.delete_at(130, "tenant2:user:4", "name")
+        assert db.scan_keys_at(130, "tenant2:") == [f"tenant2:user:{u}" for u in range(4)]
+        assert db.scan_keys_at(130, "tenant3:") == []
+        assert db.scan_keys_at(130, "tenant1:user:9") == ["tenant1:user:9"]
+
+    def test_concurrent_writers_and_key_scans(self):
+        """Test key scans beside threads that create keys in every stripe."""
+        db = ConcurrentDB(lock_stripes=4)
+        db.put_at(100, "seed", "f", "v")
+        db.scan_keys()
+
+        def writer(n):
+            for i in range(200):
+                db.put_at(100, f"w{n}:{i:03d}", "f", "v")
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            keys = db.scan_keys_at(100, "w")
+            assert keys == sorted(keys)
+        for thread in threads:
+            thread.join()
+        assert len(db.scan_keys_at(100, "w")) == 800
+
+    def test_sharded_scans_merge_shards(self):
+        """Test that ShardedDB merges the key scans of its shards in order."""
+        with ShardedDB(shards=3) as db:
+            tenants(db)
+            assert db.scan_keys_at(120, "tenant2:") == [f"tenant2:user:{u}" for u in range(5)]
+            assert db.scan_keys_range_at(150, "tenant1:user:3", limit=3) == \
+                ["tenant1:user:3", "tenant1:user:4", "tenant2:user:0"]
+            assert db.scan_keys_range_at(150, "tenant1:user:3", "tenant1:user:3") == []
+            assert db.scan_keys_range_at(150, "tenant1:user:3", "tenant1:user:0") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
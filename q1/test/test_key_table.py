@@ -0,0 +1,85 @@
+"""
+Key Table Unit Tests
+
+Test suite for the chunked key table that backups share with the live database.
+Run with: python -m pytest test/test_key_table.py -v
+"""
+
+import pickle
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from key_table import CHUNKS, KeyTable
+
+
+class TestKeyTable:
+    """Test cases for the KeyTable class."""
+
+    def test_matches_dict(self):
+        """Test that random sets, deletes and copies behave like dicts, copies included."""
+        rng = random.Random(4)
+        tables = [KeyTable()]
+        dicts = [{}]
+        for _ in range(20_000):
+            i = rng.randrange(len(tables))
+            key = f"user{rng.randrange(3000)}"
+            action = rng.random()
+            if action < 0.6:
+                tables[i][key] = dicts[i][key] = rng.randrange(100)
+            elif action < 0.95:
+                if key in dicts[i]:
+                    del tables[i][key], dicts[i][key]
+                else:
+                    with pytest.raises(KeyError):
+                        del tables[i][key]
+            elif len(tables) < 8:
+                tables.append(tables[i].copy())
+                dicts.append(dict(dicts[i]))
+        for table, expected in zip(tables, dicts):
+            assert dict(table.items()) == expected
+            assert len(table) == len(expected)
+            assert sorted(table) == sorted(expected)
+            assert table.get("missing") is None and "missing" not in table
+
+    def test_copy_shares_untouched_chunks(self):
+        """Test that a write after copy() copies the directory and one chunk, not the table."""
+        table = KeyTable((f"user{i}", i) for i in range(10 * CHUNKS))
+        backup = table.copy()
+        assert table._directory is backup._directory
+        table["user1"] = -1
+        shared = sum(a is b for a, b in zip(table._directory, backup._directory))
+        assert shared == CHUNKS - 1
+        assert backup["user1"] == 1 and table["user1"] == -1
+        del backup["user2"]
+        assert "user2" in table and "user2" not in backup
+        assert len(table) == 10 * CHUNKS and len(backup) == 10 * CHUNKS - 1
+
+    def test_pickle(self):
+        """Test that a pickled table and a copy loaded with it stay apart."""
+        table = KeyTable({"user1": 1, "user2": 2})
+        table, backup = pickle.loads(pickle.dumps((table, table.copy())))
+        table["user3"] = 3
+        assert dict(table.items()) == {"user1": 1, "user2": 2, "user3": 3}
+        assert dict(backup.items()) == {"user1": 1, "user2": 2}
+
+    def test_write_after_backup_copies_one_chunk(self):
+        """Test that the first write after backup_at leaves the backup's chunks shared."""
+        db = InMemoryDB()
+        for i in range(5000):
+            db.put_at(100, f"user{i}", "name", str(i))
+        db.backup_at(100)
+        db.put_at(110, "user7", "name", "changed")
+        backup = db._backups.floor(100).pages
+        shared = sum(a is b for a, b in zip(db._pages._directory, backup._directory))
+        assert shared == CHUNKS - 1
+        db.restore_at(120, 100)
+        assert db.get_at(120, "user7", "name") == "7"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
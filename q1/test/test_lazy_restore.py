@@ -0,0 +1,164 @@
+"""
+Lazy Restore Unit Tests
+
+Test suite for restores that read through the backup and materialize it later.
+Run with: python -m pytest test/test_lazy_restore.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+@pytest.fixture(params=["sorted", "radix"])
+def db(request):
+    return InMemoryDB(field_index=request.param)
+
+
+def populate(db):
+    db.put_at_with_ttl(100, "user1", "session", "abc", 100)  # Expires at 200
+    db.put_at(100, "user1", "name", "Alice")
+    db.put_at(100, "user2", "name", "Bob")
+    db.backup_at(150)  # Session has 50 remaining
+
+
+class TestLazyRestore:
+    """Test cases for reading and writing through a restored base layer."""
+
+    def test_reads_do_not_copy_pages(self, db):
+        """Test that gets and scans after a restore leave the key table empty."""
+        populate(db)
+        db.restore_at(1000, 150)
+
+        assert db.get_at(1000, "user1", "name") == "Alice"
+        assert db.scan_at(1000, "user1") == ["name(Alice)", "session(abc)"]
+        assert db.scan_with_prefix_at(1000, "user1", "s") == ["session(abc)"]
+        assert db._pages == {}
+
+    def test_expiry_computed_on_read(self, db):
+        """Test that remaining TTLs are counted from the restore time on read."""
+        populate(db)
+        db.restore_at(1000, 150)
+
+        assert db.get_at(1049, "user1", "session") == "abc"
+        assert db.get_at(1050, "user1", "session") is None
+        assert db.scan_at(1050, "user1") == ["name(Alice)"]
+
+    def test_base_hidden_before_restore_time(self, db):
+        """Test that restored fields are not visible before restored_at."""
+        populate(db)
+        db.restore_at(1000, 150)
+
+        assert db.get_at(999, "user1", "name") is None
+        assert db.scan_at(999, "user1") == []
+
+    def test_write_copies_only_that_key(self, db):
+        """Test that the first write to a key copies it into the overlay."""
+        populate(db)
+        db.restore_at(1000, 150)
+
+        db.put_at(1010, "user1", "name", "Alicia")
+        assert set(db._pages) == {"user1"}
+        assert db.get_at(1010, "user1", "name") == "Alicia"
+        assert db.get_at(1049, "user1", "session") == "abc"
+        assert db.get_at(1050, "user1", "session") is None
+        assert db.get_at(1010, "user2", "name") == "Bob"
+
+    def test_delete_through_base(self, db):
+        """Test deleting a field that is only present in the base layer."""
+        populate(db)
+        db.restore_at(1000, 150)
+
+        assert db.delete_at(1010, "user2", "name") is True
+        assert db.get_at(1010, "user2", "name") is None
+        assert db.delete_at(1010, "user2", "missing") is False
+
+    def test_materialize_restore(self, db):
+        """Test copying the base in bounded steps until it is dropped."""
+        populate(db)
+        db.restore_at(1000, 150)
+
+        assert db.materialize_restore(1) is False
+        assert db.materialize_restore() is True
+        assert db._base is None
+        assert db.get_at(1049, "user1", "session") == "abc"
+        assert db.get_at(1050, "user1", "session") is None
+        assert db.scan_at(1010, "user2") == ["name(Bob)"]
+
+    def test_restore_budget_materializes_per_operation(self):
+        """Test that restore_budget copies keys as operations run."""
+        db = InMemoryDB(restore_budget=1)
+        populate(db)
+        db.restore_at(1000, 150)
+
+        db.get_at(1000, "user1", "name")
+        db.get_at(1000, "user1", "name")
+        db.get_at(1000, "user1", "name")
+        assert db._base is None
+        assert db.get_at(1000, "user2", "name") == "Bob"
+
+    def test_nested_restore_layers(self, db):
+        """Test TTLs adjusted through a restore of a backup of a restored state."""
+        populate(db)
+        db.restore_at(300, 150)  # Session expires at 350
+        db.backup_at(320)  # 30 remaining, read through the base
+
+        db.restore_at(500, 320)  # Session expires at 530
+        assert db.get_at(529, "user1", "session") == "abc"
+        assert db.get_at(530, "user1", "session") is None
+        db.materialize_restore()
+        assert db.get_at(529, "user1", "session") == "abc"
+        assert db.get_at(530, "user1", "session") is None
+
+    def test_backup_after_materialize_starts_checkpoint(self):
+        """Test that delta backups stay readable once the base is dropped."""
+        db = InMemoryDB(backup_mode="delta")
+        populate(db)
+        db.restore_at(300, 150)
+        db.put_at(310, "user3", "name", "Carol")
+        db.backup_at(320)
+        db.materialize_restore()
+        db.put_at(330, "user3", "name", "Caroline")
+        db.backup_at(340)
+
+        db.restore_at(400, 340)
+        assert db.scan_at(409, "user1") == ["name(Alice)", "session(abc)"]
+        assert db.scan_at(410, "user1") == ["name(Alice)"]
+        assert db.get_at(400, "user2", "name") == "Bob"
+        assert db.get_at(400, "user3", "name") == "Caroline"
+
+
+    @pytest.mark.parametrize("backup_mode", ["cow", "delta"])
+    def test_repeated_restores_bound_base_depth(self, backup_mode):
+        """Test that restore and backup cycles keep at most max_base_depth layers and pin no old backups."""
+        db = InMemoryDB(backup_mode=backup_mode, max_base_depth=3,
+                        backup_retention=[(100, 1000)])
+        db.put_at_with_ttl(100, "user1", "session", "abc", 10_000)
+        db.put_at(100, "user2", "name", "Bob")
+        db.backup_at(100)
+        for i in range(1, 50):
+            db.restore_at(100 * i + 50, 100 * i)  # The backup taken at the end of the last cycle
+            db.put_at(100 * i + 60, f"user{i + 2}", "name", str(i))
+            db.backup_at(100 * (i + 1))
+            assert db._base_depth() <= 3
+            for timestamp in db.list_backups():
+                layers = 0
+                base = db._backups[timestamp].base
+                while base is not None:
+                    layers += 1
+                    base = base[0].base
+                assert layers <= 3
+        db.restore_at(5050, 5000)
+        assert db.scan_at(5050, "user1") == ["session(abc)"]
+        assert db.get_at(5050, "user2", "name") == "Bob"
+        assert [db.get_at(5050, f"user{i + 2}", "name") for i in (1, 25, 49)] == ["1", "25", "49"]
+        # Each of the 50 restores, 50 after its backup, moves the expiry from 10100 by 50
+        assert db.get_at(12_599, "user1", "session") == "abc"
+        assert db.get_at(12_600, "user1", "session") is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,130 @@
+"""
+Radix Index Unit Tests
+
+Test suite for the radix tree field index and the radix-backed InMemoryDB.
+Run with: python -m pytest test/test_radix_index.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from radix_index import FOREVER, RadixFieldIndex
+
+
+class TestRadixFieldIndex:
+    """Test cases for the RadixFieldIndex class."""
+
+    def test_iteration_is_lexicographic(self):
+        """Test that fields come back sorted whatever the insertion order."""
+        index = RadixFieldIndex()
+        fields = ["session:web:2", "session:api:1", "session:web:10", "s", "", "zebra"]
+
+        for field in fields:
+            index.add(field)
+
+        assert list(index) == sorted(fields)
+        assert len(index) == len(fields)
+
+    def test_iter_prefix_inside_an_edge(self):
+        """Test prefixes that end in the middle of a compressed edge."""
+        index = RadixFieldIndex()
+        for field in ["session:web:eu-west:1", "session:web:eu-west:2", "sessions"]:
+            index.add(field)
+
+        assert list(index.iter_prefix("session:web:eu")) == [
+            "session:web:eu-west:1",
+            "session:web:eu-west:2",
+        ]
+        assert list(index.iter_prefix("session")) == [
+            "session:web:eu-west:1",
+            "session:web:eu-west:2",
+            "sessions",
+        ]
+        assert list(index.iter_prefix("session:api")) == []
+
+    def test_iter_prefix_after(self):
+        """Test resuming iteration after a field, including ones not indexed."""
+        index = RadixFieldIndex()
+        fields = ["", "a", "ab", "abc", "abd", "ac", "b", "session:1", "session:2"]
+        for field in fields:
+            index.add(field)
+
+        for after in ["", "a", "ab", "abb", "abc", "abz", "b", "session:", "session:2", "z"]:
+            assert list(index.iter_prefix("", after=after)) == [f for f in fields if f > after]
+        assert list(index.iter_prefix("ab", after="abc")) == ["abd"]
+        assert list(index.iter_prefix("session:", after="a")) == ["session:1", "session:2"]
+
+    def test_discard_merges_nodes(self):
+        """Test that removing fields keeps the remaining ones reachable."""
+        index = RadixFieldIndex()
+        for field in ["abc", "abd", "ab", "b"]:
+            index.add(field)
+
+        index.discard("ab")
+        index.discard("abc")
+        index.discard("missing")
+
+        assert list(index) == ["abd", "b"]
+        assert list(index.iter_prefix("ab")) == ["abd"]
+
+        index.add("abc")
+        assert list(index.iter_prefix("ab")) == ["abc", "abd"]
+
+    def test_expired_subtrees_are_skipped(self):
+        """Test that iter_prefix prunes fields whose horizon has passed."""
+        index = RadixFieldIndex()
+        for field in ["s:1", "s:2", "t:1"]:
+            index.add(field)
+        index.set_until("s:1", 150)
+        index.set_until("s:2", 200)
+        index.set_until("t:1", FOREVER)
+
+        assert list(index.iter_prefix("", 100)) == ["s:1", "s:2", "t:1"]
+        assert list(index.iter_prefix("", 150)) == ["s:2", "t:1"]
+        assert list(index.iter_prefix("s:", 200)) == []
+        # Without a timestamp nothing is pruned
+        assert list(index.iter_prefix("s:")) == ["s:1", "s:2"]
+
+
+class TestRadixBackedDB:
+    """Test cases for InMemoryDB constructed with the radix field index."""
+
+    def test_unknown_index_rejected(self):
+        """Test that an unknown field index name raises ValueError."""
+        with pytest.raises(ValueError):
+            InMemoryDB(field_index="btree")
+
+    def test_scans_match_sorted_index(self):
+        """Test that both index types return identical scan results."""
+        dbs = [InMemoryDB(), InMemoryDB(field_index="radix")]
+        for db in dbs:
+            db.put_at(100, "key1", "session:web:1", "a")
+            db.put_at_with_ttl(100, "key1", "session:web:2", "b", 50)
+            db.put_at(110, "key1", "session:api:1", "c")
+            db.put_at_with_ttl(120, "key1", "sessions", "d", 10)
+            db.delete_at(125, "key1", "session:api:1")
+
+        for timestamp in [90, 100, 124, 125, 130, 149, 150, 200]:
+            for prefix in ["", "s", "session:", "session:web:", "x"]:
+                expected = dbs[0].scan_with_prefix_at(timestamp, "key1", prefix)
+                assert dbs[1].scan_with_prefix_at(timestamp, "key1", prefix) == expected
+
+    def test_overwrite_extends_expired_field(self):
+        """Test that rewriting an expired field makes its subtree visible again."""
+        db = InMemoryDB(field_index="radix")
+
+        db.put_at_with_ttl(100, "key1", "session:1", "old", 10)
+        assert db.scan_at(120, "key1") == []
+
+        db.put_at(130, "key1", "session:1", "new")
+        assert db.scan_at(130, "key1") == ["session:1(new)"]
+        # Reads before the rewrite still see the original entry
+        assert db.scan_at(105, "key1") == ["session:1(old)"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
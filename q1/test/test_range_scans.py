@@ -0,0 +1,105 @@
+"""
+Range Scan Unit Tests
+
+Test suite for bounded field-range scans with limits and reverse order.
+Run with: python -m pytest test/test_range_scans.py -v
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from concurrent_db import ConcurrentDB
+from impl import InMemoryDB, SortedFieldIndex
+from radix_index import RadixFieldIndex
+from sharded import ShardedDB
+
+
+def events(db, hours=range(10, 20)):
+    """Write one event per hour plus a field outside the evt: bucket."""
+    db.put_many_at(100, [("stream1", f"evt:20261018T{h}0000", str(h)) for h in hours])
+    db.put_at(100, "stream1", "meta", "m")
+
+
+class TestRangeScans:
+    """Test cases for scan_range and scan_range_at."""
+
+    @pytest.mark.parametrize("field_index", ["sorted", "radix"])
+    def test_bounds_limit_and_reverse(self, field_index):
+        """Test half-open bounds, limits, and reverse order keeping the latest fields."""
+        db = InMemoryDB(field_index=field_index)
+        events(db)
+        assert db.scan_range("stream1", "evt:20261018T120000", "evt:20261018T150000") == [
+            "evt:20261018T120000(12)", "evt:20261018T130000(13)", "evt:20261018T140000(14)"]
+        assert db.scan_range("stream1", "evt:", "evt;", 3, reverse=True) == [
+            "evt:20261018T190000(19)", "evt:20261018T180000(18)", "evt:20261018T170000(17)"]
+        assert db.scan_range("stream1", None, "evt:20261018T110000") == ["evt:20261018T100000(10)"]
+        assert db.scan_range("stream1", "f") == ["meta(m)"]
+        assert db.scan_range("stream1", "x") == []
+        assert db.scan_range("missing") == []
+        with pytest.raises(ValueError):
+            db.scan_range("stream1", limit=0)
+
+    @pytest.mark.parametrize("field_index", ["sorted", "radix"])
+    def test_skips_expired_and_deleted_fields(self, field_index):
+        """Test that a limit counts only fields visible at the timestamp."""
+        db = InMemoryDB(field_index=field_index)
+        events(db)
+        db.put_at_with_ttl(100, "stream1", "evt:20261018T200000", "20", 10)
+        db.delete_at(105, "stream1", "evt:20261018T190000")
+        assert db.scan_range_at(105, "stream1", "evt:", "evt;", 2, reverse=True) == [
+            "evt:20261018T200000(20)", "evt:20261018T180000(18)"]
+        assert db.scan_range_at(110, "stream1", "evt:", "evt;", 2, reverse=True) == [
+            "evt:20261018T180000(18)", "evt:20261018T170000(17)"]
+        assert db.scan_range_at(102, "stream1", "evt:20261018T190000", limit=1) == [
+            "evt:20261018T190000(19)"]
+
+    def test_restored_key_is_range_scanned(self):
+        """Test range scans of a key read through a restored backup."""
+        db = InMemoryDB()
+        events(db)
+        db.backup_at(110)
+        db.restore_at(120, 110)
+        assert db.scan_range_at(120, "stream1", "evt:", "evt;", 1, reverse=True) == [
+            "evt:20261018T190000(19)"]
+        assert db.scan_range_at(115, "stream1") == []
+
+    def test_index_ranges_match_a_sorted_list(self):
+        """Test iter_range of both indexes against a filtered sorted list."""
+        rng = random.Random(5)
+        alphabet = "ab:1"
+        for _ in range(200):
+            names = {"".join(rng.choice(alphabet) for _ in range(rng.randrange(6)))
+                     for _ in range(rng.randrange(30))}
+            indexes = [SortedFieldIndex(), RadixFieldIndex()]
+            for index in indexes:
+                for name in names:
+                    index.add(name)
+            for _ in range(10):
+                start, end = (rng.choice([None, "".join(rng.choice(alphabet)
+                                                        for _ in range(rng.randrange(5)))])
+                              for _ in range(2))
+                expected = sorted(name for name in names
+                                  if (start is None or name >= start)
+                                  and (end is None or name < end))
+                for index in indexes:
+                    assert list(index.iter_range(start, end)) == expected
+                    assert list(index.iter_range(start, end, reverse=True)) == expected[::-1]
+
+    def test_concurrent_and_sharded_range_scans(self):
+        """Test that ConcurrentDB and ShardedDB serve range scans."""
+        db = ConcurrentDB(lock_stripes=4)
+        events(db)
+        assert db.scan_range_at(100, "stream1", "evt:", "evt;", 1, reverse=True) == [
+            "evt:20261018T190000(19)"]
+        with ShardedDB(shards=2) as sharded:
+            events(sharded)
+            assert sharded.scan_range_at(100, "stream1", "evt:", "evt;", 1) == [
+                "evt:20261018T100000(10)"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
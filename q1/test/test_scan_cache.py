@@ -0,0 +1,139 @@
+"""
+Scan Cache Unit Tests
+
+Test suite for the version-stamped scan result cache.
+Run with: python -m pytest test/test_scan_cache.py -v
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from concurrent_db import ConcurrentDB
+from impl import InMemoryDB
+from scan_cache import ScanCache
+
+
+def counters(db):
+    stats = db.scan_cache_stats()
+    return stats["hits"], stats["misses"], stats["evictions"]
+
+
+class TestScanCache:
+    """Test cases for scan caching with scan_cache_size."""
+
+    def test_repeat_scans_hit_until_the_key_is_written(self):
+        """Test that only writes to the scanned key invalidate its cached results."""
+        db = InMemoryDB(scan_cache_size=100)
+        db.put("user1", "age", "25")
+        db.put("user1", "address", "123 Main St")
+        for _ in range(3):
+            assert db.scan_with_prefix("user1", "a") == ["address(123 Main St)", "age(25)"]
+        assert counters(db) == (2, 1, 0)
+
+        db.put("user2", "age", "30")
+        assert db.scan_with_prefix("user1", "a") == ["address(123 Main St)", "age(25)"]
+        db.put("user1", "age", "26")
+        assert db.scan_with_prefix("user1", "a") == ["address(123 Main St)", "age(26)"]
+        db.delete("user1", "address")
+        assert db.scan_with_prefix("user1", "a") == ["age(26)"]
+        assert db.scan("user1") == ["age(26)"]
+        assert counters(db) == (3, 4, 0)
+
+    def test_entries_are_valid_only_inside_their_time_window(self):
+        """Test that a hit needs a timestamp between the scan's and the first expiry or later version."""
+        db = InMemoryDB(scan_cache_size=100)
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at_with_ttl(100, "user1", "session", "abc", 50)
+        db.put_at(200, "user1", "name", "Bob")
+        assert db.scan_at(120, "user1") == ["name(Alice)", "session(abc)"]
+        assert db.scan_at(149, "user1") == ["name(Alice)", "session(abc)"]
+        assert db.scan_at(150, "user1") == ["name(Alice)"]
+        assert db.scan_at(199, "user1") == ["name(Alice)"]
+        assert db.scan_at(200, "user1") == ["name(Bob)"]
+        assert db.scan_at(110, "user1") == ["name(Alice)", "session(abc)"]
+        assert counters(db) == (2, 4, 0)
+
+    def test_results_are_copies(self):
+        """Test that changing a returned list leaves the cached results alone."""
+        db = InMemoryDB(scan_cache_size=100)
+        db.put("user1", "name", "Alice")
+        db.scan("user1").append("junk")
+        assert db.scan("user1") == ["name(Alice)"]
+
+    def test_lru_eviction_bounded_by_result_count(self):
+        """Test that the cache holds at most scan_cache_size results, evicting the least recently used."""
+        db = InMemoryDB(scan_cache_size=4)
+        for i in range(3):
+            db.put_many_at(100, [(f"user{i}", "a", "1"), (f"user{i}", "b", "2")])
+        db.scan_at(100, "user0")
+        db.scan_at(100, "user1")
+        db.scan_at(100, "user0")
+        db.scan_at(100, "user2")  # Evicts user1, the least recently used
+        assert db.scan_cache_stats() == {"hits": 1, "misses": 3, "evictions": 1,
+                                         "entries": 2, "size": 4}
+        db.scan_at(100, "user0")
+        db.scan_at(100, "user1")
+        assert counters(db) == (2, 4, 2)
+
+        cache = ScanCache(max_size=2)
+        cache.put("big", 1, 100, 200, ["a", "b", "c"])
+        assert len(cache) == 0 and cache.get("big", 1, 100) is None
+
+    def test_restore_and_recreated_keys(self):
+        """Test that restores clear the cache and a key dropped and written again is rescanned."""
+        db = InMemoryDB(scan_cache_size=100)
+        db.put_at_with_ttl(100, "user1", "session", "abc", 10)
+        db.backup_at(105)
+        assert db.scan_at(105, "user1") == ["session(abc)"]
+        db.purge_expired(120)
+        db.put_at(120, "user1", "session", "xyz")
+        assert db.scan_at(120, "user1") == ["session(xyz)"]
+        db.restore_at(130, 105)
+        assert db.scan_at(130, "user1") == ["session(abc)"]
+        assert db.scan_at(135, "user1") == []
+        assert db.scan_cache_stats()["entries"] == 1
+
+    def test_matches_an_uncached_database(self):
+        """Test random writes, deletes, restores and scans against the same database without a cache."""
+        rng = random.Random(11)
+        for field_index in ("sorted", "radix"):
+            plain = InMemoryDB(field_index=field_index)
+            cached = InMemoryDB(field_index=field_index, scan_cache_size=20)
+            for _ in range(3000):
+                key = f"user{rng.randrange(4)}"
+                field = rng.choice(["a1", "a2", "b1", "b2"])
+                t = rng.randrange(100, 400)
+                roll = rng.random()
+                ttl = rng.randrange(1, 30)
+                for db in (plain, cached):
+                    if roll < 0.15:
+                        db.put_at(t, key, field, str(t))
+                    elif roll < 0.25:
+                        db.put_at_with_ttl(t, key, field, str(t), ttl)
+                    elif roll < 0.3:
+                        db.delete_at(t, key, field)
+                    elif roll < 0.31:
+                        db.backup_at(t)
+                    elif roll < 0.315:
+                        db.restore_at(t, t - 50)
+                prefix = rng.choice(["", "a", "b1", "c"])
+                assert cached.scan_with_prefix_at(t, key, prefix) == \
+                    plain.scan_with_prefix_at(t, key, prefix)
+            assert cached.scan_cache_stats()["hits"] > 0
+
+    def test_concurrent_db_caches(self):
+        """Test that ConcurrentDB serves cached scans."""
+        db = ConcurrentDB(lock_stripes=4, scan_cache_size=100)
+        db.put_many_at(100, [(f"user{i}", "name", str(i)) for i in range(10)])
+        assert db.scan_many_at(100, [f"user{i}" for i in range(10)]) == \
+            [[f"name({i})"] for i in range(10)]
+        assert db.scan_at(100, "user3") == ["name(3)"]
+        assert counters(db) == (1, 10, 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
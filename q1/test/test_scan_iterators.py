@@ -0,0 +1,106 @@
+"""
+Scan Iterator Unit Tests
+
+Test suite for the iter_scan* generators and the scan_page cursor API.
+Run with: python -m pytest test/test_scan_iterators.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import SCAN_CHUNK, InMemoryDB
+
+
+@pytest.fixture(params=["sorted", "radix"])
+def db(request):
+    return InMemoryDB(field_index=request.param)
+
+
+class TestScanIterators:
+    """Test cases for the lazily evaluated scans."""
+
+    def test_iterators_match_scans(self, db):
+        """Test that every iter_scan* variant yields what its scan returns."""
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at_with_ttl(100, "user1", "session", "abc", 10)
+        db.put_at(100, "user1", "score", "7")
+
+        assert list(db.iter_scan_at(105, "user1")) == db.scan_at(105, "user1")
+        expected = db.scan_with_prefix_at(105, "user1", "s")
+        assert list(db.iter_scan_with_prefix_at(105, "user1", "s")) == expected
+        assert list(db.iter_scan("user1")) == db.scan("user1")
+        assert list(db.iter_scan_with_prefix("user1", "s")) == ["score(7)", "session(abc)"]
+        assert list(db.iter_scan("nobody")) == []
+
+    def test_iterator_spans_several_chunks(self, db):
+        """Test iterating a key larger than one chunk, with expired fields between."""
+        count = 2 * SCAN_CHUNK + 10
+        for i in range(count):
+            if i % 3:
+                db.put_at(100, "big", f"f{i:05d}", str(i))
+            else:
+                db.put_at_with_ttl(100, "big", f"f{i:05d}", str(i), 5)
+
+        assert list(db.iter_scan_at(110, "big")) == db.scan_at(110, "big")
+        assert len(db.scan_at(100, "big")) == count
+
+    def test_iterator_is_lazy(self, db):
+        """Test that the first result arrives before later fields are read."""
+        for i in range(3 * SCAN_CHUNK):
+            db.put_at(100, "big", f"f{i:05d}", "v")
+
+        results = db.iter_scan_at(100, "big")
+        assert next(results) == "f00000(v)"
+        # A field written past the first chunk is still picked up
+        db.put_at(100, "big", "zzz", "late")
+        assert list(results)[-1] == "zzz(late)"
+
+    def test_scan_page_cursor(self, db):
+        """Test paging through a key with the returned cursor."""
+        for i in range(7):
+            db.put_at(100, "user1", f"f{i}", str(i))
+        db.put_at(100, "user1", "other", "x")
+
+        pages = []
+        cursor = None
+        while True:
+            page, cursor = db.scan_page_at(100, "user1", "f", after=cursor, limit=3)
+            pages.append(page)
+            if cursor is None:
+                break
+
+        assert pages == [["f0(0)", "f1(1)", "f2(2)"], ["f3(3)", "f4(4)", "f5(5)"], ["f6(6)"]]
+
+    def test_scan_page_resumes_after_deleted_cursor(self, db):
+        """Test that a cursor still works after its field is deleted."""
+        for field in ["a", "b", "c", "d"]:
+            db.put_at(100, "user1", field, field)
+
+        page, cursor = db.scan_page_at(100, "user1", limit=2)
+        assert (page, cursor) == (["a(a)", "b(b)"], "b")
+        db.delete_at(110, "user1", "b")
+        assert db.scan_page_at(110, "user1", after=cursor, limit=2) == (["c(c)", "d(d)"], "d")
+        assert db.scan_page_at(110, "user1", after="d", limit=2) == ([], None)
+
+    def test_scan_page_through_restored_base(self, db):
+        """Test paging through a key that is still read through a restored backup."""
+        for i in range(5):
+            db.put_at_with_ttl(100, "user1", f"f{i}", str(i), 100 if i % 2 else 10)
+        db.backup_at(105)
+        db.restore_at(200, 105)
+
+        assert db.scan_page("user1", limit=2) == (["f0(0)", "f1(1)"], "f1")
+        assert db.scan_page_at(204, "user1", after="f1", limit=2) == (["f2(2)", "f3(3)"], "f3")
+        assert db.scan_page_at(205, "user1", after="f1", limit=2) == (["f3(3)"], None)
+
+    def test_scan_page_rejects_non_positive_limit(self, db):
+        """Test that a limit below 1 raises ValueError."""
+        with pytest.raises(ValueError):
+            db.scan_page("user1", limit=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
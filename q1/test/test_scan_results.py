@@ -0,0 +1,74 @@
+"""
+Scan Result Format Unit Tests
+
+Test suite for the structured scan_results modes.
+Run with: python -m pytest test/test_scan_results.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB, ScanEntry
+
+
+def populate(db):
+    db.put_at(100, "user1", "name", "Alice")
+    db.put_at_with_ttl(100, "user1", "session", "abc", 50)
+
+
+class TestScanResults:
+    """Test cases for the string, tuple and entry scan result modes."""
+
+    def test_string_is_default(self):
+        """Test that scans keep returning "field(value)" strings by default."""
+        db = InMemoryDB()
+        populate(db)
+        assert db.scan_at(100, "user1") == ["name(Alice)", "session(abc)"]
+
+    def test_tuple_results(self):
+        """Test (field, value, expires_at) tuples from every scan method."""
+        db = InMemoryDB(scan_results="tuple")
+        populate(db)
+        expected = [("name", "Alice", None), ("session", "abc", 150)]
+
+        assert db.scan_at(100, "user1") == expected
+        assert db.scan("user1") == expected
+        assert db.scan_with_prefix_at(100, "user1", "s") == expected[1:]
+        assert db.scan_with_prefix("user1", "n") == expected[:1]
+        assert list(db.iter_scan_at(100, "user1")) == expected
+        assert db.scan_many_at(100, ["user1", "user2"]) == [expected, []]
+        assert db.scan_page_at(100, "user1", limit=1) == (expected[:1], "name")
+
+    def test_entry_results(self):
+        """Test that entries have named fields and format lazily to the legacy string."""
+        db = InMemoryDB(scan_results="entry")
+        populate(db)
+        name, session = db.scan_at(100, "user1")
+
+        assert isinstance(name, ScanEntry)
+        assert (session.field, session.value, session.expires_at) == ("session", "abc", 150)
+        assert name == ("name", "Alice", None)
+        assert [str(entry) for entry in (name, session)] == ["name(Alice)", "session(abc)"]
+
+    def test_expiry_through_restored_base(self):
+        """Test that expires_at reflects the TTL adjusted by a restore."""
+        db = InMemoryDB(scan_results="tuple")
+        populate(db)
+        db.backup_at(120)  # 30 remaining
+        db.restore_at(200, 120)
+
+        assert db.scan_at(200, "user1") == [("name", "Alice", None), ("session", "abc", 230)]
+        db.materialize_restore()
+        assert db.scan_at(200, "user1") == [("name", "Alice", None), ("session", "abc", 230)]
+
+    def test_unknown_mode_rejected(self):
+        """Test that an unknown scan_results value raises ValueError."""
+        with pytest.raises(ValueError):
+            InMemoryDB(scan_results="json")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,128 @@
+"""
+Network Server Unit Tests
+
+Test suite for the wire protocol and the asyncio server.
+Run with: python -m pytest test/test_server.py -v
+"""
+
+import asyncio
+import pytest
+import struct
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from protocol import FrameDecoder, ProtocolError, decode, encode
+from server import serve
+
+
+async def exchange(db, payload, replies):
+    """Serve db, send payload on one connection and read that many replies."""
+    server = await serve(db, port=0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(payload)
+    decoder = FrameDecoder()
+    received = []
+    while len(received) < replies:
+        data = await reader.read(65536)
+        if not data:
+            break
+        received.extend(decode(payload) for payload in decoder.feed(data))
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return received
+
+
+class TestProtocol:
+    """Test cases for frame encoding and decoding."""
+
+    def test_frames_split_anywhere(self):
+        """Test that messages decode however the byte stream is chunked."""
+        stream = encode(["put", "user1", "name", "Alicé"]) + encode(["get", "user1", "name"])
+        decoder = FrameDecoder()
+        payloads = []
+        for i in range(len(stream)):
+            payloads.extend(decoder.feed(stream[i:i + 1]))
+        assert [decode(payload) for payload in payloads] == \
+            [["put", "user1", "name", "Alicé"], ["get", "user1", "name"]]
+
+    def test_oversized_frame_stops_the_stream(self):
+        """Test that frames before an oversized one are returned and nothing after it."""
+        decoder = FrameDecoder(max_frame=20)
+        stream = encode(["ping"]) + encode(["put", "user1", "name", "x" * 20]) + encode(["ping"])
+        assert decoder.feed(stream) == [b'["ping"]']
+        assert isinstance(decoder.error, ProtocolError)
+        assert decoder.feed(encode(["ping"])) == []
+
+    def test_malformed_payload_rejected(self):
+        """Test that a payload that is not JSON raises ProtocolError."""
+        with pytest.raises(ProtocolError):
+            decode(b"{x}")
+
+
+class TestServer:
+    """Test cases for the asyncio server."""
+
+    def test_pipelined_requests_answered_in_order(self):
+        """Test that many requests sent at once get their replies in order."""
+        db = InMemoryDB()
+        requests = [["put_at", 100, "user1", f"f{i}", str(i)] for i in range(100)]
+        requests += [["get_at", 100, "user1", f"f{i}"] for i in range(100)]
+        requests.append(["scan_with_prefix_at", 100, "user1", "f1"])
+        replies = asyncio.run(exchange(db, b"".join(map(encode, requests)), len(requests)))
+
+        assert replies[:100] == [[True, None]] * 100
+        assert replies[100:200] == [[True, str(i)] for i in range(100)]
+        assert replies[200][1][:2] == ["f1(1)", "f10(10)"]
+
+    def test_level4_and_batches(self):
+        """Test backup, restore and batch commands over the wire."""
+        db = InMemoryDB()
+        requests = [
+            ["put_many_at", 100, [["user1", "session", "abc", 50], ["user1", "name", "Alice"]]],
+            ["backup_at", 120],
+            ["delete_at", 130, "user1", "name"],
+            ["restore_at", 200, 125],
+            ["get_many_at", 229, [["user1", "session"], ["user1", "name"]]],
+            ["get_at", 230, "user1", "session"],
+            ["list_backups"],
+        ]
+        replies = asyncio.run(exchange(db, b"".join(map(encode, requests)), len(requests)))
+        assert [reply[1] for reply in replies] == [
+            None, None, True, None, ["abc", "Alice"], None, [120]]
+
+    def test_errors_reported_and_connection_kept(self):
+        """Test that failing and unknown commands get error replies without closing."""
+        db = InMemoryDB()
+        requests = [["scan_page", "user1", "", None, 0], ["close"], ["get", "user1"], ["ping"]]
+        replies = asyncio.run(exchange(db, b"".join(map(encode, requests)), len(requests)))
+        assert replies[0][:2] == [False, "ValueError"]
+        assert replies[1][:2] == [False, "ValueError"]
+        assert replies[2][:2] == [False, "TypeError"]
+        assert replies[3] == [True, "pong"]
+
+    def test_malformed_payload_gets_an_error_reply(self):
+        """Test that a payload that cannot be decoded fails only its own request."""
+        db = InMemoryDB()
+        payload = encode(["ping"]) + struct.pack("!I", 3) + b"{x}" + encode(["ping"])
+        replies = asyncio.run(exchange(db, payload, 3))
+        assert replies[0] == [True, "pong"]
+        assert replies[1][:2] == [False, "ProtocolError"]
+        assert replies[2] == [True, "pong"]
+
+    def test_oversized_frame_closes_connection(self):
+        """Test that a frame over MAX_FRAME gets an error reply and a close."""
+        db = InMemoryDB()
+        payload = encode(["ping"]) + struct.pack("!I", 1 << 30) + encode(["ping"])
+        replies = asyncio.run(exchange(db, payload, 3))
+        assert replies[0] == [True, "pong"]
+        assert replies[1][:2] == [False, "ProtocolError"]
+        assert len(replies) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
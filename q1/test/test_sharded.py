@@ -0,0 +1,110 @@
+"""
+Sharded Database Unit Tests
+
+Test suite for ShardedDB, the multi-process hash-partitioned database.
+Run with: python -m pytest test/test_sharded.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sharded import ShardedDB
+
+
+@pytest.fixture
+def db():
+    database = ShardedDB(shards=3)
+    yield database
+    database.close()
+
+
+class TestShardedDB:
+    """Test cases for the ShardedDB class."""
+
+    def test_keys_spread_over_shards(self, db):
+        """Test that keys land on several shards and read back from them."""
+        for i in range(30):
+            db.put(f"user{i}", "name", str(i))
+        assert len({db.shard_of(f"user{i}") for i in range(30)}) == 3
+        assert [db.get(f"user{i}", "name") for i in range(30)] == [str(i) for i in range(30)]
+        assert db.delete("user1", "name")
+        assert db.get("user1", "name") is None
+
+    def test_scans_and_ttl(self, db):
+        """Test scans, prefix scans and TTL expiry on a shard."""
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at_with_ttl(100, "user1", "session", "abc", 50)
+        assert db.scan_at(120, "user1") == ["name(Alice)", "session(abc)"]
+        assert db.scan_with_prefix_at(160, "user1", "s") == []
+        assert db.get("user1", "session") is None  # The clock is at 160
+
+    def test_untimed_calls_use_the_clock_of_every_shard(self, db):
+        """Test that a timestamp seen on one shard moves the clock used on all."""
+        keys = [f"user{i}" for i in range(30)]
+        first = next(key for key in keys if db.shard_of(key) == 0)
+        other = next(key for key in keys if db.shard_of(key) == 1)
+        db.put_at_with_ttl(100, other, "session", "abc", 50)
+        db.put_at(200, first, "name", "Alice")
+        assert db.get(other, "session") is None
+
+    def test_batches_keep_item_order(self, db):
+        """Test that batch results come back in the order of the items."""
+        db.put_many_at(100, [(f"user{i}", "name", str(i)) for i in range(20)]
+                       + [("user3", "name", "last")])
+        assert db.get_many_at(100, [(f"user{i}", "name") for i in range(20)]) == \
+            [str(i) if i != 3 else "last" for i in range(20)]
+        deletes = [("user1", "name"), ("user1", "name"), ("nobody", "x")]
+        assert db.delete_many_at(110, deletes) == [True, False, False]
+        assert db.scan_many_at(110, ["user1", "user2"]) == [[], ["name(2)"]]
+
+    def test_backup_and_restore_on_every_shard(self, db):
+        """Test that a restore rewinds every shard to the same backup."""
+        db.put_many_at(100, [(f"user{i}", "name", "old") for i in range(20)])
+        db.put_at_with_ttl(100, "user1", "session", "abc", 50)  # 30 left at the backup
+        db.backup_at(120)
+        db.put_many_at(130, [(f"user{i}", "name", "new") for i in range(20)])
+        db.restore_at(200, 125)
+
+        assert db.get_many([(f"user{i}", "name") for i in range(20)]) == ["old"] * 20
+        assert db.get_at(229, "user1", "session") == "abc"
+        assert db.get_at(230, "user1", "session") is None
+        assert db.list_backups() == [120]
+
+    def test_iterators_and_pages(self, db):
+        """Test that lazy scans and pages cross the process boundary."""
+        db.put_many_at(100, [("user1", f"field{i:03d}", "x") for i in range(300)])
+        assert len(list(db.iter_scan_at(100, "user1"))) == 300
+        page, cursor = db.scan_page_at(100, "user1", limit=2)
+        assert page == ["field000(x)", "field001(x)"] and cursor == "field001"
+
+    def test_errors_are_raised_in_the_caller(self, db):
+        """Test that an exception in a shard is raised by the call and the shard keeps serving."""
+        with pytest.raises(ValueError):
+            db.scan_page("user1", limit=0)
+        db.put("user1", "name", "Alice")
+        assert db.get("user1", "name") == "Alice"
+
+    def test_write_ahead_log_per_shard(self, tmp_path):
+        """Test that every shard recovers from its own log."""
+        path = str(tmp_path / "db.wal")
+        with ShardedDB(shards=2, wal_path=path, wal_fsync="never") as db:
+            db.put_many_at(100, [(f"user{i}", "name", str(i)) for i in range(10)])
+            db.backup_at(110)
+        assert os.path.exists(path + ".0") and os.path.exists(path + ".1")
+
+        with ShardedDB(shards=2, wal_path=path) as db:
+            assert db.get_many([(f"user{i}", "name") for i in range(10)]) == \
+                [str(i) for i in range(10)]
+            assert db.list_backups() == [110]
+
+    def test_invalid_options_rejected(self):
+        """Test that options InMemoryDB rejects raise ValueError before any worker starts."""
+        with pytest.raises(ValueError):
+            ShardedDB(shards=2, field_index="hash")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
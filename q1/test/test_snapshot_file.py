@@ -0,0 +1,199 @@
+"""
+Snapshot File Unit Tests
+
+Test suite for memory-mapped snapshot files and restoring from them.
+Run with: python -m pytest test/test_snapshot_file.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from snapshot_file import PAGE_SIZE, MappedSnapshot, write_snapshot
+
+
+class TestMappedSnapshot:
+    """Test cases for write_snapshot and MappedSnapshot."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that keys and fields are read back sorted with their TTLs."""
+        path = str(tmp_path / "backup.snap")
+        write_snapshot(path, 120, [
+            ("user2", [("name", "Bob", None)]),
+            ("user1", [("session", "abc", 30), ("name", "Alice", None)]),
+            ("empty", []),
+        ])
+
+        snapshot = MappedSnapshot(path)
+        assert snapshot.timestamp == 120
+        assert list(snapshot) == ["user1", "user2"]
+        assert snapshot.lookup("user1") == [("name", "Alice", None), ("session", "abc", 30)]
+        assert snapshot.lookup("user3") is None
+        assert "user2" in snapshot and "empty" not in snapshot
+        snapshot.close()
+
+    def test_sections_page_aligned(self, tmp_path):
+        """Test that the file is a whole number of pages."""
+        path = str(tmp_path / "backup.snap")
+        write_snapshot(path, 0, [(f"key{i}", [("field", "x" * 100, None)]) for i in range(100)])
+
+        assert os.path.getsize(path) % PAGE_SIZE == 0
+
+    def test_non_ascii_ordering(self, tmp_path):
+        """Test binary search over keys ordered by their UTF-8 bytes."""
+        path = str(tmp_path / "backup.snap")
+        keys = ["é", "z", "a", "日本", "Z"]
+        write_snapshot(path, 0, [(key, [("f", key, None)]) for key in keys])
+
+        snapshot = MappedSnapshot(path)
+        for key in keys:
+            assert snapshot.lookup(key) == [("f", key, None)]
+        snapshot.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file in another format raises ValueError."""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not a snapshot" * 100)
+        with pytest.raises(ValueError):
+            MappedSnapshot(str(path))
+
+
+class TestExportAndAttach:
+    """Test cases for InMemoryDB.export_backup and attach_backup."""
+
+    def test_restore_from_exported_backup(self, tmp_path):
+        """Test restoring another database from an exported backup with TTLs adjusted."""
+        path = str(tmp_path / "backup.snap")
+        db = InMemoryDB()
+        db.put_at_with_ttl(100, "user1", "session", "abc", 100)  # Expires at 200
+        db.put_at(100, "user1", "name", "Alice")
+        db.put_at_with_ttl(100, "user2", "token", "t", 10)  # Expired at the backup
+        db.backup_at(150)
+        assert db.export_backup(160, path) == 150
+
+        other = InMemoryDB(field_index="radix")
+        assert other.attach_backup(path) == 150
+        other.restore_at(1000, 150)
+        assert other.scan_at(1000, "user1") == ["name(Alice)", "session(abc)"]
+        assert other.get_at(1050, "user1", "session") is None
+        assert other.scan_at(1000, "user2") == []
+
+        other.put_at(1010, "user1", "name", "Alicia")
+        other.materialize_restore()
+        assert other.get_at(1010, "user1", "name") == "Alicia"
+        assert other.get_at(1049, "user1", "session") == "abc"
+
+    def test_export_through_restored_base(self, tmp_path):
+        """Test exporting a backup taken while reading through a restore."""
+        path = str(tmp_path / "backup.snap")
+        db = InMemoryDB()
+        db.put_at_with_ttl(100, "user1", "session", "abc", 100)  # Expires at 200
+        db.backup_at(150)
+        db.restore_at(300, 150)  # Expires at 350
+        db.backup_at(320)  # 30 remaining
+        db.export_backup(320, path)
+
+        snapshot = MappedSnapshot(path)
+        assert snapshot.lookup("user1") == [("session", "abc", 30)]
+        snapshot.close()
+
+    def test_export_without_backup_rejected(self, tmp_path):
+        """Test that exporting with no backup at or before timestamp raises ValueError."""
+        db = InMemoryDB()
+        with pytest.raises(ValueError):
+            db.export_backup(100, str(tmp_path / "backup.snap"))
+
+    def test_files_closed_once_unused(self, tmp_path):
+        """Test that an attached file stays open while a base reads through it and is closed after."""
+        paths = [str(tmp_path / f"backup{i}.snap") for i in range(2)]
+        source = InMemoryDB()
+        source.put_at(100, "user1", "name", "Alice")
+        source.backup_at(150)
+        source.export_backup(150, paths[0])
+        source.export_backup(150, paths[1])
+
+        db = InMemoryDB(backup_retention=[(1000, 1000)])
+        db.backup_at(110)
+        db.attach_backup(paths[0])
+        first = db._backups[150].file
+        db.attach_backup(paths[1])  # Replaces the first
+        assert first.closed
+        second = db._backups[150].file
+        db.restore_at(200, 150)
+        db.backup_at(200)  # Reads through the restored file
+        assert db.materialize_restore()
+        assert not second.closed
+        db.backup_at(5000)  # Keeps one backup of the first 1000 ticks, the one at 110
+        assert db.list_backups() == [110, 5000]
+        assert second.closed
+        assert db.get_at(5000, "user1", "name") == "Alice"
+
+    def test_export_over_attached_file(self, tmp_path):
+        """Test that exporting over an attached file leaves the database that attached it reading the old one."""
+        path = str(tmp_path / "backup.snap")
+        source = InMemoryDB()
+        for i in range(2000):
+            source.put_at(1, f"user{i}", "name", f"name{i}")
+        source.backup_at(2)
+        source.export_backup(2, path)
+
+        db = InMemoryDB()
+        db.attach_backup(path)
+        other = InMemoryDB()
+        other.put_at(1, "user0", "name", "other")
+        other.backup_at(2)
+        other.export_backup(2, path)  # A much smaller file
+
+        db.restore_at(5, 2)
+        assert db.scan_at(6, "user1999") == ["name(name1999)"]
+        assert db.get_at(6, "user0", "name") == "name0"
+        assert not os.path.exists(path + ".tmp")
+        snapshot = MappedSnapshot(path)
+        assert snapshot.lookup("user0") == [("name", "other", None)]
+        snapshot.close()
+
+    def test_restored_pages_decoded_once(self, tmp_path, monkeypatch):
+        """Test that repeated reads of a key through an attached file decode it once."""
+        path = str(tmp_path / "backup.snap")
+        write_snapshot(path, 100, [("user1", [("b", "2", None), ("a", "1", 50)])])
+        db = InMemoryDB(field_index="radix")
+        db.attach_backup(path)
+        db.restore_at(120, 100)
+        lookups = []
+        file = db._backups[100].file
+        monkeypatch.setattr(file, "lookup", lambda key, lookup=file.lookup: lookups.append(key)
+                            or lookup(key), raising=False)
+        for timestamp in (120, 130, 169, 170):
+            db.scan_at(timestamp, "user1")
+            db.get_at(timestamp, "user2", "a")
+        assert db.scan_at(169, "user1") == ["a(1)", "b(2)"]
+        assert db.scan_at(170, "user1") == ["b(2)"]
+        assert sorted(lookups) == ["user1", "user2"]
+
+    def test_attached_backup_survives_checkpoint(self, tmp_path):
+        """Test that a write-ahead log checkpoint keeps an attached backup."""
+        snap_path = str(tmp_path / "backup.snap")
+        source = InMemoryDB()
+        source.put_at(100, "user1", "name", "Alice")
+        source.backup_at(100)
+        source.export_backup(100, snap_path)
+
+        wal_path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=wal_path)
+        db.attach_backup(snap_path)
+        db.close()
+        db = InMemoryDB(wal_path=wal_path)
+        db.checkpoint()
+        db.close()
+
+        db = InMemoryDB(wal_path=wal_path)
+        db.restore_at(200, 100)
+        assert db.get_at(200, "user1", "name") == "Alice"
+        db.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,104 @@
+"""
+Snapshot Unit Tests
+
+Test suite for the copy-on-write backups and lazily applied restores.
+Run with: python -m pytest test/test_snapshots.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+
+
+@pytest.fixture(params=["sorted", "radix"])
+def db(request):
+    return InMemoryDB(field_index=request.param)
+
+
+class TestCopyOnWriteBackups:
+    """Test cases for backups that share pages with the live database."""
+
+    def test_backup_shares_key_table(self):
+        """Test that consecutive backups without writes share one key table."""
+        db = InMemoryDB()
+        db.put_at(100, "key1", "field1", "value1")
+
+        db.backup_at(110)
+        db.backup_at(120)
+
+        assert db._backups[110].pages is db._backups[120].pages
+
+    def test_writes_after_backup_do_not_leak(self, db):
+        """Test that overwrites, deletes and purges leave the backup untouched."""
+        db.put_at(100, "key1", "field1", "value1")
+        db.put_at_with_ttl(100, "key1", "session", "abc", 30)
+        db.put_at(100, "key2", "field1", "value2")
+        db.backup_at(110)
+
+        db.put_at(120, "key1", "field1", "changed")
+        db.delete_at(120, "key2", "field1")
+        db.purge_expired(200)
+        db.put_at(120, "key3", "field1", "new")
+
+        db.restore_at(300, 110)
+        assert db.scan_at(300, "key1") == ["field1(value1)", "session(abc)"]
+        assert db.scan_at(300, "key2") == ["field1(value2)"]
+        assert db.scan_at(300, "key3") == []
+        assert db.get_at(319, "key1", "session") == "abc"
+        assert db.get_at(320, "key1", "session") is None
+
+    def test_restore_is_repeatable(self, db):
+        """Test that writing after a restore does not change the backup."""
+        db.put_at(100, "key1", "field1", "value1")
+        db.backup_at(110)
+
+        db.restore_at(200, 110)
+        db.put_at(210, "key1", "field1", "overwritten")
+        db.delete_at(210, "key1", "field1")
+        assert db.get_at(220, "key1", "field1") is None
+
+        db.restore_at(300, 110)
+        assert db.get_at(300, "key1", "field1") == "value1"
+
+    def test_deleted_key_does_not_reappear_from_base(self, db):
+        """Test that emptying a restored key hides it from the base layer."""
+        db.put_at(100, "key1", "field1", "value1")
+        db.backup_at(110)
+        db.restore_at(200, 110)
+
+        assert db.delete_at(210, "key1", "field1") is True
+        assert db.get_at(220, "key1", "field1") is None
+        assert db.scan_at(220, "key1") == []
+
+    def test_backup_of_restored_state(self, db):
+        """Test backups taken while keys are still read through a restored base."""
+        db.put_at_with_ttl(100, "user1", "session", "abc", 100)  # Expires at 200
+        db.put_at(100, "user1", "name", "Alice")
+        db.backup_at(120)  # 80 remaining
+
+        db.restore_at(300, 120)  # Session expires at 380
+        db.put_at(305, "user2", "name", "Bob")
+        db.backup_at(310)  # 70 remaining, user1 never touched since the restore
+
+        db.restore_at(500, 310)  # Session expires at 570
+        assert db.get_at(569, "user1", "session") == "abc"
+        assert db.get_at(570, "user1", "session") is None
+        assert db.scan_at(500, "user1") == ["name(Alice)", "session(abc)"]
+        assert db.get_at(500, "user2", "name") == "Bob"
+
+    def test_restore_without_backup_clears_base(self, db):
+        """Test that restoring with no eligible backup leaves an empty database."""
+        db.put_at(100, "key1", "field1", "value1")
+        db.backup_at(110)
+        db.restore_at(200, 110)
+
+        db.restore_at(300, 50)
+        assert db.scan_at(300, "key1") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
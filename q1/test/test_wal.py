@@ -0,0 +1,255 @@
+"""
+Write-Ahead Log Unit Tests
+
+Test suite for the write-ahead log and rebuilding a database from it.
+Run with: python -m pytest test/test_wal.py -v
+"""
+
+import pytest
+import sys
+import os
+import threading
+
+# Add parent directory to path to import impl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impl import InMemoryDB
+from wal import OP_DELETE, OP_PUT, OP_PUT_TTL, WriteAheadLog, decode, encode
+
+
+class TestWriteAheadLog:
+    """Test cases for the WriteAheadLog class."""
+
+    def test_encode_round_trip(self):
+        """Test that payloads decode to the opcode and arguments encoded."""
+        payload = encode(OP_PUT_TTL, (100, "user1", "séssion", "abc", -5))
+        assert decode(payload) == (OP_PUT_TTL, (100, "user1", "séssion", "abc", -5))
+
+    def test_records_survive_reopen(self, tmp_path):
+        """Test that appended records are read back after reopening."""
+        path = str(tmp_path / "db.wal")
+        wal = WriteAheadLog(path)
+        wal.append(OP_PUT, 100, "user1", "name", "Alice")
+        wal.append(OP_DELETE, 110, "user1", "name")
+        wal.close()
+
+        wal = WriteAheadLog(path)
+        assert list(wal.records()) == [
+            (1, OP_PUT, (100, "user1", "name", "Alice")),
+            (2, OP_DELETE, (110, "user1", "name")),
+        ]
+        assert wal.append(OP_PUT, 120, "user1", "name", "Bob") == 3
+        wal.close()
+
+    def test_torn_tail_dropped(self, tmp_path):
+        """Test that a record cut short by a crash is dropped on open."""
+        path = str(tmp_path / "db.wal")
+        wal = WriteAheadLog(path)
+        wal.append(OP_PUT, 100, "user1", "name", "Alice")
+        wal.append(OP_PUT, 110, "user1", "name", "Bob")
+        wal.close()
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 3)
+
+        wal = WriteAheadLog(path)
+        assert [args for _, _, args in wal.records()] == [(100, "user1", "name", "Alice")]
+        wal.append(OP_PUT, 120, "user1", "name", "Carol")
+        assert [args[3] for _, _, args in wal.records()] == ["Alice", "Carol"]
+        wal.close()
+
+    def test_concurrent_writers_share_fsyncs(self, tmp_path):
+        """Test that every record is written and fsyncs are never more than appends."""
+        wal = WriteAheadLog(str(tmp_path / "db.wal"), fsync="always")
+
+        def writer(n):
+            for i in range(50):
+                wal.append(OP_PUT, i, f"key{n}", "field", "value")
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(seq for seq, _, _ in wal.records()) == list(range(1, 401))
+        assert wal.syncs <= 400
+        wal.close()
+
+    def test_unknown_fsync_policy_rejected(self, tmp_path):
+        """Test that an unknown fsync policy raises ValueError."""
+        with pytest.raises(ValueError):
+            WriteAheadLog(str(tmp_path / "db.wal"), fsync="sometimes")
+
+
+class TestDatabaseRecovery:
+    """Test cases for InMemoryDB rebuilt from its write-ahead log."""
+
+    @pytest.mark.parametrize("fsync", ["always", "group", "never"])
+    def test_replay_rebuilds_state(self, tmp_path, fsync):
+        """Test that reopening replays puts, deletes, backups and restores."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path, wal_fsync=fsync, wal_group_commit_ms=1)
+        db.put_at_with_ttl(100, "user1", "session", "abc", 100)
+        db.put_at(100, "user1", "name", "Alice")
+        db.backup_at(150)
+        db.delete_at(160, "user1", "name")
+        db.put("user2", "name", "Bob")
+        db.restore_at(300, 150)
+        db.close()
+
+        db = InMemoryDB(wal_path=path)
+        assert db.scan_at(300, "user1") == ["name(Alice)", "session(abc)"]
+        assert db.get_at(350, "user1", "session") is None
+        assert db.get_at(300, "user2", "name") is None
+        assert db.get_at(170, "user1", "name") is None
+        assert db.list_backups() == [150]
+        db.close()
+
+    def test_checkpoint_plus_tail(self, tmp_path):
+        """Test recovery from a snapshot and the records written after it."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path, backup_mode="delta")
+        db.put_at(100, "user1", "name", "Alice")
+        db.backup_at(110)
+        db.put_at(120, "user1", "name", "Alicia")
+        db.backup_at(130)
+        db.checkpoint()
+        assert os.path.getsize(path) == 0
+
+        db.put_at(140, "user2", "name", "Bob")
+        db.close()
+
+        db = InMemoryDB(wal_path=path, backup_mode="delta")
+        assert db.get_at(140, "user1", "name") == "Alicia"
+        assert db.get_at(140, "user2", "name") == "Bob"
+        db.restore_at(200, 115)
+        assert db.get_at(200, "user1", "name") == "Alice"
+        db.close()
+
+    def test_records_in_snapshot_not_replayed(self, tmp_path):
+        """Test that a crash between snapshot and log truncation is harmless."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path)
+        db.put_at(100, "user1", "count", "1")
+        with open(path, "rb") as f:
+            log = f.read()
+        db.checkpoint()
+        db.close()
+        with open(path, "wb") as f:
+            f.write(log)
+
+        db = InMemoryDB(wal_path=path)
+        assert list(db._wal.records()) == []
+        assert db._wal.append(OP_PUT, 110, "user1", "count", "2") == 2
+        assert db.get_at(100, "user1", "count") == "1"
+        db.close()
+
+    def test_snapshot_with_other_backup_mode_rejected(self, tmp_path):
+        """Test that a snapshot cannot be loaded with a different backup_mode."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path)
+        db.put_at(100, "user1", "name", "Alice")
+        db.checkpoint()
+        db.close()
+
+        with pytest.raises(ValueError):
+            InMemoryDB(wal_path=path, backup_mode="delta")
+
+
+    def test_rejected_write_not_applied(self, tmp_path):
+        """Test that a write the log cannot encode leaves the database unchanged."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path)
+        db.put_at(100, "user1", "name", "Alice")
+        with pytest.raises(AttributeError):
+            db.put_at(110, "user1", "age", 25)
+        with pytest.raises(AttributeError):
+            db.put_many_at(120, [("user2", "name", "Bob"), ("user2", "age", 25)])
+        assert db.scan_many_at(130, ["user1", "user2"]) == [["name(Alice)"], []]
+        assert db.delete_many_at(140, [["user1", "name"], ("user1", "name")]) == [True, False]
+        db.close()
+
+        db = InMemoryDB(wal_path=path)
+        assert db.get_at(130, "user1", "name") == "Alice"
+        assert db.get_at(140, "user1", "name") is None
+        db.close()
+
+    @pytest.mark.parametrize("expiry_budget", [0, 10])
+    def test_reclaimed_fields_replayed(self, tmp_path, expiry_budget):
+        """Test that fields reclaimed by purge_expired or expiry_budget stay gone at past timestamps."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path, expiry_budget=expiry_budget)
+        db.put_at_with_ttl(100, "user1", "session", "abc", 10)
+        db.put_at(100, "user1", "name", "Alice")
+        if expiry_budget:
+            db.get_at(500, "user2", "name")  # Reclaims during the read
+        else:
+            assert db.purge_expired(500) == 1
+        db.put_at(510, "user1", "session", "xyz")
+        assert db.get_at(105, "user1", "session") is None
+        db.close()
+
+        # Without a budget of its own, only the logged reclamation removes the field
+        db = InMemoryDB(wal_path=path)
+        assert db.get_at(105, "user1", "session") is None
+        assert db.scan_at(510, "user1") == ["name(Alice)", "session(xyz)"]
+        db.close()
+
+    def test_gc_watermark_survives(self, tmp_path):
+        """Test that the GC watermark is replayed and kept by a checkpoint."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path)
+        db.put_at(100, "user1", "name", "Alice")
+        db.set_gc_watermark(150)
+        db.close()
+
+        db = InMemoryDB(wal_path=path)
+        assert db.gc_stats()["watermark"] == 150
+        db.checkpoint()
+        db.close()
+        db = InMemoryDB(wal_path=path)
+        assert db.gc_stats()["watermark"] == 150
+        db.close()
+
+    def test_retention_replayed_after_unlogged_read(self, tmp_path):
+        """Test that replay thins the same backups as the live database, despite a read ahead."""
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path, backup_retention=[(10, 5)])
+        db.put_at(1, "user1", "name", "v1")
+        db.backup_at(1)
+        db.put_at(2, "user1", "name", "v2")
+        db.backup_at(2)
+        assert db.get_at(1000, "user1", "name") == "v2"
+        db.backup_at(3)
+        db.restore_at(2000, 2)
+        expected = db.list_backups(), db.get_at(2001, "user1", "name")
+        assert expected == ([1, 2, 3], "v2")
+        db.close()
+
+        db = InMemoryDB(wal_path=path, backup_retention=[(10, 5)])
+        assert (db.list_backups(), db.get_at(2001, "user1", "name")) == expected
+        db.close()
+
+    def test_missing_attached_file_skipped(self, tmp_path):
+        """Test that recovery warns about and skips an attached snapshot file that is gone."""
+        snap_path = str(tmp_path / "backup.snap")
+        source = InMemoryDB()
+        source.put_at(100, "user1", "name", "Alice")
+        source.backup_at(100)
+        source.export_backup(100, snap_path)
+
+        path = str(tmp_path / "db.wal")
+        db = InMemoryDB(wal_path=path)
+        db.attach_backup(snap_path)
+        db.put_at(200, "user2", "name", "Bob")
+        db.close()
+        os.remove(snap_path)
+
+        with pytest.warns(RuntimeWarning, match="backup.snap"):
+            db = InMemoryDB(wal_path=path)
+        assert db.list_backups() == []
+        assert db.get_at(200, "user2", "name") == "Bob"
+        db.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
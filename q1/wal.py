@@ -0,0 +1,267 @@
+"""
+Write-Ahead Log
+
+An append-only log of InMemoryDB's mutating calls, plus a snapshot file, so
+that a database can be rebuilt after the process dies.
+
+Each record is framed as a header (payload length, CRC-32 of the payload,
+sequence number) followed by the payload: an opcode byte and the call's
+arguments, with integers as signed 64-bit values and strings as
+length-prefixed UTF-8. A record cut short by a crash fails its length or CRC
+check; it and everything after it are dropped when the log is opened.
+
+checkpoint() writes the database state to `<path>.snapshot`, tagged with the
+sequence number of the last record it includes, and empties the log. Replay
+loads the snapshot and applies the records after it.
+
+Fsync policies:
+    "always" - every append returns once it is on disk. Writers that arrive
+               while an fsync is running are covered together by the next
+               one (group commit), so concurrent writers share fsyncs
+    "group"  - a background thread fsyncs every group_commit_ms; appends
+               return once the record is written to the OS
+    "never"  - records are written to the OS and never fsynced
+
+Example usage:
+    wal = WriteAheadLog("db.wal", fsync="group", group_commit_ms=5)
+    wal.append(OP_PUT, 100, "user1", "name", "Alice")
+    list(wal.records())  # [(1, OP_PUT, (100, "user1", "name", "Alice"))]
+    wal.close()
+"""
+
+import os
+import struct
+import threading
+import zlib
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+OP_PUT = 1
+OP_PUT_TTL = 2
+OP_DELETE = 3
+OP_BACKUP = 4
+OP_RESTORE = 5
+OP_ATTACH = 6
+# A field reclaimed by purge_expired or expiry_budget: horizon, key, field
+OP_RECLAIM = 7
+OP_GC_WATERMARK = 8
+
+# Argument types of each opcode: "i" for an integer, "s" for a string
+_SCHEMAS = {
+    OP_PUT: "isss",
+    OP_PUT_TTL: "isssi",
+    OP_DELETE: "iss",
+    OP_BACKUP: "i",
+    OP_RESTORE: "ii",
+    OP_ATTACH: "s",
+    OP_RECLAIM: "iss",
+    OP_GC_WATERMARK: "i",
+}
+
+FSYNC_POLICIES = ("always", "group", "never")
+
+# Record header: payload length, CRC-32 of the payload, sequence number
+_HEADER = struct.Struct("<IIQ")
+# Snapshot header: magic, sequence number of the last record included, CRC-32
+_SNAPSHOT_HEADER = struct.Struct("<8sQI")
+_SNAPSHOT_MAGIC = b"IMDBSNP1"
+_INT = struct.Struct("<q")
+_LEN = struct.Struct("<I")
+
+Record = Tuple[int, int, tuple]
+
+
+def encode(op: int, args: tuple) -> bytes:
+    """Encode an opcode and its arguments as a record payload."""
+    parts = [bytes((op,))]
+    for kind, arg in zip(_SCHEMAS[op], args):
+        if kind == "i":
+            parts.append(_INT.pack(arg))
+        else:
+            data = arg.encode()
+            parts.append(_LEN.pack(len(data)))
+            parts.append(data)
+    return b"".join(parts)
+
+
+def decode(payload: bytes) -> Tuple[int, tuple]:
+    """Decode a record payload into its opcode and arguments."""
+    op = payload[0]
+    offset = 1
+    args = []
+    for kind in _SCHEMAS[op]:
+        if kind == "i":
+            args.append(_INT.unpack_from(payload, offset)[0])
+            offset += _INT.size
+        else:
+            (length,) = _LEN.unpack_from(payload, offset)
+            offset += _LEN.size
+            args.append(payload[offset:offset + length].decode())
+            offset += length
+    return op, tuple(args)
+
+
+def _scan(data: bytes) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield (end offset, sequence number, payload) of each intact record."""
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, crc, sequence = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        offset = start + length
+        yield offset, sequence, payload
+
+
+class WriteAheadLog:
+    """Append-only, CRC-framed log file with a snapshot and group commit."""
+
+    def __init__(self, path: str, fsync: str = "always", group_commit_ms: int = 10):
+        """
+        Open or create the log at path, dropping any torn tail.
+
+        Args:
+            path: Log file path; the snapshot is stored next to it
+            fsync: Fsync policy, one of "always", "group" or "never"
+            group_commit_ms: Interval between fsyncs for the "group" policy
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync!r}")
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self._fsync = fsync
+        snapshot = self.load_snapshot()
+        self._sequence = 0 if snapshot is None else snapshot[0]
+        # Keep the intact prefix of the log and continue numbering after it
+        valid_end = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for valid_end, sequence, _ in _scan(f.read()):
+                    self._sequence = max(self._sequence, sequence)
+        self._file = open(path, "ab", buffering=0)
+        self._file.truncate(valid_end)
+        self._synced = self._sequence
+        self.syncs = 0
+        # _lock orders appends; _sync_lock lets one writer fsync for everyone waiting
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        if fsync == "group":
+            self._flusher = threading.Thread(
+                target=self._sync_loop, args=(group_commit_ms / 1000,), daemon=True)
+            self._flusher.start()
+
+    def append(self, op: int, *args) -> int:
+        """
+        Write a record, syncing it according to the fsync policy.
+
+        Returns:
+            The record's sequence number
+        """
+        payload = encode(op, args)
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+            self._file.write(_HEADER.pack(len(payload), zlib.crc32(payload), sequence) + payload)
+        if self._fsync == "always":
+            self._sync_to(sequence)
+        return sequence
+
+    def append_many(self, records: Iterable[Tuple[int, tuple]]) -> int:
+        """
+        Write several (op, args) records at once, syncing them together.
+
+        Returns:
+            The sequence number of the last record
+        """
+        payloads = [encode(op, args) for op, args in records]
+        with self._lock:
+            frames = []
+            for payload in payloads:
+                self._sequence += 1
+                frames.append(_HEADER.pack(len(payload), zlib.crc32(payload), self._sequence))
+                frames.append(payload)
+            sequence = self._sequence
+            self._file.write(b"".join(frames))
+        if self._fsync == "always":
+            self._sync_to(sequence)
+        return sequence
+
+    def sync(self) -> None:
+        """Fsync every record appended so far."""
+        self._sync_to(self._sequence)
+
+    def records(self) -> Iterator[Record]:
+        """Yield (sequence, op, args) for the records after the snapshot."""
+        snapshot = self.load_snapshot()
+        after = 0 if snapshot is None else snapshot[0]
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for _, sequence, payload in _scan(data):
+            if sequence > after:
+                op, args = decode(payload)
+                yield sequence, op, args
+
+    def load_snapshot(self) -> Optional[Tuple[int, bytes]]:
+        """Return (last sequence number, state) of the snapshot, if there is one."""
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path, "rb") as f:
+            data = f.read()
+        magic, sequence, crc = _SNAPSHOT_HEADER.unpack_from(data)
+        state = data[_SNAPSHOT_HEADER.size:]
+        if magic != _SNAPSHOT_MAGIC or zlib.crc32(state) != crc:
+            raise ValueError(f"Corrupt snapshot: {self.snapshot_path}")
+        return sequence, state
+
+    def checkpoint(self, dump: Callable[[], bytes]) -> None:
+        """
+        Replace the snapshot with dump() and empty the log.
+
+        Args:
+            dump: Returns the serialized state; called with appends blocked,
+                so it covers exactly the records written so far
+        """
+        with self._lock:
+            state = dump()
+            temp_path = self.snapshot_path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, self._sequence, zlib.crc32(state)))
+                f.write(state)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.snapshot_path)
+            # Records up to here are skipped on replay, so a crash before the
+            # truncate below cannot apply them twice
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+            self._synced = self._sequence
+
+    def close(self) -> None:
+        """Stop the group commit thread, fsync and close the log."""
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join()
+            self._flusher = None
+        if not self._file.closed:
+            if self._fsync != "never":
+                self.sync()
+            self._file.close()
+
+    def _sync_to(self, sequence: int) -> None:
+        """Return once the record with this sequence number is on disk."""
+        with self._sync_lock:
+            if self._synced >= sequence:
+                # Another writer's fsync covered it while we waited
+                return
+            with self._lock:
+                written = self._sequence
+            os.fsync(self._file.fileno())
+            self._synced = written
+            self.syncs += 1
+
+    def _sync_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            if self._synced < self._sequence:
+                self.sync()